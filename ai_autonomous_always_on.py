@@ -46,6 +46,9 @@ class GracefulKiller:
     def __init__(self):
         signal.signal(signal.SIGINT, self.exit_gracefully)
         signal.signal(signal.SIGTERM, self.exit_gracefully)
+        # kill -USR2 <pid>: profilo a campionamento in logs/profiles (flamegraph)
+        from utils.profiler import install_signal_handler
+        install_signal_handler()
     
     def exit_gracefully(self, signum, frame):
         logger.log("Ricevuto segnale di shutdown, salvando stato...", "WARNING")
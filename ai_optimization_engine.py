@@ -9,13 +9,16 @@ import sys
 import asyncio
 import logging
 import json
+import time
+from collections import deque
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 import sqlite3
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.linear_model import LinearRegression, Ridge, SGDRegressor
 from sklearn.svm import SVR
 from sklearn.neural_network import MLPRegressor
 from sklearn.preprocessing import StandardScaler, RobustScaler
@@ -24,6 +27,9 @@ from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import warnings
 warnings.filterwarnings('ignore')
 
+from utils.feature_graph import FeatureGraph, FeatureMemo
+from utils.shared_models import LazyArtifact, compile_model, save_shared
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -36,300 +42,282 @@ logging.basicConfig(
 logger = logging.getLogger('AIOptimization')
 
 class AdvancedFeatureEngineer:
-    """Ingegnere delle feature avanzato per AI"""
+    """
+    Ingegnere delle feature avanzato per AI.
+    
+    Le feature sono nodi di un FeatureGraph: ciascuna dichiara le colonne da
+    cui dipende, gli intermedi condivisi (rendimenti, medie e deviazioni
+    mobili, EMA, prezzo tipico) si calcolano una volta sola e si calcolano
+    solo le feature richieste. I risultati sono memoizzati per (simbolo,
+    ultima barra, feature richieste).
+    """
     
-    def __init__(self):
+    SOURCES = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+    
+    def __init__(self, memo_size: int = 64):
         self.logger = logging.getLogger('FeatureEngineer')
         self.scalers = {}
         self.feature_importance = {}
+        self.graph = self._build_graph()
+        self.memo = FeatureMemo(memo_size)
+    
+    @property
+    def feature_names(self) -> List[str]:
+        """Tutte le feature prodotte, nell'ordine delle colonne di output"""
+        return self.graph.outputs
     
-    def create_advanced_features(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Crea feature avanzate per AI"""
+    def create_advanced_features(self, data: pd.DataFrame, features: Optional[List[str]] = None,
+                                 symbol: str = 'default') -> pd.DataFrame:
+        """
+        Crea feature avanzate per AI. Con features calcola solo quelle (più i
+        loro intermedi); le colonne originali restano sempre nell'output.
+        """
         try:
-            self.logger.info(f"🔧 Creazione feature avanzate da {len(data)} righe...")
-            
-            # Copia dati
-            df = data.copy()
-            
-            # 1. Feature tecniche base
-            df = self._add_technical_indicators(df)
-            
-            # 2. Feature di momentum
-            df = self._add_momentum_features(df)
-            
-            # 3. Feature di volatilità
-            df = self._add_volatility_features(df)
-            
-            # 4. Feature di volume
-            df = self._add_volume_features(df)
-            
-            # 5. Feature di pattern
-            df = self._add_pattern_features(df)
-            
-            # 6. Feature di sentiment (simulato)
-            df = self._add_sentiment_features(df)
-            
-            # 7. Feature di time series
-            df = self._add_time_features(df)
+            key = FeatureMemo.make_key(data, symbol, features)
+            cached = self.memo.get(key)
+            if cached is not None:
+                return cached.copy()
             
-            # 8. Feature di cross-correlation
-            df = self._add_correlation_features(df)
+            self.logger.info(f"🔧 Creazione feature avanzate da {len(data)} righe...")
             
-            # 9. Pulizia finale
+            computed = self.graph.compute(data, features)
+            computed = {name: values for name, values in computed.items() if name not in data.columns}
+            df = pd.concat([data, pd.DataFrame(computed, index=data.index)], axis=1)
             df = self._clean_features(df)
             
+            self.memo.put(key, df)
             self.logger.info(f"✅ Feature create: {len(df.columns)} colonne totali")
-            return df
+            return df.copy()
             
         except Exception as e:
             self.logger.error(f"❌ Errore creazione feature: {e}")
             return data
     
-    def _add_technical_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Aggiunge indicatori tecnici avanzati"""
-        try:
-            # SMA multiple
-            for period in [5, 10, 20, 50, 100]:
-                df[f'sma_{period}'] = df['close'].rolling(period, min_periods=1).mean()
-            
-            # EMA multiple
-            for period in [5, 10, 20, 50]:
-                df[f'ema_{period}'] = df['close'].ewm(span=period).mean()
-            
-            # RSI multiple
-            for period in [7, 14, 21]:
-                df[f'rsi_{period}'] = self._calculate_rsi(df['close'], period)
-            
-            # MACD variations
-            df['macd_12_26'] = df['ema_12'] - df['ema_26']
-            df['macd_signal'] = df['macd_12_26'].ewm(span=9).mean()
-            df['macd_histogram'] = df['macd_12_26'] - df['macd_signal']
-            
-            # Bollinger Bands multiple
-            for period in [10, 20, 50]:
-                bb_middle = df['close'].rolling(period, min_periods=1).mean()
-                bb_std = df['close'].rolling(period, min_periods=1).std()
-                df[f'bb_upper_{period}'] = bb_middle + (bb_std * 2)
-                df[f'bb_lower_{period}'] = bb_middle - (bb_std * 2)
-                df[f'bb_width_{period}'] = df[f'bb_upper_{period}'] - df[f'bb_lower_{period}']
-                df[f'bb_position_{period}'] = (df['close'] - df[f'bb_lower_{period}']) / df[f'bb_width_{period}']
-            
-            # Stochastic Oscillator
-            df['stoch_k'] = self._calculate_stochastic(df)
-            df['stoch_d'] = df['stoch_k'].rolling(3, min_periods=1).mean()
-            
-            # Williams %R
-            df['williams_r'] = self._calculate_williams_r(df)
-            
-            # CCI (Commodity Channel Index)
-            df['cci'] = self._calculate_cci(df)
-            
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"❌ Errore indicatori tecnici: {e}")
-            return df
+    def _build_graph(self) -> FeatureGraph:
+        """Dichiara tutte le feature, raggruppate come nella pipeline originale"""
+        graph = FeatureGraph(self.SOURCES)
+        self._add_shared_intermediates(graph)
+        self._add_technical_indicators(graph)
+        self._add_momentum_features(graph)
+        self._add_volatility_features(graph)
+        self._add_volume_features(graph)
+        self._add_pattern_features(graph)
+        self._add_sentiment_features(graph)
+        self._add_time_features(graph)
+        self._add_correlation_features(graph)
+        return graph
     
-    def _add_momentum_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Aggiunge feature di momentum"""
-        try:
-            # Price changes multiple timeframes
-            for period in [1, 3, 5, 10, 20]:
-                df[f'price_change_{period}'] = df['close'].pct_change(period)
-                df[f'price_change_abs_{period}'] = df[f'price_change_{period}'].abs()
-            
-            # Momentum indicators
-            df['momentum_10'] = df['close'] / df['close'].shift(10) - 1
-            df['momentum_20'] = df['close'] / df['close'].shift(20) - 1
-            
-            # Rate of Change
-            for period in [5, 10, 20]:
-                df[f'roc_{period}'] = ((df['close'] - df['close'].shift(period)) / df['close'].shift(period)) * 100
-            
-            # Acceleration (second derivative)
-            df['acceleration'] = df['price_change_1'].diff()
-            
-            # Velocity (smoothed momentum)
-            df['velocity'] = df['price_change_1'].rolling(5, min_periods=1).mean()
-            
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"❌ Errore feature momentum: {e}")
-            return df
+    def _add_shared_intermediates(self, graph: FeatureGraph):
+        """Intermedi usati da più gruppi di feature"""
+        graph.add('prev_close', ['close'], lambda close: close.shift(1), output=False)
+        graph.add('prev_open', ['open'], lambda open_: open_.shift(1), output=False)
+        graph.add('hl_range', ['high', 'low'], lambda high, low: high - low, output=False)
+        graph.add('typical_price', ['high', 'low', 'close'],
+                  lambda high, low, close: (high + low + close) / 3, output=False)
+        graph.add('close_delta', ['close'], lambda close: close.diff(), output=False)
+        graph.add('gain', ['close_delta'], lambda delta: delta.where(delta > 0, 0), output=False)
+        graph.add('loss', ['close_delta'], lambda delta: -delta.where(delta < 0, 0), output=False)
+        graph.add('low_min_14', ['low'], lambda low: low.rolling(14, min_periods=1).min(), output=False)
+        graph.add('high_max_14', ['high'], lambda high: high.rolling(14, min_periods=1).max(), output=False)
+        # Deviazione standard mobile del close: bande di Bollinger e volatilità
+        for period in [5, 10, 20, 50]:
+            graph.add(f'close_std_{period}', ['close'],
+                      lambda close, p=period: close.rolling(p, min_periods=1).std(), output=False)
     
-    def _add_volatility_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Aggiunge feature di volatilità"""
-        try:
-            # True Range
-            df['tr'] = np.maximum(
-                df['high'] - df['low'],
-                np.maximum(
-                    abs(df['high'] - df['close'].shift(1)),
-                    abs(df['low'] - df['close'].shift(1))
-                )
-            )
-            
-            # Average True Range
-            for period in [7, 14, 21]:
-                df[f'atr_{period}'] = df['tr'].rolling(period, min_periods=1).mean()
-            
-            # Volatility (rolling std)
-            for period in [5, 10, 20, 50]:
-                df[f'volatility_{period}'] = df['close'].rolling(period, min_periods=1).std()
-                df[f'volatility_ratio_{period}'] = df[f'volatility_{period}'] / df['close']
-            
-            # Intraday volatility
-            df['intraday_volatility'] = (df['high'] - df['low']) / df['close']
-            
-            # Gap analysis
-            df['gap'] = (df['open'] - df['close'].shift(1)) / df['close'].shift(1)
-            df['gap_abs'] = df['gap'].abs()
-            
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"❌ Errore feature volatilità: {e}")
-            return df
+    def _add_technical_indicators(self, graph: FeatureGraph):
+        """Indicatori tecnici avanzati"""
+        # SMA multiple
+        for period in [5, 10, 20, 50, 100]:
+            graph.add(f'sma_{period}', ['close'], lambda close, p=period: close.rolling(p, min_periods=1).mean())
+        
+        # EMA multiple (12 e 26 solo come intermedi del MACD)
+        for period in [5, 10, 12, 20, 26, 50]:
+            graph.add(f'ema_{period}', ['close'], lambda close, p=period: close.ewm(span=p).mean(),
+                      output=period not in (12, 26))
+        
+        # RSI multiple
+        for period in [7, 14, 21]:
+            graph.add(f'rsi_{period}', ['gain', 'loss'], lambda gain, loss, p=period: self._calculate_rsi(gain, loss, p))
+        
+        # MACD variations
+        graph.add('macd_12_26', ['ema_12', 'ema_26'], lambda fast, slow: fast - slow)
+        graph.add('macd_signal', ['macd_12_26'], lambda macd: macd.ewm(span=9).mean())
+        graph.add('macd_histogram', ['macd_12_26', 'macd_signal'], lambda macd, signal: macd - signal)
+        
+        # Bollinger Bands multiple (media = SMA, deviazione condivisa con la volatilità)
+        for period in [10, 20, 50]:
+            graph.add(f'bb_upper_{period}', [f'sma_{period}', f'close_std_{period}'],
+                      lambda middle, std: middle + (std * 2))
+            graph.add(f'bb_lower_{period}', [f'sma_{period}', f'close_std_{period}'],
+                      lambda middle, std: middle - (std * 2))
+            graph.add(f'bb_width_{period}', [f'bb_upper_{period}', f'bb_lower_{period}'],
+                      lambda upper, lower: upper - lower)
+            graph.add(f'bb_position_{period}', ['close', f'bb_lower_{period}', f'bb_width_{period}'],
+                      lambda close, lower, width: (close - lower) / width)
+        
+        # Stochastic Oscillator
+        graph.add('stoch_k', ['close', 'low_min_14', 'high_max_14'],
+                  lambda close, low_min, high_max: 100 * (close - low_min) / (high_max - low_min))
+        graph.add('stoch_d', ['stoch_k'], lambda stoch_k: stoch_k.rolling(3, min_periods=1).mean())
+        
+        # Williams %R
+        graph.add('williams_r', ['close', 'low_min_14', 'high_max_14'],
+                  lambda close, low_min, high_max: -100 * (high_max - close) / (high_max - low_min))
+        
+        # CCI (Commodity Channel Index)
+        graph.add('cci', ['typical_price'], self._calculate_cci)
     
-    def _add_volume_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Aggiunge feature di volume"""
-        try:
-            # Volume moving averages
-            for period in [5, 10, 20, 50]:
-                df[f'volume_sma_{period}'] = df['volume'].rolling(period, min_periods=1).mean()
-                df[f'volume_ratio_{period}'] = df['volume'] / df[f'volume_sma_{period}']
-            
-            # Volume-Price Trend
-            df['vpt'] = (df['volume'] * df['price_change_1']).cumsum()
-            
-            # On-Balance Volume
-            df['obv'] = (df['volume'] * np.sign(df['price_change_1'])).cumsum()
-            
-            # Volume Rate of Change
-            for period in [5, 10]:
-                df[f'volume_roc_{period}'] = df['volume'].pct_change(period)
-            
-            # Money Flow Index (simplified)
-            df['money_flow'] = df['volume'] * ((df['high'] + df['low'] + df['close']) / 3)
-            df['mfi'] = df['money_flow'].rolling(14, min_periods=1).mean()
-            
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"❌ Errore feature volume: {e}")
-            return df
+    def _add_momentum_features(self, graph: FeatureGraph):
+        """Feature di momentum"""
+        # Price changes multiple timeframes
+        for period in [1, 3, 5, 10, 20]:
+            graph.add(f'price_change_{period}', ['close'], lambda close, p=period: close.pct_change(p))
+            graph.add(f'price_change_abs_{period}', [f'price_change_{period}'], lambda change: change.abs())
+        
+        # Momentum indicators (stesso valore della variazione percentuale)
+        graph.add('momentum_10', ['price_change_10'], lambda change: change)
+        graph.add('momentum_20', ['price_change_20'], lambda change: change)
+        
+        # Rate of Change
+        for period in [5, 10, 20]:
+            graph.add(f'roc_{period}', [f'price_change_{period}'], lambda change: change * 100)
+        
+        # Acceleration (second derivative)
+        graph.add('acceleration', ['price_change_1'], lambda change: change.diff())
+        
+        # Velocity (smoothed momentum)
+        graph.add('velocity', ['price_change_1'], lambda change: change.rolling(5, min_periods=1).mean())
     
-    def _add_pattern_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Aggiunge feature di pattern recognition"""
-        try:
-            # Candlestick patterns (simplified)
-            df['body_size'] = abs(df['close'] - df['open']) / df['close']
-            df['upper_shadow'] = (df['high'] - np.maximum(df['open'], df['close'])) / df['close']
-            df['lower_shadow'] = (np.minimum(df['open'], df['close']) - df['low']) / df['close']
-            
-            # Doji pattern
-            df['is_doji'] = (df['body_size'] < 0.001).astype(int)
-            
-            # Hammer pattern
-            df['is_hammer'] = ((df['lower_shadow'] > 2 * df['body_size']) & 
-                              (df['upper_shadow'] < df['body_size'])).astype(int)
-            
-            # Engulfing patterns
-            df['bullish_engulfing'] = ((df['close'] > df['open']) & 
-                                      (df['close'].shift(1) < df['open'].shift(1)) &
-                                      (df['open'] < df['close'].shift(1)) &
-                                      (df['close'] > df['open'].shift(1))).astype(int)
-            
-            # Support/Resistance levels (simplified)
-            df['local_high'] = df['high'].rolling(5, center=True, min_periods=1).max() == df['high']
-            df['local_low'] = df['low'].rolling(5, center=True, min_periods=1).min() == df['low']
-            
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"❌ Errore feature pattern: {e}")
-            return df
+    def _add_volatility_features(self, graph: FeatureGraph):
+        """Feature di volatilità"""
+        # True Range
+        graph.add('tr', ['high', 'low', 'prev_close', 'hl_range'],
+                  lambda high, low, prev_close, hl_range: np.maximum(
+                      hl_range, np.maximum(abs(high - prev_close), abs(low - prev_close))))
+        
+        # Average True Range
+        for period in [7, 14, 21]:
+            graph.add(f'atr_{period}', ['tr'], lambda tr, p=period: tr.rolling(p, min_periods=1).mean())
+        
+        # Volatility (rolling std)
+        for period in [5, 10, 20, 50]:
+            graph.add(f'volatility_{period}', [f'close_std_{period}'], lambda std: std)
+            graph.add(f'volatility_ratio_{period}', [f'close_std_{period}', 'close'], lambda std, close: std / close)
+        
+        # Intraday volatility
+        graph.add('intraday_volatility', ['hl_range', 'close'], lambda hl_range, close: hl_range / close)
+        
+        # Gap analysis
+        graph.add('gap', ['open', 'prev_close'], lambda open_, prev_close: (open_ - prev_close) / prev_close)
+        graph.add('gap_abs', ['gap'], lambda gap: gap.abs())
     
-    def _add_sentiment_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Aggiunge feature di sentiment (simulate)"""
-        try:
-            # Fear & Greed Index (simulated)
-            df['fear_greed'] = 50 + 30 * np.sin(np.arange(len(df)) * 0.1) + np.random.normal(0, 10, len(df))
-            df['fear_greed'] = np.clip(df['fear_greed'], 0, 100)
-            
-            # Market sentiment based on price action
-            df['bullish_sentiment'] = (df['close'] > df['sma_20']).astype(int)
-            df['bearish_sentiment'] = (df['close'] < df['sma_20']).astype(int)
-            
-            # Trend strength
-            df['trend_strength'] = abs(df['close'] - df['sma_50']) / df['sma_50']
-            
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"❌ Errore feature sentiment: {e}")
-            return df
+    def _add_volume_features(self, graph: FeatureGraph):
+        """Feature di volume"""
+        # Volume moving averages
+        for period in [5, 10, 20, 50]:
+            graph.add(f'volume_sma_{period}', ['volume'], lambda volume, p=period: volume.rolling(p, min_periods=1).mean())
+            graph.add(f'volume_ratio_{period}', ['volume', f'volume_sma_{period}'], lambda volume, sma: volume / sma)
+        
+        # Volume-Price Trend
+        graph.add('vpt', ['volume', 'price_change_1'], lambda volume, change: (volume * change).cumsum())
+        
+        # On-Balance Volume
+        graph.add('obv', ['volume', 'price_change_1'], lambda volume, change: (volume * np.sign(change)).cumsum())
+        
+        # Volume Rate of Change
+        for period in [5, 10]:
+            graph.add(f'volume_roc_{period}', ['volume'], lambda volume, p=period: volume.pct_change(p))
+        
+        # Money Flow Index (simplified)
+        graph.add('money_flow', ['volume', 'typical_price'], lambda volume, tp: volume * tp)
+        graph.add('mfi', ['money_flow'], lambda money_flow: money_flow.rolling(14, min_periods=1).mean())
     
-    def _add_time_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Aggiunge feature temporali"""
-        try:
-            if 'timestamp' in df.columns:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                df['hour'] = df['timestamp'].dt.hour
-                df['day_of_week'] = df['timestamp'].dt.dayofweek
-                df['day_of_month'] = df['timestamp'].dt.day
-                df['month'] = df['timestamp'].dt.month
-                
-                # Cyclical encoding
-                df['hour_sin'] = np.sin(2 * np.pi * df['hour'] / 24)
-                df['hour_cos'] = np.cos(2 * np.pi * df['hour'] / 24)
-                df['day_sin'] = np.sin(2 * np.pi * df['day_of_week'] / 7)
-                df['day_cos'] = np.cos(2 * np.pi * df['day_of_week'] / 7)
-            
-            # Sequence features
-            df['sequence_id'] = np.arange(len(df))
-            df['sequence_normalized'] = df['sequence_id'] / len(df)
-            
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"❌ Errore feature temporali: {e}")
-            return df
+    def _add_pattern_features(self, graph: FeatureGraph):
+        """Feature di pattern recognition"""
+        # Candlestick patterns (simplified)
+        graph.add('body_size', ['open', 'close'], lambda open_, close: abs(close - open_) / close)
+        graph.add('upper_shadow', ['open', 'high', 'close'],
+                  lambda open_, high, close: (high - np.maximum(open_, close)) / close)
+        graph.add('lower_shadow', ['open', 'low', 'close'],
+                  lambda open_, low, close: (np.minimum(open_, close) - low) / close)
+        
+        # Doji pattern
+        graph.add('is_doji', ['body_size'], lambda body: (body < 0.001).astype(int))
+        
+        # Hammer pattern
+        graph.add('is_hammer', ['body_size', 'upper_shadow', 'lower_shadow'],
+                  lambda body, upper, lower: ((lower > 2 * body) & (upper < body)).astype(int))
+        
+        # Engulfing patterns
+        graph.add('bullish_engulfing', ['open', 'close', 'prev_open', 'prev_close'],
+                  lambda open_, close, prev_open, prev_close: ((close > open_) &
+                                                               (prev_close < prev_open) &
+                                                               (open_ < prev_close) &
+                                                               (close > prev_open)).astype(int))
+        
+        # Support/Resistance levels (simplified)
+        graph.add('local_high', ['high'], lambda high: high.rolling(5, center=True, min_periods=1).max() == high)
+        graph.add('local_low', ['low'], lambda low: low.rolling(5, center=True, min_periods=1).min() == low)
     
-    def _add_correlation_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Aggiunge feature di correlazione"""
-        try:
-            # Price-Volume correlation
-            df['price_volume_corr'] = df['close'].rolling(20, min_periods=1).corr(df['volume'])
-            
-            # High-Low correlation with volume
-            df['hl_volume_corr'] = (df['high'] - df['low']).rolling(20, min_periods=1).corr(df['volume'])
-            
-            # Cross-correlation between different timeframes
-            df['sma_5_20_ratio'] = df['sma_5'] / df['sma_20']
-            df['sma_20_50_ratio'] = df['sma_20'] / df['sma_50']
-            
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"❌ Errore feature correlazione: {e}")
-            return df
+    def _add_sentiment_features(self, graph: FeatureGraph):
+        """Feature di sentiment (simulate)"""
+        # Fear & Greed Index (simulated)
+        graph.add('fear_greed', ['close'], lambda close: pd.Series(np.clip(
+            50 + 30 * np.sin(np.arange(len(close)) * 0.1) + np.random.normal(0, 10, len(close)), 0, 100
+        ), index=close.index))
+        
+        # Market sentiment based on price action
+        graph.add('bullish_sentiment', ['close', 'sma_20'], lambda close, sma: (close > sma).astype(int))
+        graph.add('bearish_sentiment', ['close', 'sma_20'], lambda close, sma: (close < sma).astype(int))
+        
+        # Trend strength
+        graph.add('trend_strength', ['close', 'sma_50'], lambda close, sma: abs(close - sma) / sma)
+    
+    def _add_time_features(self, graph: FeatureGraph):
+        """Feature temporali (quelle dal timestamp solo se la colonna è presente)"""
+        graph.add('datetime', ['timestamp'], pd.to_datetime, output=False)
+        graph.add('hour', ['datetime'], lambda ts: ts.dt.hour)
+        graph.add('day_of_week', ['datetime'], lambda ts: ts.dt.dayofweek)
+        graph.add('day_of_month', ['datetime'], lambda ts: ts.dt.day)
+        graph.add('month', ['datetime'], lambda ts: ts.dt.month)
+        
+        # Cyclical encoding
+        graph.add('hour_sin', ['hour'], lambda hour: np.sin(2 * np.pi * hour / 24))
+        graph.add('hour_cos', ['hour'], lambda hour: np.cos(2 * np.pi * hour / 24))
+        graph.add('day_sin', ['day_of_week'], lambda day: np.sin(2 * np.pi * day / 7))
+        graph.add('day_cos', ['day_of_week'], lambda day: np.cos(2 * np.pi * day / 7))
+        
+        # Sequence features
+        graph.add('sequence_id', ['close'], lambda close: pd.Series(np.arange(len(close)), index=close.index))
+        graph.add('sequence_normalized', ['sequence_id'], lambda sequence: sequence / len(sequence))
+    
+    def _add_correlation_features(self, graph: FeatureGraph):
+        """Feature di correlazione"""
+        # Price-Volume correlation
+        graph.add('price_volume_corr', ['close', 'volume'],
+                  lambda close, volume: close.rolling(20, min_periods=1).corr(volume))
+        
+        # High-Low correlation with volume
+        graph.add('hl_volume_corr', ['hl_range', 'volume'],
+                  lambda hl_range, volume: hl_range.rolling(20, min_periods=1).corr(volume))
+        
+        # Cross-correlation between different timeframes
+        graph.add('sma_5_20_ratio', ['sma_5', 'sma_20'], lambda fast, slow: fast / slow)
+        graph.add('sma_20_50_ratio', ['sma_20', 'sma_50'], lambda fast, slow: fast / slow)
     
     def _clean_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Pulisce e normalizza le feature"""
         try:
             # Rimuovi infiniti e NaN
             df = df.replace([np.inf, -np.inf], np.nan)
-            df = df.fillna(method='ffill').fillna(method='bfill').fillna(0)
+            df = df.ffill().bfill().fillna(0)
             
-            # Clip outliers (3 sigma rule)
-            numeric_columns = df.select_dtypes(include=[np.number]).columns
-            for col in numeric_columns:
-                if col not in ['timestamp', 'sequence_id']:
-                    mean = df[col].mean()
-                    std = df[col].std()
-                    df[col] = np.clip(df[col], mean - 3*std, mean + 3*std)
+            # Clip outliers (3 sigma rule), su tutte le colonne numeriche in un solo passaggio
+            numeric_columns = [col for col in df.select_dtypes(include=[np.number]).columns
+                               if col not in ['timestamp', 'sequence_id']]
+            mean = df[numeric_columns].mean()
+            std = df[numeric_columns].std()
+            df[numeric_columns] = df[numeric_columns].clip(mean - 3*std, mean + 3*std, axis=1)
             
             return df
             
@@ -337,62 +325,79 @@ class AdvancedFeatureEngineer:
             self.logger.error(f"❌ Errore pulizia feature: {e}")
             return df
     
-    def _calculate_rsi(self, prices: pd.Series, period: int = 14) -> pd.Series:
-        """Calcola RSI"""
+    @staticmethod
+    def _calculate_rsi(gain: pd.Series, loss: pd.Series, period: int = 14) -> pd.Series:
+        """Calcola RSI da guadagni e perdite per barra"""
         try:
-            delta = prices.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=period, min_periods=1).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=period, min_periods=1).mean()
-            loss = loss.replace(0, 0.01)
-            rs = gain / loss
+            avg_gain = gain.rolling(window=period, min_periods=1).mean()
+            avg_loss = loss.rolling(window=period, min_periods=1).mean().replace(0, 0.01)
+            rs = avg_gain / avg_loss
             return 100 - (100 / (1 + rs))
         except:
-            return pd.Series([50] * len(prices), index=prices.index)
-    
-    def _calculate_stochastic(self, df: pd.DataFrame, period: int = 14) -> pd.Series:
-        """Calcola Stochastic Oscillator"""
-        try:
-            low_min = df['low'].rolling(period, min_periods=1).min()
-            high_max = df['high'].rolling(period, min_periods=1).max()
-            return 100 * (df['close'] - low_min) / (high_max - low_min)
-        except:
-            return pd.Series([50] * len(df), index=df.index)
-    
-    def _calculate_williams_r(self, df: pd.DataFrame, period: int = 14) -> pd.Series:
-        """Calcola Williams %R"""
-        try:
-            high_max = df['high'].rolling(period, min_periods=1).max()
-            low_min = df['low'].rolling(period, min_periods=1).min()
-            return -100 * (high_max - df['close']) / (high_max - low_min)
-        except:
-            return pd.Series([-50] * len(df), index=df.index)
+            return pd.Series([50] * len(gain), index=gain.index)
     
-    def _calculate_cci(self, df: pd.DataFrame, period: int = 20) -> pd.Series:
-        """Calcola Commodity Channel Index"""
+    @staticmethod
+    def _calculate_cci(tp: pd.Series, period: int = 20) -> pd.Series:
+        """Calcola Commodity Channel Index (deviazione media assoluta vettorizzata)"""
         try:
-            tp = (df['high'] + df['low'] + df['close']) / 3
             sma_tp = tp.rolling(period, min_periods=1).mean()
-            mad = tp.rolling(period, min_periods=1).apply(lambda x: np.mean(np.abs(x - x.mean())))
-            return (tp - sma_tp) / (0.015 * mad)
+            values = tp.to_numpy(dtype=np.float64)
+            mad = np.empty(len(values))
+            # Finestre parziali iniziali (min_periods=1), poi tutte le finestre piene in blocco
+            for i in range(min(period - 1, len(values))):
+                window = values[:i + 1]
+                mad[i] = np.mean(np.abs(window - window.mean()))
+            if len(values) >= period:
+                windows = sliding_window_view(values, period)
+                mad[period - 1:] = np.abs(windows - windows.mean(axis=1, keepdims=True)).mean(axis=1)
+            return (tp - sma_tp) / (0.015 * pd.Series(mad, index=tp.index))
         except:
-            return pd.Series([0] * len(df), index=df.index)
+            return pd.Series([0] * len(tp), index=tp.index)
 
 class EnsembleAIPredictor:
-    """Predittore AI ensemble con modelli multipli"""
+    """
+    Predittore AI ensemble con modelli multipli.
     
-    def __init__(self):
+    Con online=True l'ensemble usa modelli con partial_fit (SGD, MLP) su un
+    target di rendimento relativo al close: le nuove barre aggiornano scaler
+    e modelli in pochi millisecondi con update_online, e ogni refit_every
+    campioni scaler e modelli vengono riallineati sulla finestra scorrevole
+    degli ultimi window_size campioni. Il retraining completo resta a
+    train_ensemble, da chiamare di rado.
+    """
+    
+    def __init__(self, online: bool = False, window_size: int = 2000,
+                 refit_every: int = 500, error_halflife: int = 50):
         self.logger = logging.getLogger('EnsembleAI')
         self.models = {}
         self.scalers = {}
         self.feature_importance = {}
         self.model_weights = {}
+        self.feature_columns = []
         self.is_trained = False
         
+        # Modalità online: finestra scorrevole ed errore prequenziale per modello
+        self.online = online
+        self.window_size = window_size
+        self.refit_every = refit_every
+        self.error_decay = 1 - 0.5 ** (1 / error_halflife)
+        self._window_X = deque(maxlen=window_size)
+        self._window_y = deque(maxlen=window_size)
+        self.online_errors = {}
+        self.updates_since_refit = 0
+        self._last_full_training: Optional[datetime] = None
+        
+        # Ensemble salvato da caricare al primo utilizzo (load_ensemble)
+        self._lazy_artifact: Optional[LazyArtifact] = None
+        
         # Inizializza modelli
         self._initialize_models()
     
     def _initialize_models(self):
         """Inizializza ensemble di modelli"""
+        if self.online:
+            self._initialize_online_models()
+            return
         try:
             self.models = {
                 'random_forest': RandomForestRegressor(
@@ -433,6 +438,51 @@ class EnsembleAIPredictor:
         except Exception as e:
             self.logger.error(f"❌ Errore inizializzazione modelli: {e}")
     
+    def _initialize_online_models(self):
+        """Ensemble incrementale: solo modelli con partial_fit e uno scaler condiviso"""
+        self.models = {
+            'sgd': SGDRegressor(
+                loss='huber',
+                alpha=1e-4,
+                learning_rate='invscaling',
+                eta0=0.01,
+                random_state=42
+            ),
+            'neural_network': MLPRegressor(
+                hidden_layer_sizes=(64, 32),
+                learning_rate_init=0.001,
+                max_iter=200,
+                random_state=42
+            )
+        }
+        # Un solo StandardScaler (supporta partial_fit), aggiornato una volta per barra
+        scaler = StandardScaler()
+        self.scalers = {model_name: scaler for model_name in self.models}
+        self.logger.info(f"✅ Ensemble online inizializzato: {len(self.models)} modelli")
+    
+    def _model_target(self, X: pd.DataFrame, target: pd.Series) -> pd.Series:
+        """In modalità online i modelli stimano il rendimento rispetto al close corrente"""
+        if not self.online:
+            return target
+        return target / X['close'] - 1
+    
+    @staticmethod
+    def _scale(scaler, X: pd.DataFrame) -> np.ndarray:
+        """Come scaler.transform ma senza la validazione per chiamata, che su una riga domina il tempo"""
+        values = X.to_numpy(dtype=np.float64)
+        if isinstance(scaler, StandardScaler) and scaler.with_mean and scaler.with_std:
+            return (values - scaler.mean_) / scaler.scale_
+        if isinstance(scaler, RobustScaler) and scaler.with_centering and scaler.with_scaling:
+            return (values - scaler.center_) / scaler.scale_
+        return scaler.transform(values)
+    
+    def _predict_model(self, model_name: str, X: pd.DataFrame) -> np.ndarray:
+        """Predizione di un modello riportata a livello di prezzo"""
+        pred = self.models[model_name].predict(self._scale(self.scalers[model_name], X))
+        if self.online:
+            pred = X['close'].to_numpy() * (1 + pred)
+        return pred
+    
     def train_ensemble(self, features: pd.DataFrame, target: pd.Series) -> Dict:
         """Addestra ensemble di modelli"""
         try:
@@ -441,6 +491,11 @@ class EnsembleAIPredictor:
             # Prepara dati
             X = features.select_dtypes(include=[np.number]).fillna(0)
             y = target.fillna(target.mean())
+            self.feature_columns = list(X.columns)
+            if not all(hasattr(model, 'fit') for model in self.models.values()):
+                # Dopo load_ensemble gli alberi sono compilati: si riparte da stimatori nuovi
+                self._initialize_models()
+            y = self._model_target(X, y)
             
             # Split train/test
             X_train, X_test, y_train, y_test = train_test_split(
@@ -498,7 +553,21 @@ class EnsembleAIPredictor:
             # Calcola pesi ensemble basati su performance
             self._calculate_ensemble_weights(results)
             
+            # Alberi compilati in array piatti per l'inferenza (gli altri modelli restano invariati)
+            self.models = {name: compile_model(model) for name, model in self.models.items()}
+            
+            if self.online:
+                # La finestra riparte dagli ultimi campioni del training completo
+                self._window_X = deque(X.to_numpy(dtype=np.float64)[-self.window_size:], maxlen=self.window_size)
+                self._window_y = deque(y.to_numpy(dtype=np.float64)[-self.window_size:], maxlen=self.window_size)
+                self.online_errors = {
+                    name: metrics['mse'] for name, metrics in results.items() if 'mse' in metrics
+                }
+                self._update_online_weights()
+                self.updates_since_refit = 0
+            
             self.is_trained = True
+            self._last_full_training = datetime.now()
             self.logger.info("✅ Ensemble addestrato con successo")
             
             return results
@@ -536,13 +605,100 @@ class EnsembleAIPredictor:
             self.logger.error(f"❌ Errore calcolo pesi: {e}")
             self.model_weights = {name: 1.0 / len(self.models) for name in self.models.keys()}
     
+    def update_online(self, features: pd.DataFrame, target: pd.Series) -> Dict:
+        """
+        Aggiorna l'ensemble con nuove barre di cui il target è già noto: prima
+        l'errore prequenziale (predizione prima di imparare) per i pesi, poi
+        partial_fit di scaler e modelli.
+        """
+        if not self.online:
+            return {'error': 'Modalità online non attiva'}
+        self._ensure_loaded()
+        if not self.is_trained:
+            return {'error': 'Modelli non addestrati'}
+        
+        try:
+            start = time.perf_counter()
+            X = features.select_dtypes(include=[np.number]).reindex(columns=self.feature_columns).fillna(0)
+            y = self._model_target(X, target.reindex(X.index))
+            valid = y.notna().to_numpy()
+            X, y = X[valid], y[valid].to_numpy(dtype=np.float64)
+            if len(y) == 0:
+                return {'error': 'Nessun target disponibile'}
+            
+            scaler = next(iter(self.scalers.values()))
+            for model_name, model in self.models.items():
+                error = float(np.mean((model.predict(scaler.transform(X)) - y) ** 2))
+                previous = self.online_errors.get(model_name, error)
+                self.online_errors[model_name] = previous + self.error_decay * (error - previous)
+            
+            scaler.partial_fit(X)
+            X_scaled = scaler.transform(X)
+            for model in self.models.values():
+                model.partial_fit(X_scaled, y)
+            
+            self._window_X.extend(X.to_numpy(dtype=np.float64))
+            self._window_y.extend(y)
+            self.updates_since_refit += len(y)
+            self._update_online_weights()
+            
+            refitted = self.updates_since_refit >= self.refit_every
+            if refitted:
+                self.refit_window()
+            
+            return {
+                'samples': len(y),
+                'update_ms': (time.perf_counter() - start) * 1000,
+                'window_size': len(self._window_y),
+                'refitted': refitted,
+                'model_weights': dict(self.model_weights)
+            }
+            
+        except Exception as e:
+            self.logger.error(f"❌ Errore aggiornamento online: {e}")
+            return {'error': str(e)}
+    
+    def refit_window(self, epochs: int = 3):
+        """
+        Riallinea lo scaler alla finestra scorrevole (dimentica i dati più
+        vecchi) e ripassa la finestra con partial_fit partendo dai pesi attuali.
+        """
+        if not self._window_y:
+            return
+        X = pd.DataFrame(np.asarray(self._window_X), columns=self.feature_columns)
+        y = np.asarray(self._window_y)
+        
+        scaler = next(iter(self.scalers.values()))
+        X_scaled = scaler.fit(X).transform(X)
+        for _ in range(epochs):
+            for model in self.models.values():
+                model.partial_fit(X_scaled, y)
+        
+        self.updates_since_refit = 0
+        self.logger.info(f"🔄 Refit ensemble online su finestra di {len(y)} campioni")
+    
+    @property
+    def last_full_training(self) -> Optional[datetime]:
+        """Istante dell'ultimo train_ensemble, anche se avvenuto in un altro processo (load_ensemble)"""
+        self._ensure_loaded()
+        return self._last_full_training
+    
+    def _update_online_weights(self):
+        """Pesi inversamente proporzionali all'errore quadratico prequenziale"""
+        inverse = {name: 1.0 / (error + 1e-12) for name, error in self.online_errors.items()}
+        total = sum(inverse.values())
+        if total > 0:
+            self.model_weights = {name: value / total for name, value in inverse.items()}
+    
     def predict_ensemble(self, features: pd.DataFrame) -> Dict:
         """Predizione ensemble"""
         try:
+            self._ensure_loaded()
             if not self.is_trained:
                 return {'error': 'Modelli non addestrati'}
             
-            X = features.select_dtypes(include=[np.number]).fillna(0)
+            # Serve solo l'ultima riga: il resto della finestra non entra nella predizione
+            X = features.select_dtypes(include=[np.number]).iloc[-1:].reindex(columns=self.feature_columns).fillna(0)
             
             predictions = {}
             valid_predictions = []
@@ -552,8 +708,7 @@ class EnsembleAIPredictor:
             for model_name, model in self.models.items():
                 try:
                     if model_name in self.model_weights:
-                        X_scaled = self.scalers[model_name].transform(X)
-                        pred = model.predict(X_scaled)
+                        pred = self._predict_model(model_name, X)
                         predictions[model_name] = pred[-1]  # Ultima predizione
                         
                         valid_predictions.append(pred[-1])
@@ -585,6 +740,115 @@ class EnsembleAIPredictor:
             self.logger.error(f"❌ Errore predizione ensemble: {e}")
             return {'error': str(e)}
     
+    def predict_ensemble_batch(self, features_by_symbol: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
+        """
+        Predizione ensemble per più simboli: l'ultima riga di feature di ogni
+        simbolo viene impilata in una matrice e ogni scaler/modello è chiamato
+        una volta sola. Stessi campi e formule di predict_ensemble.
+        """
+        symbols = list(features_by_symbol)
+        self._ensure_loaded()
+        if not self.is_trained:
+            return {symbol: {'error': 'Modelli non addestrati'} for symbol in symbols}
+        if not symbols:
+            return {}
+        
+        try:
+            rows = [
+                features_by_symbol[symbol].select_dtypes(include=[np.number]).iloc[-1:]
+                for symbol in symbols
+            ]
+            X = pd.concat(rows).reindex(columns=self.feature_columns).fillna(0)
+            
+            predictions = {}
+            for model_name, model in self.models.items():
+                if model_name not in self.model_weights:
+                    continue
+                try:
+                    predictions[model_name] = self._predict_model(model_name, X)
+                except Exception as e:
+                    self.logger.warning(f"⚠️ Errore predizione {model_name}: {e}")
+            
+            if not predictions:
+                return {symbol: {'error': 'Nessuna predizione valida'} for symbol in symbols}
+            
+            names = list(predictions)
+            matrix = np.vstack([predictions[name] for name in names])
+            ensemble = np.average(matrix, axis=0, weights=[self.model_weights[name] for name in names])
+            pred_std = matrix.std(axis=0)
+            
+            with np.errstate(divide='ignore', invalid='ignore'):
+                confidence = np.where(ensemble != 0, 1.0 - pred_std / np.abs(ensemble), 0.5)
+            confidence = np.minimum(np.maximum(0.1, confidence), 0.95)
+            agreement = 1.0 - pred_std / (np.abs(ensemble) + 1e-6)
+            
+            return {
+                symbol: {
+                    'ensemble_prediction': float(ensemble[i]),
+                    'individual_predictions': {name: float(predictions[name][i]) for name in names},
+                    'confidence': float(confidence[i]),
+                    'model_agreement': float(agreement[i]),
+                    'active_models': len(names)
+                }
+                for i, symbol in enumerate(symbols)
+            }
+            
+        except Exception as e:
+            self.logger.error(f"❌ Errore predizione ensemble batch: {e}")
+            return {symbol: {'error': str(e)} for symbol in symbols}
+    
+    def save_ensemble(self, path: str):
+        """Salva l'ensemble addestrato in formato condivisibile tra processi (utils.shared_models)"""
+        self._ensure_loaded()
+        if not self.is_trained:
+            raise ValueError("Ensemble non addestrato")
+        save_shared({
+            'online': self.online,
+            'models': self.models,
+            'scalers': self.scalers,
+            'model_weights': self.model_weights,
+            'feature_columns': self.feature_columns,
+            'feature_importance': self.feature_importance,
+            'online_errors': self.online_errors,
+            'last_full_training': self._last_full_training,
+            # Finestra scorrevole: senza, refit_window dopo il caricamento non avrebbe dati
+            'window_X': np.asarray(self._window_X, dtype=np.float64),
+            'window_y': np.asarray(self._window_y, dtype=np.float64),
+            'updates_since_refit': self.updates_since_refit
+        }, path)
+        self.logger.info(f"💾 Ensemble salvato in {path}")
+    
+    def load_ensemble(self, path: str, lazy: bool = True):
+        """Carica un ensemble salvato; con lazy=True il file viene mappato alla prima predizione"""
+        self._lazy_artifact = LazyArtifact(path)
+        self.is_trained = True
+        if not lazy:
+            self._ensure_loaded()
+    
+    def _ensure_loaded(self):
+        """Applica l'ensemble lazy in attesa, se presente"""
+        if self._lazy_artifact is None:
+            return
+        lazy, self._lazy_artifact = self._lazy_artifact, None
+        try:
+            state = lazy.get()
+            if state['online'] != self.online:
+                raise ValueError("Modalità online dell'ensemble salvato diversa")
+            self.models = state['models']
+            self.scalers = state['scalers']
+            self.model_weights = state['model_weights']
+            self.feature_columns = state['feature_columns']
+            self.feature_importance = state['feature_importance']
+            self.online_errors = state['online_errors']
+            self._last_full_training = state.get('last_full_training')
+            self._window_X = deque(state.get('window_X', ()), maxlen=self.window_size)
+            self._window_y = deque(state.get('window_y', ()), maxlen=self.window_size)
+            self.updates_since_refit = state.get('updates_since_refit', 0)
+            self.is_trained = True
+        except Exception as e:
+            self.logger.error(f"❌ Errore caricamento ensemble {lazy.path}: {e}")
+            self.is_trained = False
+    
     def get_feature_importance(self) -> Dict:
         """Ottieni importanza feature aggregate"""
         try:
@@ -619,12 +883,24 @@ class EnsembleAIPredictor:
 class AIOptimizationEngine:
     """Engine principale di ottimizzazione AI"""
     
-    def __init__(self):
+    def __init__(self, online: bool = False, full_retrain_interval: float = 24 * 3600,
+                 model_path: Optional[str] = None):
         self.logger = logging.getLogger('AIOptimizationEngine')
         self.feature_engineer = AdvancedFeatureEngineer()
-        self.ai_predictor = EnsembleAIPredictor()
+        self.ai_predictor = EnsembleAIPredictor(online=online)
         self.optimization_history = []
         
+        # Ensemble condiviso su disco: chi addestra lo salva, gli altri bot lo mappano al primo uso
+        self.model_path = model_path
+        if model_path and os.path.exists(model_path):
+            self.ai_predictor.load_ensemble(model_path)
+        
+        # In modalità online il retraining completo gira solo ogni full_retrain_interval secondi
+        # (l'istante dell'ultimo è salvato con l'ensemble, vedi last_full_training)
+        self.full_retrain_interval = full_retrain_interval
+        # Indice dell'ultima barra già appresa per simbolo: una barra non viene mai appresa due volte
+        self.learned_until: Dict[str, Any] = {}
+        
         # Setup database
         self._setup_database()
     
@@ -692,6 +968,8 @@ class AIOptimizationEngine:
             # 4. Addestra ensemble
             self.logger.info("🎓 Addestramento ensemble AI...")
             training_results = self.ai_predictor.train_ensemble(features, target)
+            if self.model_path and self.ai_predictor.is_trained:
+                self.ai_predictor.save_ensemble(self.model_path)
             
             # 5. Valuta performance
             best_model = self._find_best_model(training_results)
@@ -729,6 +1007,57 @@ class AIOptimizationEngine:
             self.logger.error(f"❌ Errore ottimizzazione AI: {e}")
             return {'status': 'error', 'error': str(e)}
     
+    async def update_ai_models(self, market_data: pd.DataFrame, new_bars: int = 1,
+                               symbol: str = 'default') -> Dict:
+        """
+        Aggiorna l'ensemble online con le barre chiuse di symbol non ancora
+        apprese (il target di una barra è il close della successiva); new_bars
+        limita solo la prima chiamata per il simbolo. Se il retraining completo
+        è scaduto, o l'ensemble non è addestrato, esegue optimize_ai_models.
+        """
+        if not self.ai_predictor.online:
+            return {'status': 'error', 'error': 'Ensemble non in modalità online'}
+        
+        due = (self.last_full_training is None or
+               (datetime.now() - self.last_full_training).total_seconds() >= self.full_retrain_interval)
+        if due or not self.ai_predictor.is_trained:
+            result = await self.optimize_ai_models(market_data)
+            if result.get('status') == 'completed' and len(market_data) > 1:
+                # Il training completo ha appreso tutte le barre con target noto
+                self.learned_until[symbol] = market_data.index[-2]
+            return result
+        
+        try:
+            enhanced_data = self.feature_engineer.create_advanced_features(
+                market_data, self._active_features(), symbol
+            )
+            target = enhanced_data['close'].shift(-1)
+            rows = enhanced_data.iloc[:-1]
+            if symbol in self.learned_until:
+                rows = rows[rows.index > self.learned_until[symbol]]
+            else:
+                rows = rows.iloc[-new_bars:]
+            if rows.empty:
+                return {'status': 'up_to_date', 'samples': 0}
+            
+            result = self.ai_predictor.update_online(rows, target.loc[rows.index])
+            if 'error' in result:
+                return {'status': 'error', 'error': result['error']}
+            self.learned_until[symbol] = rows.index[-1]
+            
+            self.logger.info(f"⚡ Ensemble aggiornato con {result['samples']} barre "
+                             f"in {result['update_ms']:.1f}ms")
+            return {'status': 'updated', **result}
+            
+        except Exception as e:
+            self.logger.error(f"❌ Errore aggiornamento online: {e}")
+            return {'status': 'error', 'error': str(e)}
+    
+    @property
+    def last_full_training(self) -> Optional[datetime]:
+        """Ultimo retraining completo dell'ensemble (ripristinato da model_path dopo un riavvio)"""
+        return self.ai_predictor.last_full_training
+    
     def _find_best_model(self, results: Dict) -> str:
         """Trova il miglior modello basato su metriche"""
         try:
@@ -773,13 +1102,19 @@ class AIOptimizationEngine:
         except Exception as e:
             self.logger.error(f"❌ Errore salvataggio training: {e}")
     
-    async def generate_ai_prediction(self, current_data: pd.DataFrame) -> Dict:
+    def _active_features(self) -> Optional[List[str]]:
+        """Feature usate dall'ensemble addestrato (None = tutte, prima del training)"""
+        return self.ai_predictor.feature_columns if self.ai_predictor.is_trained else None
+    
+    async def generate_ai_prediction(self, current_data: pd.DataFrame, symbol: str = 'default') -> Dict:
         """Genera predizione AI ottimizzata"""
         try:
             self.logger.info("🔮 Generazione predizione AI...")
             
-            # Feature engineering
-            enhanced_data = self.feature_engineer.create_advanced_features(current_data)
+            # Feature engineering (solo le feature usate dai modelli)
+            enhanced_data = self.feature_engineer.create_advanced_features(
+                current_data, self._active_features(), symbol
+            )
             
             # Predizione ensemble
             prediction_result = self.ai_predictor.predict_ensemble(enhanced_data)
@@ -798,22 +1133,49 @@ class AIOptimizationEngine:
             self.logger.error(f"❌ Errore predizione AI: {e}")
             return {'error': str(e)}
     
+    async def generate_ai_predictions(self, data_by_symbol: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
+        """Predizioni AI per più simboli con un'unica chiamata batch all'ensemble"""
+        try:
+            self.logger.info(f"🔮 Generazione predizioni AI per {len(data_by_symbol)} simboli...")
+            
+            enhanced = {
+                symbol: self.feature_engineer.create_advanced_features(data, self._active_features(), symbol)
+                for symbol, data in data_by_symbol.items()
+            }
+            results = self.ai_predictor.predict_ensemble_batch(enhanced)
+            
+            valid = {symbol: prediction for symbol, prediction in results.items() if 'error' not in prediction}
+            self._save_predictions(list(valid.values()))
+            for symbol, prediction in valid.items():
+                self.logger.info(f"✅ {symbol}: {prediction['ensemble_prediction']:.2f} "
+                                 f"(confidence {prediction['confidence']:.1%})")
+            
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"❌ Errore predizioni AI: {e}")
+            return {symbol: {'error': str(e)} for symbol in data_by_symbol}
+    
     def _save_prediction(self, prediction: Dict):
         """Salva predizione nel database"""
+        self._save_predictions([prediction])
+    
+    def _save_predictions(self, predictions: List[Dict]):
+        """Salva più predizioni nel database in un'unica transazione"""
         try:
             conn = sqlite3.connect(self.db_path)
-            conn.execute('''
+            conn.executemany('''
                 INSERT INTO ai_predictions (
                     ensemble_prediction, confidence, model_agreement, 
                     active_models, individual_predictions
                 ) VALUES (?, ?, ?, ?, ?)
-            ''', (
+            ''', [(
                 prediction['ensemble_prediction'],
                 prediction['confidence'],
                 prediction['model_agreement'],
                 prediction['active_models'],
                 json.dumps(prediction['individual_predictions'])
-            ))
+            ) for prediction in predictions])
             conn.commit()
             conn.close()
             
@@ -4,13 +4,19 @@ AurumBotX - Multi-Wallet API Server
 API REST per la dashboard web multi-wallet
 """
 
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
 import json
 import os
-from datetime import datetime
+import time
+import hashlib
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
 
+from utils.metrics import CONTENT_TYPE, REGISTRY, histogram
+from utils.profiler import install_signal_handler
+
 app = Flask(__name__, static_folder='web_interface', static_url_path='')
 CORS(app)
 
@@ -21,8 +27,11 @@ WALLETS = [
     {"id": "wallet_5000", "name": "Wallet $5000", "state_file": "demo_trading/wallet_5000/state.json"}
 ]
 
+STATE_READ = histogram('aurumbotx_state_read_seconds', 'Wallet state file read and parse latency')
+
 def load_wallet_state(wallet):
     """Carica lo stato di un wallet"""
+    start = time.perf_counter()
     try:
         with open(wallet['state_file'], 'r') as f:
             data = json.load(f)
@@ -31,6 +40,151 @@ def load_wallet_state(wallet):
             return data
     except FileNotFoundError:
         return None
+    finally:
+        STATE_READ.observe(time.perf_counter() - start)
+
+def _file_signature(path):
+    """(mtime_ns, size) del file, None se non esiste"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _wallet_row(wallet, state):
+    """Riga di /api/wallets per un wallet"""
+    if not state:
+        return {
+            "id": wallet['id'],
+            "name": wallet['name'],
+            "capital": 0,
+            "initial_capital": 0,
+            "total_pnl": 0,
+            "total_trades": 0,
+            "winning_trades": 0,
+            "losing_trades": 0,
+            "win_rate": 0,
+            "roi": 0,
+            "status": "inactive"
+        }
+    return {
+        "id": wallet['id'],
+        "name": wallet['name'],
+        "capital": state.get('capital', 0),
+        "initial_capital": state.get('initial_capital', 0),
+        "total_pnl": state.get('total_pnl', 0),
+        "total_trades": state.get('total_trades', 0),
+        "winning_trades": state.get('winning_trades', 0),
+        "losing_trades": state.get('losing_trades', 0),
+        "win_rate": (state.get('winning_trades', 0) / state.get('total_trades', 1) * 100) if state.get('total_trades', 0) > 0 else 0,
+        "roi": ((state.get('capital', 0) / state.get('initial_capital', 1) - 1) * 100) if state.get('initial_capital', 0) > 0 else 0,
+        "status": "active"
+    }
+
+def _summary(states):
+    """Aggregati di /api/summary sugli stati disponibili"""
+    total_capital = sum(w.get('capital', 0) for w in states)
+    total_initial = sum(w.get('initial_capital', 0) for w in states)
+    total_trades = sum(w.get('total_trades', 0) for w in states)
+    total_wins = sum(w.get('winning_trades', 0) for w in states)
+    return {
+        "total_capital": total_capital,
+        "total_initial_capital": total_initial,
+        "total_pnl": sum(w.get('total_pnl', 0) for w in states),
+        "total_roi": ((total_capital / total_initial - 1) * 100) if total_initial > 0 else 0,
+        "total_trades": total_trades,
+        "total_wins": total_wins,
+        "avg_win_rate": (total_wins / total_trades * 100) if total_trades > 0 else 0,
+        "active_wallets": len(states)
+    }
+
+class WalletStateCache:
+    """
+    Stati dei wallet in memoria, riletti solo quando cambia (mtime, dimensione)
+    del file. A ogni reload si ricalcolano righe, riepilogo e trade aggregati;
+    le risposte JSON sono serializzate una volta per versione e servite con
+    ETag/Last-Modified, così il costo di un poll è qualche stat() o un 304.
+    """
+
+    def __init__(self, wallets):
+        self.wallets = wallets
+        self._signatures = {}
+        self._states = {}
+        self._derived = {}
+        self._responses = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Ricarica i wallet il cui file è cambiato e ricalcola i derivati"""
+        with self._lock:
+            changed = False
+            for wallet in self.wallets:
+                signature = _file_signature(wallet['state_file'])
+                if wallet['id'] in self._signatures and self._signatures[wallet['id']] == signature:
+                    continue
+                try:
+                    state = load_wallet_state(wallet) if signature else None
+                except ValueError:
+                    # File a metà scrittura: resta la versione precedente, si riprova alla prossima richiesta
+                    continue
+                self._signatures[wallet['id']] = signature
+                self._states[wallet['id']] = state
+                changed = True
+            if changed or not self._derived:
+                self._rebuild()
+
+    def _rebuild(self):
+        states = [self._states.get(w['id']) for w in self.wallets]
+        all_trades = [
+            {**trade, 'wallet_id': wallet['id'], 'wallet_name': wallet['name']}
+            for wallet, state in zip(self.wallets, states)
+            if state and 'trades_history' in state
+            for trade in state['trades_history']
+        ]
+        # Ordina per timestamp (più recenti prima)
+        all_trades.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+        self._derived = {
+            'wallets': [_wallet_row(wallet, state) for wallet, state in zip(self.wallets, states)],
+            'summary': _summary([state for state in states if state]),
+            'trades': all_trades[:100]
+        }
+
+    def state(self, wallet_id):
+        return self._states.get(wallet_id)
+
+    def derived(self, key):
+        return self._derived[key]
+
+    def response(self, key, wallet_ids, build):
+        """
+        Risposta JSON condizionale per una vista che dipende dai wallet indicati:
+        build() gira solo dopo un reload di uno di essi, altrimenti si riusano
+        corpo ed ETag già calcolati.
+        """
+        self.refresh()
+        signatures = tuple(self._signatures.get(wallet_id) for wallet_id in wallet_ids)
+        cached = self._responses.get(key)
+        if cached is None or cached[0] != signatures:
+            payload, status = build()
+            body = json.dumps(payload)
+            mtimes = [signature[0] for signature in signatures if signature]
+            cached = self._responses[key] = (
+                signatures,
+                body,
+                status,
+                hashlib.blake2b(body.encode(), digest_size=16).hexdigest(),
+                datetime.fromtimestamp(max(mtimes) / 1e9, tz=timezone.utc) if mtimes else None
+            )
+        _, body, status, etag, last_modified = cached
+        response = Response(body, status=status, mimetype='application/json')
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        # Il dashboard deve sempre rivalidare, ma con un 304 quando nulla è cambiato
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+STATE_CACHE = WalletStateCache(WALLETS)
+ALL_WALLET_IDS = [w['id'] for w in WALLETS]
 
 @app.route('/')
 def index():
@@ -46,78 +200,20 @@ def api_status():
         "version": "2.3-multi-wallet"
     })
 
+@app.route('/metrics')
+def metrics():
+    """Metriche del processo in formato Prometheus"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 @app.route('/api/wallets')
 def api_wallets():
     """Ritorna lista wallet"""
-    wallets_data = []
-    
-    for wallet in WALLETS:
-        state = load_wallet_state(wallet)
-        if state:
-            wallets_data.append({
-                "id": wallet['id'],
-                "name": wallet['name'],
-                "capital": state.get('capital', 0),
-                "initial_capital": state.get('initial_capital', 0),
-                "total_pnl": state.get('total_pnl', 0),
-                "total_trades": state.get('total_trades', 0),
-                "winning_trades": state.get('winning_trades', 0),
-                "losing_trades": state.get('losing_trades', 0),
-                "win_rate": (state.get('winning_trades', 0) / state.get('total_trades', 1) * 100) if state.get('total_trades', 0) > 0 else 0,
-                "roi": ((state.get('capital', 0) / state.get('initial_capital', 1) - 1) * 100) if state.get('initial_capital', 0) > 0 else 0,
-                "status": "active"
-            })
-        else:
-            wallets_data.append({
-                "id": wallet['id'],
-                "name": wallet['name'],
-                "capital": 0,
-                "initial_capital": 0,
-                "total_pnl": 0,
-                "total_trades": 0,
-                "winning_trades": 0,
-                "losing_trades": 0,
-                "win_rate": 0,
-                "roi": 0,
-                "status": "inactive"
-            })
-    
-    return jsonify(wallets_data)
+    return STATE_CACHE.response('wallets', ALL_WALLET_IDS, lambda: (STATE_CACHE.derived('wallets'), 200))
 
 @app.route('/api/summary')
 def api_summary():
     """Ritorna riepilogo generale"""
-    wallets_data = [load_wallet_state(w) for w in WALLETS]
-    wallets_data = [w for w in wallets_data if w]  # Filtra None
-    
-    if not wallets_data:
-        return jsonify({
-            "total_capital": 0,
-            "total_initial_capital": 0,
-            "total_pnl": 0,
-            "total_roi": 0,
-            "total_trades": 0,
-            "total_wins": 0,
-            "avg_win_rate": 0,
-            "active_wallets": 0
-        })
-    
-    total_capital = sum(w.get('capital', 0) for w in wallets_data)
-    total_initial = sum(w.get('initial_capital', 0) for w in wallets_data)
-    total_pnl = sum(w.get('total_pnl', 0) for w in wallets_data)
-    total_trades = sum(w.get('total_trades', 0) for w in wallets_data)
-    total_wins = sum(w.get('winning_trades', 0) for w in wallets_data)
-    
-    return jsonify({
-        "total_capital": total_capital,
-        "total_initial_capital": total_initial,
-        "total_pnl": total_pnl,
-        "total_roi": ((total_capital / total_initial - 1) * 100) if total_initial > 0 else 0,
-        "total_trades": total_trades,
-        "total_wins": total_wins,
-        "avg_win_rate": (total_wins / total_trades * 100) if total_trades > 0 else 0,
-        "active_wallets": len(wallets_data)
-    })
+    return STATE_CACHE.response('summary', ALL_WALLET_IDS, lambda: (STATE_CACHE.derived('summary'), 200))
 
 @app.route('/api/wallet/<wallet_id>')
 def api_wallet_detail(wallet_id):
@@ -127,30 +223,18 @@ def api_wallet_detail(wallet_id):
     if not wallet:
         return jsonify({"error": "Wallet not found"}), 404
     
-    state = load_wallet_state(wallet)
+    def build():
+        state = STATE_CACHE.state(wallet_id)
+        if not state:
+            return {"error": "Wallet state not found"}, 404
+        return state, 200
     
-    if not state:
-        return jsonify({"error": "Wallet state not found"}), 404
-    
-    return jsonify(state)
+    return STATE_CACHE.response(f'wallet/{wallet_id}', [wallet_id], build)
 
 @app.route('/api/trades')
 def api_trades():
     """Ritorna tutti i trade di tutti i wallet"""
-    all_trades = []
-    
-    for wallet in WALLETS:
-        state = load_wallet_state(wallet)
-        if state and 'trades_history' in state:
-            for trade in state['trades_history']:
-                trade['wallet_id'] = wallet['id']
-                trade['wallet_name'] = wallet['name']
-                all_trades.append(trade)
-    
-    # Ordina per timestamp (più recenti prima)
-    all_trades.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-    
-    return jsonify(all_trades[:100])  # Ultimi 100 trade
+    return STATE_CACHE.response('trades', ALL_WALLET_IDS, lambda: (STATE_CACHE.derived('trades'), 200))  # Ultimi 100 trade
 
 @app.route('/api/trades/<wallet_id>')
 def api_wallet_trades(wallet_id):
@@ -160,12 +244,13 @@ def api_wallet_trades(wallet_id):
     if not wallet:
         return jsonify({"error": "Wallet not found"}), 404
     
-    state = load_wallet_state(wallet)
-    
-    if not state or 'trades_history' not in state:
-        return jsonify([])
+    def build():
+        state = STATE_CACHE.state(wallet_id)
+        if not state or 'trades_history' not in state:
+            return [], 200
+        return state['trades_history'][-50:], 200  # Ultimi 50 trade
     
-    return jsonify(state['trades_history'][-50:])  # Ultimi 50 trade
+    return STATE_CACHE.response(f'trades/{wallet_id}', [wallet_id], build)
 
 if __name__ == '__main__':
     print("="*80)
@@ -179,7 +264,9 @@ if __name__ == '__main__':
     print(f"  - GET /api/wallet/<wallet_id>")
     print(f"  - GET /api/trades")
     print(f"  - GET /api/trades/<wallet_id>")
+    print(f"  - GET /metrics")
     print("="*80)
     
+    install_signal_handler()
     app.run(host='0.0.0.0', port=8080, debug=False)
 
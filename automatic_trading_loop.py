@@ -83,7 +83,7 @@ class AutomaticTradingLoop:
             
             # 2. Generazione segnali
             self.logger.info("🎯 Generazione segnali trading...")
-            signals = await self.ai_trading.generate_trading_signals(symbol)
+            signals = await self.ai_trading.generate_trading_signals(symbol, market_analysis)
             
             if not signals:
                 self.logger.info("📊 Nessun segnale generato in questo ciclo")
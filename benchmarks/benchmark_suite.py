@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+AurumBotX Benchmark Suite
+Misura tempo e memoria di picco dei percorsi critici del trading.
+
+Ogni caso usa dati sintetici a seed fisso, così due esecuzioni sulla stessa
+macchina sono confrontabili. I risultati vengono confrontati con una
+baseline JSON: se un caso peggiora oltre la soglia la suite esce con
+codice 1, così come se salta un caso che nella baseline era stato misurato.
+Il confronto usa il tempo minimo degli N run, il meno sensibile al rumore.
+
+Uso:
+    python benchmarks/benchmark_suite.py                     # confronto con la baseline
+    python benchmarks/benchmark_suite.py --update-baseline   # salva nuova baseline
+    python benchmarks/benchmark_suite.py --only indicators --threshold 0.3
+"""
+
+import os
+import sys
+import json
+import time
+import types
+import asyncio
+import logging
+import argparse
+import warnings
+import platform
+import tempfile
+import statistics
+import importlib
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from types import SimpleNamespace
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Aggiungi path del progetto
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baselines.json'
+SEED = 42
+
+
+@dataclass
+class BenchmarkCase:
+    """Caso di benchmark: setup una volta, run cronometrato, reset opzionale non cronometrato"""
+    name: str
+    description: str
+    setup: Callable[[], Any]
+    run: Callable[[Any], Any]
+    reset: Optional[Callable[[Any], None]] = None
+    repeat: int = 5
+
+
+# ---------------------------------------------------------------------------
+# Dataset sintetici
+# ---------------------------------------------------------------------------
+
+def synthetic_ohlcv(n_bars: int, seed: int = SEED, freq: str = 'h') -> pd.DataFrame:
+    """Random walk OHLCV deterministico"""
+    rng = np.random.default_rng(seed)
+    close = 50000 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    spread = np.abs(rng.normal(0, 0.004, n_bars)) * close
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + spread,
+        'Low': np.minimum(open_, close) - spread,
+        'Close': close,
+        'Volume': rng.uniform(100, 1000, n_bars),
+    }, index=pd.date_range('2025-01-01', periods=n_bars, freq=freq))
+
+
+def synthetic_klines(n_rows: int, seed: int = SEED) -> List[List]:
+    """Klines nel formato grezzo Binance (valori stringa come dall'API)"""
+    df = synthetic_ohlcv(n_rows, seed)
+    start = int(df.index[0].timestamp() * 1000)
+    klines = []
+    for i, row in enumerate(df.itertuples()):
+        open_time = start + i * 3_600_000
+        klines.append([
+            open_time, f"{row.Open:.2f}", f"{row.High:.2f}", f"{row.Low:.2f}", f"{row.Close:.2f}",
+            f"{row.Volume:.4f}", open_time + 3_599_999, f"{row.Volume * row.Close:.2f}",
+            100, f"{row.Volume / 2:.4f}", f"{row.Volume * row.Close / 2:.2f}", "0"
+        ])
+    return klines
+
+
+class MockExchangeAdapter:
+    """Adapter exchange in memoria: ticker e fill immediati al prezzo corrente"""
+
+    def __init__(self, price: float):
+        self.price = price
+
+    def get_ticker(self, symbol: str) -> Dict[str, Any]:
+        return {
+            'lastPrice': self.price, 'bidPrice': self.price * 0.9995, 'askPrice': self.price * 1.0005,
+            'volume': 5_000_000.0, 'priceChange': 0.0, 'priceChangePercent': 0.0,
+            'highPrice': self.price * 1.02, 'lowPrice': self.price * 0.98,
+            'closeTime': int(time.time() * 1000),
+        }
+
+    def create_order(self, symbol: str, side: str, type: str, quantity: float) -> Dict[str, Any]:
+        return {'fills': [{'price': str(self.price), 'commission': str(quantity * self.price * 0.001)}]}
+
+    def get_balance(self) -> Dict[str, float]:
+        return {'USDT': 10_000.0}
+
+
+class MockMarketDataProvider:
+    """Provider prezzi in memoria con l'interfaccia di YahooFinanceProvider"""
+
+    def __init__(self, price: float = 50_000.0):
+        self.price = price
+
+    def get_real_time_price(self, symbol: str) -> SimpleNamespace:
+        return SimpleNamespace(
+            price=self.price, bid=self.price * 0.9995, ask=self.price * 1.0005, volume_24h=5_000_000.0,
+            change_24h=0.0, change_24h_percent=0.0, timestamp=datetime.now()
+        )
+
+
+# Moduli esterni del trading engine: se mancano vengono sostituiti dai mock
+STUB_MODULES = {
+    'src.data.yahoo_finance_provider': ('YahooFinanceProvider', MockMarketDataProvider),
+    'src.exchanges.binance_adapter': ('BinanceAdapter', MockExchangeAdapter),
+}
+
+
+def install_stub_modules():
+    """Registra in sys.modules i moduli di STUB_MODULES non importabili (e i package mancanti)"""
+    for name, (attribute, cls) in STUB_MODULES.items():
+        try:
+            importlib.import_module(name)
+            continue
+        except ImportError:
+            pass
+        parts = name.split('.')
+        for i in range(1, len(parts) + 1):
+            module_name = '.'.join(parts[:i])
+            module = sys.modules.get(module_name)
+            if module is None:
+                module = sys.modules[module_name] = types.ModuleType(module_name)
+                module.__path__ = []
+                if i > 1:
+                    setattr(sys.modules['.'.join(parts[:i - 1])], parts[i - 1], module)
+        setattr(sys.modules[name], attribute, cls)
+
+
+# ---------------------------------------------------------------------------
+# Casi
+# ---------------------------------------------------------------------------
+
+def _setup_indicators():
+    from utils.indicators import TechnicalIndicators
+    return TechnicalIndicators(), synthetic_ohlcv(10_000)
+
+
+def _setup_klines():
+    from utils.data_loader import CryptoDataLoader
+    return CryptoDataLoader(use_live_data=False), synthetic_klines(5_000)
+
+
+def _setup_trading_engine():
+    install_stub_modules()
+    from src.core.trading_engine_usdt_sqlalchemy import TradingEngineUSDT, TradeDirection
+
+    tmp_dir = tempfile.mkdtemp(prefix='aurum_bench_')
+    engine = TradingEngineUSDT(db_path=os.path.join(tmp_dir, 'bench.db'))
+    engine.binance_adapter = MockExchangeAdapter(50_000.0)
+    engine.yahoo_provider = MockMarketDataProvider(50_000.0)
+    engine.current_balance_usdt = 1_000_000.0
+
+    # Il percorso deve completare con successo, altrimenti si misurerebbe un errore
+    result = engine.execute_trade('BTCUSDT', TradeDirection.BUY, 10.0,
+                                  stop_loss_price=1.0, take_profit_price=1e9)
+    if not result.get('success'):
+        raise RuntimeError(f"execute_trade fallito: {result.get('error')}")
+    return engine, TradeDirection
+
+
+def _run_execute_trade(state):
+    engine, direction = state
+    for _ in range(50):
+        engine.execute_trade('BTCUSDT', direction.BUY, 10.0, stop_loss_price=1.0, take_profit_price=1e9)
+
+
+def _setup_monitor_positions():
+    engine, direction = _setup_trading_engine()
+    for _ in range(200):
+        engine.execute_trade('BTCUSDT', direction.BUY, 10.0, stop_loss_price=1.0, take_profit_price=1e9)
+    return engine
+
+
+def _setup_perpetual():
+    from src.core.perpetual_futures_engine import PerpetualFuturesEngine
+    from src.core.leverage_manager import LeverageManager
+
+    rng = np.random.default_rng(SEED)
+    prices = 50_000 * np.exp(np.cumsum(rng.normal(0, 0.0005, (100, 200)), axis=0))
+    return {'engine_cls': PerpetualFuturesEngine, 'manager': LeverageManager(), 'prices': prices}
+
+
+def _reset_perpetual(state):
+    engine = state['engine_cls'](None, state['manager'])
+    for k in range(state['prices'].shape[1]):
+        side = 'Long' if k % 2 == 0 else 'Short'
+        engine.open_position('BTC', side, 0.01, 2.0, 50_000.0,
+                             stop_loss_percent=50.0, take_profit_percent=100.0)
+    state['engine'] = engine
+
+
+def _run_perpetual(state):
+    engine = state['engine']
+    position_ids = list(engine.positions.keys())
+    for tick in state['prices']:
+        for position_id, price in zip(position_ids, tick):
+            engine.update_position_price(position_id, float(price))
+
+
+def _setup_prediction():
+    from sklearn.ensemble import RandomForestRegressor
+    from utils.prediction_model import PredictionModel
+    from utils.shared_models import compile_model
+
+    model = PredictionModel()
+    history = synthetic_ohlcv(3_000)
+    features = model.build_feature_matrix(history)
+    target = history['Close'].pct_change().shift(-1).fillna(0).to_numpy()
+    forest = RandomForestRegressor(n_estimators=20, max_depth=8, random_state=SEED, n_jobs=1).fit(features, target)
+    # Come dopo train_async: alberi compilati in array piatti
+    model.models = {'random_forest': compile_model(forest)}
+    return model, history.iloc[-200:]
+
+
+def _setup_prediction_warm():
+    model, window = _setup_prediction()
+    model.update_features('BTCUSDT', window)
+    return model, window.iloc[-1].to_dict()
+
+
+def _setup_prediction_batch():
+    model, window = _setup_prediction()
+    candles = {}
+    for i in range(50):
+        symbol = f'SYM{i}USDT'
+        model.update_features(symbol, window)
+        candles[symbol] = window.iloc[-1].to_dict()
+    return model, candles
+
+
+def _setup_simulator():
+    from comprehensive_strategy_simulator import ComprehensiveStrategySimulator
+
+    simulator = ComprehensiveStrategySimulator()
+    data = simulator.add_technical_indicators(synthetic_ohlcv(20_000))
+    config = {'type': 'scalping', 'profit_target': 0.005, 'stop_loss': 0.003, 'min_trend_strength': 0.3}
+    return simulator, data, config
+
+
+CASES = [
+    BenchmarkCase(
+        'indicators', 'TechnicalIndicators.add_all_indicators su 10k candele',
+        _setup_indicators, lambda s: s[0].add_all_indicators(s[1])),
+    BenchmarkCase(
+        'klines_processing', 'CryptoDataLoader._process_klines_data su 5k klines',
+        _setup_klines, lambda s: s[0]._process_klines_data(s[1])),
+    BenchmarkCase(
+        'execute_trade', 'TradingEngineUSDT.execute_trade × 50 con adapter mock',
+        _setup_trading_engine, _run_execute_trade),
+    BenchmarkCase(
+        'monitor_positions', 'TradingEngineUSDT._monitor_positions con 200 posizioni',
+        _setup_monitor_positions, lambda engine: engine._monitor_positions()),
+    BenchmarkCase(
+        'perpetual_updates', 'PerpetualFuturesEngine.update_position_price 100 tick × 200 posizioni',
+        _setup_perpetual, _run_perpetual, reset=_reset_perpetual, repeat=3),
+    BenchmarkCase(
+        'prediction', 'PredictionModel.predict su finestra di 200 candele',
+        _setup_prediction, lambda s: s[0].predict(s[1])),
+    BenchmarkCase(
+        'prediction_warm', 'PredictionModel.predict × 100 candele su stato feature incrementale',
+        _setup_prediction_warm, lambda s: [s[0].predict(s[1], 'BTCUSDT') for _ in range(100)]),
+    BenchmarkCase(
+        'prediction_batch', 'PredictionModel.predict_batch su 50 simboli (una chiamata per modello)',
+        _setup_prediction_batch, lambda s: s[0].predict_batch(s[1])),
+    BenchmarkCase(
+        'strategy_simulator', 'ComprehensiveStrategySimulator.simulate_trading su 20k candele',
+        _setup_simulator,
+        lambda s: asyncio.run(s[0].simulate_trading(None, s[1], '1h', s[2]))),
+]
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def run_case(case: BenchmarkCase) -> Dict[str, Any]:
+    """Esegue un caso: tempi su `repeat` run, memoria di picco su un run dedicato"""
+    try:
+        state = case.setup()
+    except ImportError as e:
+        return {'status': 'skipped', 'reason': f"{type(e).__name__}: {e}"}
+    except Exception as e:
+        return {'status': 'error', 'reason': f"setup: {type(e).__name__}: {e}"}
+
+    try:
+        # Warmup (import lazy, cache JIT di pandas/numpy)
+        if case.reset:
+            case.reset(state)
+        case.run(state)
+
+        timings = []
+        for _ in range(case.repeat):
+            if case.reset:
+                case.reset(state)
+            start = time.perf_counter()
+            case.run(state)
+            timings.append(time.perf_counter() - start)
+
+        # tracemalloc rallenta l'esecuzione: la memoria si misura a parte
+        if case.reset:
+            case.reset(state)
+        tracemalloc.start()
+        case.run(state)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    except Exception as e:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return {'status': 'error', 'reason': f"run: {type(e).__name__}: {e}"}
+
+    return {
+        'status': 'ok',
+        'median_s': statistics.median(timings),
+        'min_s': min(timings),
+        'max_s': max(timings),
+        'peak_mb': peak / 1024 / 1024,
+        'repeat': case.repeat,
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any],
+            threshold: float, memory_threshold: float, min_delta_s: float = 0.002) -> List[str]:
+    """Lista delle regressioni rispetto alla baseline (tempo minimo e memoria di picco)"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get('results', {}).get(name)
+        if result['status'] != 'ok' or not reference or reference.get('status') != 'ok':
+            continue
+
+        # Il minimo degli N run è il meno disturbato da scheduler e cache; sotto
+        # qualche millisecondo il rumore domina comunque: serve anche un delta assoluto
+        limit = reference['min_s'] * (1 + threshold)
+        if result['min_s'] > limit and result['min_s'] - reference['min_s'] > min_delta_s:
+            regressions.append(
+                f"{name}: tempo minimo {result['min_s'] * 1000:.1f}ms > "
+                f"{reference['min_s'] * 1000:.1f}ms (+{threshold:.0%})"
+            )
+
+        if result['peak_mb'] > reference['peak_mb'] * (1 + memory_threshold) + 1.0:
+            regressions.append(
+                f"{name}: memoria {result['peak_mb']:.1f}MB > {reference['peak_mb']:.1f}MB "
+                f"(+{memory_threshold:.0%})"
+            )
+    return regressions
+
+
+def print_report(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any]):
+    """Tabella risultati con delta rispetto alla baseline"""
+    print(f"\n{'='*90}")
+    print("⏱️  AURUMBOTX BENCHMARK SUITE")
+    print(f"{'='*90}")
+    print(f"{'caso':<22}{'mediana':>12}{'min':>12}{'picco MB':>12}{'vs baseline':>14}")
+    print(f"{'-'*90}")
+
+    for name, result in results.items():
+        if result['status'] != 'ok':
+            print(f"{name:<22}{result['status'].upper():>12}  {result['reason']}")
+            continue
+
+        reference = baseline.get('results', {}).get(name, {})
+        delta = ''
+        if reference.get('status') == 'ok' and reference['min_s'] > 0:
+            delta = f"{(result['min_s'] / reference['min_s'] - 1):+.1%}"
+        print(f"{name:<22}{result['median_s'] * 1000:>10.1f}ms{result['min_s'] * 1000:>10.1f}ms"
+              f"{result['peak_mb']:>12.1f}{delta:>14}")
+
+
+def load_baseline(path: Path) -> Dict[str, Any]:
+    """Baseline JSON salvata da --update-baseline (vuota se assente)"""
+    if not path.exists():
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_baseline(path: Path, results: Dict[str, Dict[str, Any]]):
+    """Salva i risultati come nuova baseline, con i metadati della macchina"""
+    baseline = {
+        'created_at': datetime.now().isoformat(),
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark dei percorsi critici AurumBotX')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help='File baseline JSON')
+    parser.add_argument('--update-baseline', action='store_true', help='Salva i risultati come baseline')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='Regressione massima sul tempo minimo (0.5 = +50%%)')
+    parser.add_argument('--memory-threshold', type=float, default=0.5, help='Regressione massima sulla memoria')
+    parser.add_argument('--only', nargs='*', help='Esegue solo i casi indicati')
+    parser.add_argument('--output', type=Path, help='Salva anche i risultati di questa esecuzione in JSON')
+    args = parser.parse_args(argv)
+
+    # Log e warning dei moduli misurati falserebbero i tempi
+    logging.disable(logging.ERROR)
+    warnings.simplefilter('ignore')
+
+    cases = [case for case in CASES if not args.only or case.name in args.only]
+    results = {case.name: run_case(case) for case in cases}
+    baseline = load_baseline(args.baseline)
+
+    logging.disable(logging.NOTSET)
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        # Si aggiornano solo i casi eseguiti, mantenendo gli altri
+        merged = dict(baseline.get('results', {}))
+        merged.update(results)
+        save_baseline(args.baseline, merged)
+        print(f"\n💾 Baseline aggiornata: {args.baseline}")
+        return 0
+
+    errors = [name for name, result in results.items() if result['status'] == 'error']
+    # Un caso misurato nella baseline che ora salta non deve passare in silenzio
+    reference = baseline.get('results', {})
+    lost = [name for name, result in results.items()
+            if result['status'] == 'skipped' and reference.get(name, {}).get('status') == 'ok']
+    regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+
+    if not baseline:
+        print(f"\n⚠️ Nessuna baseline in {args.baseline}: eseguire con --update-baseline")
+    for name in errors:
+        print(f"❌ {name}: {results[name]['reason']}")
+    for name in lost:
+        print(f"❌ {name}: saltato ma presente nella baseline ({results[name]['reason']})")
+    for regression in regressions:
+        print(f"🚨 Regressione {regression}")
+
+    if errors or lost or regressions:
+        return 1
+    print("\n✅ Nessuna regressione")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
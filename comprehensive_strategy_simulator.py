@@ -23,12 +23,17 @@ from utils.ai_trading import AITrading
 from utils.data_loader import CryptoDataLoader
 from utils.strategies.swing_trading import SwingTradingStrategy
 from utils.strategies.scalping import ScalpingStrategy
+from utils.backtest_engine import BacktestEngine, arrays_from_frame
+from utils.parameter_sweep import ParameterSweep
+from utils.backtest_cache import BacktestCache, fingerprint_frame
 
 class ComprehensiveStrategySimulator:
     def __init__(self):
         self.setup_logging()
         self.logger = logging.getLogger('StrategySimulator')
         self.results = {}
+        self.backtest_engine = BacktestEngine(initial_balance=10000, warmup=50, min_confidence=0.6)
+        self.backtest_cache = BacktestCache()
         
     def setup_logging(self):
         """Setup logging"""
@@ -62,11 +67,8 @@ class ComprehensiveStrategySimulator:
             # 3. Ottieni dati di mercato
             market_data = await self.get_market_data()
             
-            # 4. Simula ogni strategia
-            for strategy_name, config in strategy_configs.items():
-                self.logger.info(f"🔄 Simulazione strategia: {strategy_name}")
-                result = await self.simulate_strategy(strategy_name, config, market_data)
-                self.results[strategy_name] = result
+            # 4. Simula tutte le strategie su tutti i timeframe in parallelo
+            self.results.update(await self.simulate_all_strategies(strategy_configs, market_data))
             
             # 5. Analisi comparativa
             await self.comparative_analysis()
@@ -221,146 +223,69 @@ class ComprehensiveStrategySimulator:
             self.logger.error(f"❌ Errore simulazione {strategy_name}: {e}")
             return None
     
+    async def simulate_all_strategies(self, strategy_configs: Dict, market_data: Dict):
+        """Simula tutte le configurazioni × timeframe con uno sweep multi-processo"""
+        self.print_section("SIMULAZIONE PARALLELA STRATEGIE")
+        
+        datasets = {
+            tf: arrays_from_frame(self.add_technical_indicators(data))
+            for tf, data in market_data.items()
+            if data is not None and not data.empty
+        }
+        if not datasets:
+            return {}
+        
+        fingerprints = {
+            tf: fingerprint_frame(market_data[tf], 'BTCUSDT', tf) for tf in datasets
+        }
+        
+        names = list(strategy_configs.keys())
+        sweep = ParameterSweep(datasets, engine_params={'initial_balance': 10000, 'warmup': 50,
+                                                        'min_confidence': 0.6},
+                               cache=self.backtest_cache, fingerprints=fingerprints)
+        records = await asyncio.to_thread(
+            sweep.run, [strategy_configs[name] for name in names], None, True
+        )
+        
+        results = {}
+        for strategy_name, config in strategy_configs.items():
+            results[strategy_name] = {'config': config, 'timeframe_results': {}}
+        
+        for record in records:
+            strategy_name = names[record['config_id']]
+            tf = record['dataset']
+            if record['error']:
+                self.logger.error(f"❌ Errore simulazione {strategy_name} ({tf}): {record['error']}")
+                continue
+            
+            trades = record['trades']
+            compact = dict(trades, total_trades=record['total_trades'],
+                           final_balance=record['final_balance'],
+                           initial_balance=self.backtest_engine.initial_balance)
+            tf_result = self.backtest_engine.summarize(compact)
+            tf_result['timeframe'] = tf
+            tf_result['trades'] = self.backtest_engine.to_trade_records(compact, market_data[tf].index)
+            results[strategy_name]['timeframe_results'][tf] = tf_result
+        
+        for strategy_name, result in results.items():
+            config = result['config']
+            print(f"  📊 {config['description']}")
+            for tf, tf_result in result['timeframe_results'].items():
+                print(f"    {tf}: {tf_result['total_trades']} trade, "
+                      f"P&L: {tf_result['total_pnl']:.2%}, "
+                      f"Win Rate: {tf_result['win_rate']:.1%}")
+            result['aggregate'] = self.calculate_aggregate_metrics(result['timeframe_results'], config)
+        
+        return results
+    
     async def simulate_trading(self, strategy, data: pd.DataFrame, timeframe: str, config: Dict):
         """Simula trading su dati specifici"""
         
-        # Calcola indicatori tecnici
+        # Calcola indicatori tecnici una sola volta sull'intera serie
         data = self.add_technical_indicators(data)
         
-        # Variabili simulazione
-        initial_balance = 10000  # $10,000 iniziali
-        balance = initial_balance
-        position = None
-        trades = []
-        
-        # Simula ogni candela
-        for i in range(50, len(data)):  # Inizia da 50 per avere abbastanza dati per indicatori
-            current_data = data.iloc[:i+1]
-            current_price = current_data['Close'].iloc[-1]
-            
-            try:
-                # Analizza mercato (versione semplificata)
-                market_analysis = {
-                    'price': current_price,
-                    'rsi': current_data['RSI'].iloc[-1] if 'RSI' in current_data.columns else 50,
-                    'sma_20': current_data['SMA_20'].iloc[-1] if 'SMA_20' in current_data.columns else current_price,
-                    'sma_50': current_data['SMA_50'].iloc[-1] if 'SMA_50' in current_data.columns else current_price,
-                }
-                
-                # Genera segnali (versione semplificata)
-                signals = await self.generate_simple_signals(strategy, market_analysis, config)
-                
-                # Gestisci posizione esistente
-                if position:
-                    # Check stop loss
-                    if position['type'] == 'long':
-                        if current_price <= position['stop_loss']:
-                            # Stop loss hit
-                            pnl = (current_price - position['entry_price']) / position['entry_price']
-                            trades.append({
-                                'entry_time': position['entry_time'],
-                                'exit_time': current_data.index[-1],
-                                'entry_price': position['entry_price'],
-                                'exit_price': current_price,
-                                'type': 'long',
-                                'pnl': pnl,
-                                'exit_reason': 'stop_loss'
-                            })
-                            balance *= (1 + pnl)
-                            position = None
-                        elif current_price >= position['profit_target']:
-                            # Profit target hit
-                            pnl = (current_price - position['entry_price']) / position['entry_price']
-                            trades.append({
-                                'entry_time': position['entry_time'],
-                                'exit_time': current_data.index[-1],
-                                'entry_price': position['entry_price'],
-                                'exit_price': current_price,
-                                'type': 'long',
-                                'pnl': pnl,
-                                'exit_reason': 'profit_target'
-                            })
-                            balance *= (1 + pnl)
-                            position = None
-                    
-                    elif position['type'] == 'short':
-                        if current_price >= position['stop_loss']:
-                            # Stop loss hit
-                            pnl = (position['entry_price'] - current_price) / position['entry_price']
-                            trades.append({
-                                'entry_time': position['entry_time'],
-                                'exit_time': current_data.index[-1],
-                                'entry_price': position['entry_price'],
-                                'exit_price': current_price,
-                                'type': 'short',
-                                'pnl': pnl,
-                                'exit_reason': 'stop_loss'
-                            })
-                            balance *= (1 + pnl)
-                            position = None
-                        elif current_price <= position['profit_target']:
-                            # Profit target hit
-                            pnl = (position['entry_price'] - current_price) / position['entry_price']
-                            trades.append({
-                                'entry_time': position['entry_time'],
-                                'exit_time': current_data.index[-1],
-                                'entry_price': position['entry_price'],
-                                'exit_price': current_price,
-                                'type': 'short',
-                                'pnl': pnl,
-                                'exit_reason': 'profit_target'
-                            })
-                            balance *= (1 + pnl)
-                            position = None
-                
-                # Apri nuova posizione se nessuna posizione attiva
-                if not position and signals:
-                    signal = signals[0]
-                    if signal['confidence'] >= 0.6:  # Soglia minima confidenza
-                        if signal['action'].lower() == 'buy':
-                            position = {
-                                'type': 'long',
-                                'entry_time': current_data.index[-1],
-                                'entry_price': current_price,
-                                'stop_loss': current_price * (1 - config['stop_loss']),
-                                'profit_target': current_price * (1 + config['profit_target'])
-                            }
-                        elif signal['action'].lower() == 'sell':
-                            position = {
-                                'type': 'short',
-                                'entry_time': current_data.index[-1],
-                                'entry_price': current_price,
-                                'stop_loss': current_price * (1 + config['stop_loss']),
-                                'profit_target': current_price * (1 - config['profit_target'])
-                            }
-                
-            except Exception as e:
-                # Ignora errori individuali e continua
-                continue
-        
-        # Calcola metriche
-        total_trades = len(trades)
-        winning_trades = len([t for t in trades if t['pnl'] > 0])
-        losing_trades = len([t for t in trades if t['pnl'] <= 0])
-        
-        total_pnl = (balance - initial_balance) / initial_balance
-        win_rate = winning_trades / total_trades if total_trades > 0 else 0
-        
-        avg_win = np.mean([t['pnl'] for t in trades if t['pnl'] > 0]) if winning_trades > 0 else 0
-        avg_loss = np.mean([t['pnl'] for t in trades if t['pnl'] <= 0]) if losing_trades > 0 else 0
-        
-        return {
-            'timeframe': timeframe,
-            'total_trades': total_trades,
-            'winning_trades': winning_trades,
-            'losing_trades': losing_trades,
-            'win_rate': win_rate,
-            'total_pnl': total_pnl,
-            'avg_win': avg_win,
-            'avg_loss': avg_loss,
-            'final_balance': balance,
-            'trades': trades
-        }
+        # Backtest event-driven su array (stessa semantica stop loss / profit target)
+        return self.backtest_engine.run(data, config, timeframe)
     
     async def generate_simple_signals(self, strategy, market_analysis: Dict, config: Dict):
         """Genera segnali semplificati per simulazione"""
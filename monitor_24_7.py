@@ -112,10 +112,9 @@ class AurumBotMonitor:
             }
             self.strategy = SwingTradingStrategy(strategy_config)
             
-            # Addestra il modello AI
-            self.logger.info("🧠 Addestramento modello AI...")
-            historical_data = await self.data_loader.get_historical_data('BTCUSDT', '30d', '1h')
-            await self.ai_trading.prediction_model.train_async(historical_data, 'Close', 5)
+            # Data loader, sentiment e modello AI dal registro (addestra solo se assente)
+            self.logger.info("🧠 Preparazione modello AI...")
+            await self.ai_trading.initialize()
             
             self.logger.info("✅ Tutti i componenti inizializzati con successo")
             return True
@@ -136,9 +135,13 @@ class AurumBotMonitor:
             # 1. Health check componenti
             await self.health_check()
             
-            # 2. Analisi mercato per ogni pair
-            for pair in self.config['trading_pairs']:
-                await self.analyze_market(pair)
+            # 2. Analisi mercato per tutti i pair: fetch concorrenti, previsioni in un unico batch
+            pairs = self.config['trading_pairs']
+            analyses = await asyncio.gather(*(self.ai_trading.analyze_market(pair) for pair in pairs))
+            analyses = dict(zip(pairs, analyses))
+            signals = await self.ai_trading.generate_trading_signals_batch(pairs, analyses)
+            for pair in pairs:
+                await self.analyze_market(pair, analyses[pair], signals.get(pair, []))
             
             # 3. Aggiorna statistiche
             cycle_time = time.time() - cycle_start
@@ -161,11 +164,12 @@ class AurumBotMonitor:
                 self.logger.warning(f"⚠️ Troppi errori consecutivi ({self.consecutive_errors}), riavvio componenti...")
                 await self.restart_components()
     
-    async def analyze_market(self, pair):
-        """Analizza il mercato per una coppia specifica"""
+    async def analyze_market(self, pair, market_analysis=None, signals=None):
+        """Analizza il mercato per una coppia specifica (analisi e segnali già calcolati se forniti)"""
         try:
             # Analisi mercato
-            market_analysis = await self.ai_trading.analyze_market(pair)
+            if market_analysis is None:
+                market_analysis = await self.ai_trading.analyze_market(pair)
             if not market_analysis:
                 self.logger.warning(f"⚠️ Nessuna analisi mercato per {pair}")
                 return
@@ -177,7 +181,8 @@ class AurumBotMonitor:
             self.logger.info(f"💹 {pair}: ${price:,.2f} | RSI: {rsi:.2f} | Sentiment: {sentiment}")
             
             # Generazione segnali
-            signals = await self.ai_trading.generate_trading_signals(pair)
+            if signals is None:
+                signals = await self.ai_trading.generate_trading_signals(pair, market_analysis)
             if signals:
                 signal = signals[0]
                 self.stats['signals_generated'] += 1
@@ -337,6 +342,10 @@ class AurumBotMonitor:
         
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
+        
+        # kill -USR2 <pid>: profilo a campionamento del ciclo in logs/profiles (flamegraph)
+        from utils.profiler import install_signal_handler
+        install_signal_handler()
     
     async def run(self):
         """Loop principale del monitoraggio 24/7"""
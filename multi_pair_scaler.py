@@ -19,6 +19,8 @@ import numpy as np
 # Aggiungi path del progetto
 sys.path.append('/home/ubuntu/AurumBotX')
 
+from utils.correlation_engine import CorrelationEngine, align_closes, log_returns, rolling_correlation
+
 @dataclass
 class TradingPair:
     """Configurazione coppia di trading"""
@@ -73,12 +75,19 @@ class MultiPairScaler:
             'correlation_threshold': 0.7,  # Evita coppie troppo correlate
             'min_volume_24h': 1000000,  # Volume minimo 24h
             'rebalance_interval_hours': 6,
-            'performance_lookback_days': 7
+            'performance_lookback_days': 7,
+            'correlation_period': '30d',  # Storico prezzi per le correlazioni
+            'correlation_interval': '1h',
+            'correlation_window': 168,  # Candele della correlazione rolling
+            'correlation_halflife': 48  # Half-life (candele) della correlazione EW
         }
         
         # Metriche di performance per coppia
         self.pair_performances = {}
         self.correlation_matrix = {}
+        self.correlation_engine: Optional[CorrelationEngine] = None
+        self.correlation_last_bar: Optional[pd.Timestamp] = None
+        self.price_history: Dict[str, pd.DataFrame] = {}
         self.risk_metrics = {}
         
     def setup_logging(self):
@@ -159,40 +168,115 @@ class MultiPairScaler:
                 last_signal_time=datetime.now()
             )
     
-    def calculate_correlation_matrix(self) -> Dict[str, Dict[str, float]]:
-        """Calcola matrice di correlazione tra coppie"""
+    async def load_price_history(self) -> Dict[str, pd.DataFrame]:
+        """Carica lo storico prezzi di tutte le coppie supportate"""
         try:
+            from utils.data_loader import CryptoDataLoader
+            
+            data_loader = CryptoDataLoader(use_live_data=True, testnet=True)
+            await data_loader.initialize()
+            
             symbols = list(self.supported_pairs.keys())
-            correlation_matrix = {}
-            
-            for symbol1 in symbols:
-                correlation_matrix[symbol1] = {}
-                for symbol2 in symbols:
-                    if symbol1 == symbol2:
-                        correlation_matrix[symbol1][symbol2] = 1.0
-                    else:
-                        # Simula correlazione basata su asset base
-                        pair1 = self.supported_pairs[symbol1]
-                        pair2 = self.supported_pairs[symbol2]
-                        
-                        # Correlazione alta se stesso asset base
-                        if pair1.base_asset == pair2.base_asset:
-                            correlation = 0.9
-                        # Correlazione media per crypto simili
-                        elif pair1.base_asset in ['BTC', 'ETH'] and pair2.base_asset in ['BTC', 'ETH']:
-                            correlation = 0.7
-                        # Correlazione bassa per asset diversi
-                        else:
-                            correlation = np.random.uniform(0.2, 0.5)
-                        
-                        correlation_matrix[symbol1][symbol2] = correlation
-            
-            return correlation_matrix
+            frames = await asyncio.gather(*[
+                data_loader.get_historical_data(symbol, self.scaling_config['correlation_period'],
+                                                self.scaling_config['correlation_interval'])
+                for symbol in symbols
+            ], return_exceptions=True)
+            
+            return {
+                symbol: data for symbol, data in zip(symbols, frames)
+                if isinstance(data, pd.DataFrame) and not data.empty
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Errore caricamento storico prezzi: {e}")
+            return {}
+    
+    def calculate_correlation_matrix(self) -> Dict[str, Dict[str, float]]:
+        """Calcola matrice di correlazione tra coppie dai rendimenti reali"""
+        try:
+            closes = align_closes(self.price_history)
+            if len(closes) < 3 or closes.shape[1] < 2:
+                self.logger.warning("⚠️ Storico prezzi insufficiente: uso correlazioni strutturali")
+                return self.structural_correlation_matrix()
+            
+            symbols = list(closes.columns)
+            values = closes.to_numpy(dtype=np.float64)
+            
+            self.correlation_engine = CorrelationEngine(
+                symbols, halflife=self.scaling_config['correlation_halflife']
+            ).fit(values)
+            self.correlation_last_bar = closes.index[-1]
+            
+            if self.correlation_engine.is_ready:
+                return self.correlation_engine.as_dict()
+            
+            # Poche candele: la stima EW non è ancora stabile, si usa la finestra rolling
+            matrix = rolling_correlation(log_returns(values), self.scaling_config['correlation_window'])
+            return {
+                s1: {s2: float(matrix[i, j]) for j, s2 in enumerate(symbols)}
+                for i, s1 in enumerate(symbols)
+            }
             
         except Exception as e:
             self.logger.error(f"Errore calcolo correlazioni: {e}")
             return {}
     
+    def structural_correlation_matrix(self) -> Dict[str, Dict[str, float]]:
+        """Correlazioni a priori per asset base, usate solo in assenza di dati"""
+        symbols = list(self.supported_pairs.keys())
+        correlation_matrix = {}
+        
+        for symbol1 in symbols:
+            correlation_matrix[symbol1] = {}
+            for symbol2 in symbols:
+                pair1 = self.supported_pairs[symbol1]
+                pair2 = self.supported_pairs[symbol2]
+                
+                if symbol1 == symbol2:
+                    correlation = 1.0
+                # Correlazione alta se stesso asset base
+                elif pair1.base_asset == pair2.base_asset:
+                    correlation = 0.9
+                # Correlazione media per crypto simili
+                elif pair1.base_asset in ['BTC', 'ETH'] and pair2.base_asset in ['BTC', 'ETH']:
+                    correlation = 0.7
+                # Nessuna informazione: nessuna esclusione
+                else:
+                    correlation = 0.0
+                
+                correlation_matrix[symbol1][symbol2] = correlation
+        
+        return correlation_matrix
+    
+    def update_correlations(self, prices: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+        """
+        Aggiorna la correlazione EW con l'ultimo prezzo di ogni coppia (nuova candela).
+        Le coppie assenti da prices restano fuori da questo aggiornamento.
+        """
+        if self.correlation_engine is None:
+            return self.correlation_matrix
+        
+        engine = self.correlation_engine
+        row = np.array([prices.get(symbol, np.nan) for symbol in engine.symbols], dtype=np.float64)
+        engine.update(row)
+        self.correlation_matrix = engine.as_dict()
+        return self.correlation_matrix
+    
+    def apply_new_bars(self) -> Dict[str, Dict[str, float]]:
+        """Passa a update_correlations le candele dello storico successive all'ultima già vista"""
+        if self.correlation_engine is None or self.correlation_last_bar is None:
+            return self.correlation_matrix
+        
+        closes = pd.DataFrame({
+            symbol: data['Close'] for symbol, data in self.price_history.items()
+            if symbol in self.correlation_engine.index and data is not None and not data.empty
+        })
+        for timestamp, row in closes[closes.index > self.correlation_last_bar].iterrows():
+            self.update_correlations(row.dropna().to_dict())
+            self.correlation_last_bar = timestamp
+        return self.correlation_matrix
+    
     def calculate_pair_score(self, performance: PairPerformance) -> float:
         """Calcola score complessivo per una coppia"""
         try:
@@ -283,9 +367,14 @@ class MultiPairScaler:
                 performance = self.pair_performances[symbol]
                 pair_config = self.supported_pairs[symbol]
                 
-                # Peso basato su score e risk_weight
+                # Peso basato su score e risk_weight, ridotto per le coppie
+                # che si muovono insieme alle altre selezionate
                 score = self.calculate_pair_score(performance)
-                weight = score * pair_config.risk_weight
+                diversification = sum(
+                    max(0.0, self.correlation_matrix.get(symbol, {}).get(other, 1.0 if other == symbol else 0.0))
+                    for other in selected_pairs
+                )
+                weight = score * pair_config.risk_weight / max(diversification, 1.0)
                 pair_weights[symbol] = weight
                 total_weight += weight
             
@@ -523,7 +612,12 @@ esac
             
             # 2. Calcola matrice correlazioni
             self.logger.info("🔗 Calcolo correlazioni...")
-            self.correlation_matrix = self.calculate_correlation_matrix()
+            self.price_history = await self.load_price_history()
+            if self.correlation_engine is None:
+                self.correlation_matrix = self.calculate_correlation_matrix()
+            else:
+                # Cicli successivi: solo le candele nuove, aggiornamento EW incrementale
+                self.apply_new_bars()
             
             # 3. Seleziona coppie ottimali
             self.logger.info("🎯 Selezione coppie ottimali...")
@@ -559,10 +653,22 @@ esac
             traceback.print_exc()
             return {}, []
 
+    async def run_rebalance_loop(self, cycles: Optional[int] = None):
+        """Ripete lo scaling ogni rebalance_interval_hours (cycles=None: senza fine)"""
+        cycle = 0
+        while cycles is None or cycle < cycles:
+            await self.run_multi_pair_scaling()
+            cycle += 1
+            if cycles is None or cycle < cycles:
+                await asyncio.sleep(self.scaling_config['rebalance_interval_hours'] * 3600)
+
 async def main():
-    """Main del multi-pair scaling"""
+    """Main del multi-pair scaling (--loop: ribilanciamento periodico)"""
     scaler = MultiPairScaler()
-    await scaler.run_multi_pair_scaling()
+    if '--loop' in sys.argv[1:]:
+        await scaler.run_rebalance_loop()
+    else:
+        await scaler.run_multi_pair_scaling()
 
 if __name__ == "__main__":
     asyncio.run(main())
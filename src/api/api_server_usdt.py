@@ -1,7 +1,9 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 import sys
 sys.path.append('/home/ubuntu/AurumBotX')
 from src.core.trading_engine_usdt_sqlalchemy import TradingEngineUSDT
+from utils.metrics import CONTENT_TYPE, REGISTRY
+from utils.profiler import PROFILER, install_signal_handler
 
 app = Flask(__name__)
 
@@ -12,6 +14,26 @@ engine = TradingEngineUSDT()
 def status():
     return jsonify({'status': 'online'})
 
+@app.route('/metrics')
+def metrics():
+    # Latenze di ordini, dati di mercato e scritture DB dell'engine, formato Prometheus
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+@app.route('/api/profile', methods=['POST', 'DELETE'])
+def profile():
+    # POST avvia una sessione del profiler a campionamento, DELETE la chiude e restituisce il file .folded
+    if request.method == 'DELETE':
+        output = PROFILER.stop(wait=True)
+        return jsonify({'running': False, 'output': str(output) if output else None})
+    options = request.get_json(silent=True) or {}
+    try:
+        # interval >= 1 ms, duration <= 300 s (limiti in utils.profiler)
+        started = PROFILER.start(duration=float(options.get('duration', 30)),
+                                 interval=float(options.get('interval', 0.005)))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'running': True, 'started': started}), (202 if started else 409)
+
 @app.route("/api/balance")
 def get_balance():
     balance = engine.get_balance()
@@ -24,5 +46,6 @@ def emergency_stop():
     return jsonify(result)
 
 if __name__ == '__main__':
+    install_signal_handler()
     app.run(host='0.0.0.0', port=5678)
 
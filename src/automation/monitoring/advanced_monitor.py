@@ -8,6 +8,7 @@ import os
 import sys
 import json
 import time
+import uuid
 import asyncio
 import logging
 import sqlite3
@@ -15,16 +16,20 @@ import smtplib
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Callable
 from pathlib import Path
-from email.mime.text import MimeText
-from email.mime.multipart import MimeMultipart
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
 import threading
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
 from enum import Enum
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent.parent
 sys.path.append(str(project_root))
 
+from src.automation.monitoring.metrics_store import MetricsStore
+from src.automation.monitoring.alert_pipeline import AlertPipeline, Notification
+from utils.metrics import counter, gauge, histogram, start_http_server
+
 # Configure logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -36,6 +41,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Prometheus metrics for the monitor's own loops
+MONITOR_CYCLE = histogram('aurumbotx_monitor_cycle_seconds', 'Duration of one monitor check', ('check',))
+LOOP_LAG = gauge('aurumbotx_event_loop_lag_seconds', 'Delay of the monitor event loop timers')
+ALERTS_RAISED = counter('aurumbotx_alerts_total', 'Alerts raised', ('level',))
+
 class AlertLevel(Enum):
     """Alert severity levels"""
     INFO = "info"
@@ -64,6 +74,9 @@ class Alert:
     data: Dict[str, Any]
     acknowledged: bool = False
     resolved: bool = False
+    fingerprint: str = ""
+    occurrences: int = 1
+    last_seen: Optional[datetime] = None
 
 @dataclass
 class SystemMetrics:
@@ -140,18 +153,68 @@ class AdvancedMonitor:
             'log': True
         }
         
+        # Alert pipeline: dedup of active alerts, aggregation windows, per-channel rate limits
+        alerting = self.config.get('alerting', {})
+        self.dedup_window = alerting.get('dedup_window', 900)
+        self._active_alerts: Dict[str, Alert] = {}
+        rate_limits = {'telegram': (20 / 60, 5), 'email': (2 / 60, 2), 'webhook': (30 / 60, 10), 'log': None}
+        for channel, limit in alerting.get('rate_limits', {}).items():
+            rate_limits[channel] = (limit['per_minute'] / 60, limit.get('burst', 1)) if limit else None
+        senders = {
+            'log': self._send_log_alert,
+            'telegram': self._send_telegram_alert,
+            'email': self._send_email_alert,
+            'webhook': self._send_webhook_alert
+        }
+        self.alert_pipeline = AlertPipeline(
+            {channel: send for channel, send in senders.items() if self.alert_channels[channel]},
+            window=alerting.get('aggregation_window', 300),
+            rate_limits=rate_limits,
+            queue_size=alerting.get('queue_size', 100),
+            send_timeout=alerting.get('send_timeout', 10)
+        )
+        
         # Monitoring intervals (seconds)
         self.intervals = {
             'system_metrics': 30,
             'trading_metrics': 60,
             'api_health': 15,
             'database_health': 120,
-            'security_check': 300
+            'security_check': 300,
+            'loop_lag': 1,
+            'metrics_flush': 5
         }
         
+        # Optional standalone /metrics endpoint (the monitor has no API server of its own)
+        self.metrics_port = self.config.get('metrics_port')
+        
+        # Latency probe: TCP connect (no ping process per sample)
+        self.latency_probe = tuple(self.config.get('latency_probe', ('8.8.8.8', 53)))
+        
+        # Event loop lag: how late the monitor's own timers fire
+        self.loop_lag = {'last_ms': 0.0, 'max_ms': 0.0}
+        
+        # Prime psutil so later cpu_percent(interval=None) calls return the delta since the previous sample
+        try:
+            import psutil
+            psutil.cpu_percent(interval=None)
+        except ImportError:
+            pass
+        
         # Initialize database
         self._init_monitor_database()
         
+        # Buffered writes with 1m/1h/1d rollups and retention (seconds per resolution)
+        self.metrics_store = MetricsStore(
+            self.monitor_db_path,
+            sources={
+                'system_metrics': [f.name for f in fields(SystemMetrics) if f.name != 'timestamp'],
+                'trading_metrics': [f.name for f in fields(TradingMetrics) if f.name != 'timestamp']
+            },
+            retention=self.config.get('retention'),
+            raw_interval=self.intervals['system_metrics']
+        )
+        
         logger.info("🔍 Advanced Monitor initialized")
 
     def _load_config(self) -> Dict[str, Any]:
@@ -276,6 +339,9 @@ class AdvancedMonitor:
         self.is_running = True
         logger.info("🚀 Starting Advanced Monitor...")
         
+        if self.metrics_port and not getattr(self, '_metrics_server', None):
+            self._metrics_server = start_http_server(int(self.metrics_port))
+        
         # Start monitoring tasks
         tasks = [
             asyncio.create_task(self._monitor_system_metrics()),
@@ -283,7 +349,12 @@ class AdvancedMonitor:
             asyncio.create_task(self._monitor_api_health()),
             asyncio.create_task(self._monitor_database_health()),
             asyncio.create_task(self._monitor_security()),
-            asyncio.create_task(self._process_alerts())
+            asyncio.create_task(self._process_alerts()),
+            asyncio.create_task(self._monitor_loop_lag()),
+            asyncio.create_task(self.alert_pipeline.run(is_running=lambda: self.is_running)),
+            asyncio.create_task(self.metrics_store.run(
+                self.intervals['metrics_flush'], is_running=lambda: self.is_running
+            ))
         ]
         
         try:
@@ -302,9 +373,11 @@ class AdvancedMonitor:
         """Monitor system performance metrics"""
         while self.is_running:
             try:
+                start = time.perf_counter()
                 metrics = await self._collect_system_metrics()
                 await self._check_system_thresholds(metrics)
                 await self._store_system_metrics(metrics)
+                MONITOR_CYCLE.labels('system_metrics').observe(time.perf_counter() - start)
                 
                 await asyncio.sleep(self.intervals['system_metrics'])
                 
@@ -316,9 +389,11 @@ class AdvancedMonitor:
         """Monitor trading performance metrics"""
         while self.is_running:
             try:
+                start = time.perf_counter()
                 metrics = await self._collect_trading_metrics()
                 await self._check_trading_thresholds(metrics)
                 await self._store_trading_metrics(metrics)
+                MONITOR_CYCLE.labels('trading_metrics').observe(time.perf_counter() - start)
                 
                 await asyncio.sleep(self.intervals['trading_metrics'])
                 
@@ -330,7 +405,9 @@ class AdvancedMonitor:
         """Monitor API health and response times"""
         while self.is_running:
             try:
+                start = time.perf_counter()
                 health_status = await self._check_api_health()
+                MONITOR_CYCLE.labels('api_health').observe(time.perf_counter() - start)
                 
                 if not health_status['healthy']:
                     await self._create_alert(
@@ -351,7 +428,9 @@ class AdvancedMonitor:
         """Monitor database health and performance"""
         while self.is_running:
             try:
+                start = time.perf_counter()
                 db_status = await self._check_database_health()
+                MONITOR_CYCLE.labels('database_health').observe(time.perf_counter() - start)
                 
                 if not db_status['healthy']:
                     await self._create_alert(
@@ -372,7 +451,9 @@ class AdvancedMonitor:
         """Monitor security-related metrics"""
         while self.is_running:
             try:
+                start = time.perf_counter()
                 security_status = await self._check_security_status()
+                MONITOR_CYCLE.labels('security').observe(time.perf_counter() - start)
                 
                 if security_status['threats_detected']:
                     await self._create_alert(
@@ -389,49 +470,64 @@ class AdvancedMonitor:
                 logger.error(f"Error monitoring security: {e}")
                 await asyncio.sleep(300)
 
+    async def _monitor_loop_lag(self):
+        """Measure how late the event loop wakes up; any blocking collector shows up here"""
+        loop = asyncio.get_running_loop()
+        while self.is_running:
+            expected = loop.time() + self.intervals['loop_lag']
+            await asyncio.sleep(self.intervals['loop_lag'])
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            self.loop_lag['last_ms'] = lag_ms
+            LOOP_LAG.set(lag_ms / 1000)
+            self.loop_lag['max_ms'] = max(self.loop_lag['max_ms'], lag_ms)
+
+    def _sample_host(self) -> Dict[str, float]:
+        """CPU, memory and disk usage without blocking: CPU is the delta since the previous sample"""
+        import psutil
+        
+        disk = psutil.disk_usage('/')
+        return {
+            'cpu_usage': psutil.cpu_percent(interval=None),
+            'memory_usage': psutil.virtual_memory().percent,
+            'disk_usage': (disk.used / disk.total) * 100
+        }
+
+    async def _measure_network_latency(self) -> float:
+        """Network latency in ms as TCP connect time to the probe host"""
+        host, port = self.latency_probe
+        start_time = time.perf_counter()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=5)
+        except (OSError, asyncio.TimeoutError):
+            return 9999.0  # High value to indicate failure
+        latency = (time.perf_counter() - start_time) * 1000
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return latency
+
     async def _collect_system_metrics(self) -> SystemMetrics:
         """Collect system performance metrics"""
         try:
-            import psutil
-            
-            # CPU and Memory
-            cpu_usage = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
-            
-            # Network latency (ping to Google DNS)
-            import subprocess
-            try:
-                result = subprocess.run(['ping', '-c', '1', '8.8.8.8'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    # Extract latency from ping output
-                    lines = result.stdout.split('\n')
-                    for line in lines:
-                        if 'time=' in line:
-                            latency = float(line.split('time=')[1].split(' ms')[0])
-                            break
-                    else:
-                        latency = 0.0
-                else:
-                    latency = 9999.0  # High value to indicate failure
-            except:
-                latency = 9999.0
-            
-            # API response time
-            api_response_time = await self._measure_api_response_time()
+            # Host sampling in a worker thread (disk_usage can stall on slow mounts),
+            # latency and API probes concurrently on the loop
+            host, latency, api_response_time, trading_data = await asyncio.gather(
+                asyncio.to_thread(self._sample_host),
+                self._measure_network_latency(),
+                self._measure_api_response_time(),
+                self._get_current_trading_data()
+            )
             
             # Database connections (mock for now)
             database_connections = 1
             
-            # Trading data
-            trading_data = await self._get_current_trading_data()
-            
             return SystemMetrics(
                 timestamp=datetime.now(),
-                cpu_usage=cpu_usage,
-                memory_usage=memory.percent,
-                disk_usage=(disk.used / disk.total) * 100,
+                cpu_usage=host['cpu_usage'],
+                memory_usage=host['memory_usage'],
+                disk_usage=host['disk_usage'],
                 network_latency=latency,
                 api_response_time=api_response_time,
                 database_connections=database_connections,
@@ -577,83 +673,64 @@ class AdvancedMonitor:
 
     async def _create_alert(self, level: AlertLevel, alert_type: AlertType, 
                           title: str, message: str, data: Dict[str, Any]):
-        """Create and process a new alert"""
-        alert_id = f"{alert_type.value}_{int(time.time())}"
+        """Create and process a new alert, or fold a repeat into the matching active one"""
+        ALERTS_RAISED.labels(level.value).inc()
+        fingerprint = f"{alert_type.value}:{level.value}:{title}"
+        now = datetime.now()
         
-        alert = Alert(
-            id=alert_id,
-            timestamp=datetime.now(),
-            level=level,
-            type=alert_type,
-            title=title,
-            message=message,
-            data=data
-        )
+        alert = self._active_alerts.get(fingerprint)
+        if alert is not None and not alert.resolved and \
+                (now - alert.last_seen).total_seconds() <= self.dedup_window:
+            alert.occurrences += 1
+            alert.last_seen = now
+            alert.message = message
+            alert.data = data
+        else:
+            alert = Alert(
+                id=f"{alert_type.value}_{int(now.timestamp())}_{uuid.uuid4().hex[:8]}",
+                timestamp=now,
+                level=level,
+                type=alert_type,
+                title=title,
+                message=message,
+                data=data,
+                fingerprint=fingerprint,
+                last_seen=now
+            )
+            self._active_alerts[fingerprint] = alert
+            self.alerts.append(alert)
+            logger.info(f"🚨 Alert created: {level.value.upper()} - {title}")
         
-        # Store alert
+        # Store alert (a repeat rewrites the same row with the new count)
         await self._store_alert(alert)
         
-        # Add to active alerts
-        self.alerts.append(alert)
-        
         # Send notifications
         await self._send_alert_notifications(alert)
-        
-        logger.info(f"🚨 Alert created: {level.value.upper()} - {title}")
 
     async def _store_alert(self, alert: Alert):
         """Store alert in database"""
         try:
-            conn = sqlite3.connect(self.monitor_db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO alerts (id, timestamp, level, type, title, message, data, acknowledged, resolved)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            self.metrics_store.record_alert((
                 alert.id,
                 alert.timestamp.isoformat(),
                 alert.level.value,
                 alert.type.value,
                 alert.title,
                 alert.message,
-                json.dumps(alert.data),
+                json.dumps({**alert.data, 'occurrences': alert.occurrences,
+                            'last_seen': (alert.last_seen or alert.timestamp).isoformat()}),
                 int(alert.acknowledged),
                 int(alert.resolved)
             ))
             
-            conn.commit()
-            conn.close()
-            
         except Exception as e:
             logger.error(f"Error storing alert: {e}")
 
     async def _store_system_metrics(self, metrics: SystemMetrics):
         """Store system metrics in database"""
         try:
-            conn = sqlite3.connect(self.monitor_db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO system_metrics 
-                (timestamp, cpu_usage, memory_usage, disk_usage, network_latency, 
-                 api_response_time, database_connections, active_trades, balance, daily_pnl)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                metrics.timestamp.isoformat(),
-                metrics.cpu_usage,
-                metrics.memory_usage,
-                metrics.disk_usage,
-                metrics.network_latency,
-                metrics.api_response_time,
-                metrics.database_connections,
-                metrics.active_trades,
-                metrics.balance,
-                metrics.daily_pnl
-            ))
-            
-            conn.commit()
-            conn.close()
+            values = asdict(metrics)
+            self.metrics_store.record('system_metrics', values.pop('timestamp'), values)
             
         except Exception as e:
             logger.error(f"Error storing system metrics: {e}")
@@ -661,76 +738,35 @@ class AdvancedMonitor:
     async def _store_trading_metrics(self, metrics: TradingMetrics):
         """Store trading metrics in database"""
         try:
-            conn = sqlite3.connect(self.monitor_db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO trading_metrics 
-                (timestamp, total_trades, successful_trades, failed_trades, win_rate,
-                 total_pnl, daily_pnl, sharpe_ratio, max_drawdown, profit_factor, avg_trade_duration)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                metrics.timestamp.isoformat(),
-                metrics.total_trades,
-                metrics.successful_trades,
-                metrics.failed_trades,
-                metrics.win_rate,
-                metrics.total_pnl,
-                metrics.daily_pnl,
-                metrics.sharpe_ratio,
-                metrics.max_drawdown,
-                metrics.profit_factor,
-                metrics.avg_trade_duration
-            ))
-            
-            conn.commit()
-            conn.close()
+            values = asdict(metrics)
+            self.metrics_store.record('trading_metrics', values.pop('timestamp'), values)
             
         except Exception as e:
             logger.error(f"Error storing trading metrics: {e}")
 
     async def _send_alert_notifications(self, alert: Alert):
-        """Send alert notifications through configured channels"""
-        # Log alert
-        if self.alert_channels['log']:
-            logger.warning(f"ALERT [{alert.level.value.upper()}] {alert.title}: {alert.message}")
-        
-        # Telegram notification
-        if self.alert_channels['telegram']:
-            await self._send_telegram_alert(alert)
-        
-        # Email notification
-        if self.alert_channels['email']:
-            await self._send_email_alert(alert)
-        
-        # Webhook notification
-        if self.alert_channels['webhook']:
-            await self._send_webhook_alert(alert)
+        """Hand the occurrence to the alert pipeline; channels are served by its queue workers"""
+        self.alert_pipeline.submit(alert.fingerprint, alert.level.value, alert.title, alert.message)
+
+    async def _send_log_alert(self, notification: Notification):
+        """Send alert to the log"""
+        logger.warning(f"ALERT [{notification.level.upper()}] {notification.title}: {notification.message}")
 
-    async def _send_telegram_alert(self, alert: Alert):
+    async def _send_telegram_alert(self, notification: Notification):
         """Send alert via Telegram"""
-        try:
-            # This would integrate with the Telegram bot
-            # For now, just log
-            logger.info(f"📱 Telegram alert sent: {alert.title}")
-        except Exception as e:
-            logger.error(f"Error sending Telegram alert: {e}")
+        # This would integrate with the Telegram bot
+        # For now, just log
+        logger.info(f"📱 Telegram alert sent: {notification.title}")
 
-    async def _send_email_alert(self, alert: Alert):
+    async def _send_email_alert(self, notification: Notification):
         """Send alert via email"""
-        try:
-            # Email implementation would go here
-            logger.info(f"📧 Email alert sent: {alert.title}")
-        except Exception as e:
-            logger.error(f"Error sending email alert: {e}")
+        # Email implementation would go here
+        logger.info(f"📧 Email alert sent: {notification.title}")
 
-    async def _send_webhook_alert(self, alert: Alert):
+    async def _send_webhook_alert(self, notification: Notification):
         """Send alert via webhook"""
-        try:
-            # Webhook implementation would go here
-            logger.info(f"🔗 Webhook alert sent: {alert.title}")
-        except Exception as e:
-            logger.error(f"Error sending webhook alert: {e}")
+        # Webhook implementation would go here
+        logger.info(f"🔗 Webhook alert sent: {notification.title}")
 
     async def _process_alerts(self):
         """Process and manage alerts"""
@@ -743,6 +779,10 @@ class AdvancedMonitor:
                     if not alert.resolved or 
                     (current_time - alert.timestamp).days < 7
                 ]
+                self._active_alerts = {
+                    fingerprint: alert for fingerprint, alert in self._active_alerts.items()
+                    if not alert.resolved
+                }
                 
                 await asyncio.sleep(60)  # Process every minute
                 
@@ -783,12 +823,16 @@ class AdvancedMonitor:
 
     async def _check_database_health(self) -> Dict[str, Any]:
         """Check database health"""
+        def probe():
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            try:
+                conn.execute("SELECT 1")
+            finally:
+                conn.close()
+        
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1")
-            conn.close()
-            
+            # A locked database would otherwise stall the loop for the sqlite timeout
+            await asyncio.to_thread(probe)
             return {'healthy': True}
             
         except Exception as e:
@@ -891,21 +935,16 @@ class AdvancedMonitor:
     async def _update_alert_status(self, alert: Alert):
         """Update alert status in database"""
         try:
-            conn = sqlite3.connect(self.monitor_db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                UPDATE alerts 
-                SET acknowledged = ?, resolved = ?
-                WHERE id = ?
-            ''', (int(alert.acknowledged), int(alert.resolved), alert.id))
-            
-            conn.commit()
-            conn.close()
+            self.metrics_store.update_alert(alert.id, alert.acknowledged, alert.resolved)
             
         except Exception as e:
             logger.error(f"Error updating alert status: {e}")
 
+    def get_metrics_history(self, source: str, metric: str, start: datetime,
+                            end: Optional[datetime] = None, max_points: int = 1000) -> Dict[str, Any]:
+        """Metric history with the resolution (raw, 1m, 1h, 1d) picked for the range"""
+        return self.metrics_store.query(source, metric, start, end or datetime.now(), max_points)
+
     def get_system_status(self) -> Dict[str, Any]:
         """Get current system status"""
         return {
@@ -914,7 +953,8 @@ class AdvancedMonitor:
             'active_alerts': len(self.get_active_alerts()),
             'total_alerts': len(self.alerts),
             'monitoring_intervals': self.intervals,
-            'thresholds': self.thresholds
+            'thresholds': self.thresholds,
+            'loop_lag_ms': dict(self.loop_lag)
         }
 
 def main():
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+AurumBotX v2.1 - Alert Pipeline
+Aggregation, rate limiting and queued delivery of alert notifications
+
+Each alert occurrence is submitted with a fingerprint (type, level, title).
+The first occurrence of a fingerprint is queued immediately and opens an
+aggregation window; repeats inside the window only bump a counter, and a
+single summary goes out when the window closes. Every channel has its own
+bounded queue, worker and token bucket: while a worker waits for a token,
+whatever piles up in its queue is folded into one digest, so a flapping
+threshold costs at most one send per token and never blocks the monitor loop.
+"""
+
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+# Severity order used to pick the level of digests and summaries
+LEVELS = ('info', 'warning', 'error', 'critical')
+
+NOTIFICATIONS = counter('aurumbotx_alert_notifications_total', 'Alert notifications by channel and outcome',
+                        ('channel', 'result'))
+SEND_LATENCY = histogram('aurumbotx_alert_send_seconds', 'Alert notification send latency', ('channel',))
+
+
+@dataclass
+class Notification:
+    """One message for the channels: a single alert, a window summary or a digest"""
+    fingerprint: str
+    level: str
+    title: str
+    message: str
+    count: int
+    first_seen: datetime
+    last_seen: datetime
+
+
+def _max_level(*levels: str) -> str:
+    return max(levels, key=lambda level: LEVELS.index(level) if level in LEVELS else 0)
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, now: Optional[float] = None) -> float:
+        """Take a token (possibly on credit) and return how long to wait before using it"""
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class AlertPipeline:
+    """Fingerprint aggregation windows in front of per-channel rate-limited send queues"""
+
+    def __init__(self, senders: Dict[str, Callable[[Notification], Awaitable[None]]],
+                 window: float = 300.0,
+                 rate_limits: Optional[Dict[str, Optional[Tuple[float, float]]]] = None,
+                 queue_size: int = 100, send_timeout: float = 10.0):
+        """
+        Args:
+            senders: channel name -> coroutine function delivering a Notification
+            window: aggregation window in seconds per fingerprint
+            rate_limits: channel -> (tokens per second, burst); None means unlimited
+            queue_size: pending notifications per channel before new ones are dropped
+            send_timeout: seconds before a single send is abandoned
+        """
+        self.senders = senders
+        self.window = window
+        self.send_timeout = send_timeout
+        self.buckets = {
+            channel: TokenBucket(*limit)
+            for channel, limit in (rate_limits or {}).items()
+            if limit and channel in senders
+        }
+        self.queues = {channel: asyncio.Queue(queue_size) for channel in senders}
+        self._windows: Dict[str, Notification] = {}
+
+    def submit(self, fingerprint: str, level: str, title: str, message: str) -> bool:
+        """
+        Register one alert occurrence without waiting on any channel.
+        Returns True if it was queued now, False if it was folded into an open window.
+        """
+        now = datetime.now()
+        group = self._windows.get(fingerprint)
+        if group is not None:
+            group.count += 1
+            group.last_seen = now
+            group.level = _max_level(group.level, level)
+            group.message = message
+            return False
+
+        notification = Notification(fingerprint, level, title, message, 1, now, now)
+        self._windows[fingerprint] = notification
+        self._enqueue(replace(notification))
+        asyncio.get_running_loop().call_later(self.window, self._close_window, fingerprint)
+        return True
+
+    def _close_window(self, fingerprint: str):
+        """Queue one summary for the repeats seen while the window was open"""
+        group = self._windows.pop(fingerprint, None)
+        if group is None or group.count <= 1:
+            return
+        repeats = group.count - 1
+        self._enqueue(replace(
+            group,
+            title=f"{group.title} (repeated {repeats}x in {self.window:g}s)",
+            count=repeats
+        ))
+
+    def _enqueue(self, notification: Notification):
+        for channel, queue in self.queues.items():
+            try:
+                queue.put_nowait(notification)
+            except asyncio.QueueFull:
+                NOTIFICATIONS.labels(channel, 'dropped').inc()
+                logger.debug(f"Alert queue for {channel} full, dropping: {notification.title}")
+
+    @staticmethod
+    def _digest(batch: List[Notification]) -> Notification:
+        """Fold queued notifications into one message"""
+        return Notification(
+            fingerprint='digest',
+            level=_max_level(*(n.level for n in batch)),
+            title=f"{len(batch)} alerts",
+            message='\n'.join(f"[{n.level.upper()}] {n.title}: {n.message}" for n in batch),
+            count=sum(n.count for n in batch),
+            first_seen=min(n.first_seen for n in batch),
+            last_seen=max(n.last_seen for n in batch)
+        )
+
+    async def _send(self, channel: str, notification: Notification):
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.senders[channel](notification), self.send_timeout)
+            NOTIFICATIONS.labels(channel, 'sent').inc()
+        except Exception as e:
+            NOTIFICATIONS.labels(channel, 'failed').inc()
+            logger.error(f"Error sending {channel} alert: {e!r}")
+        SEND_LATENCY.labels(channel).observe(time.perf_counter() - start)
+
+    async def _drain(self, channel: str, is_running):
+        queue = self.queues[channel]
+        bucket = self.buckets.get(channel)
+        while is_running():
+            try:
+                first = await asyncio.wait_for(queue.get(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            batch = [first]
+            delay = bucket.reserve() if bucket is not None else 0.0
+            if delay > 0:
+                # Out of tokens: everything queued meanwhile goes out with this send
+                await asyncio.sleep(delay)
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+            await self._send(channel, batch[0] if len(batch) == 1 else self._digest(batch))
+
+    async def run(self, is_running=lambda: True):
+        """One worker per channel until is_running() turns false"""
+        await asyncio.gather(*(self._drain(channel, is_running) for channel in self.senders))
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+AurumBotX v2.1 - Metrics Store
+Buffered metrics writer with rollups and retention for the monitor database
+
+Samples are buffered in memory and written in one transaction per flush.
+Each flush also folds the new samples into 1m/1h/1d rollup tables
+(min/max/sum/count/last per metric and bucket), so range queries over
+weeks or months read a few hundred rollup rows instead of every raw
+sample. Retention policies prune raw rows and old rollups.
+"""
+
+import time
+import asyncio
+import logging
+import sqlite3
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Iterable
+
+from utils.metrics import histogram
+
+logger = logging.getLogger(__name__)
+
+DB_WRITE = histogram('aurumbotx_db_write_seconds', 'Database write latency', ('table',)).labels('monitor')
+
+# Rollup resolutions: name -> bucket size in seconds
+ROLLUPS = {
+    '1m': 60,
+    '1h': 3600,
+    '1d': 86400
+}
+
+# Default retention in seconds (None = keep forever)
+DEFAULT_RETENTION = {
+    'raw': 7 * 86400,
+    '1m': 30 * 86400,
+    '1h': 365 * 86400,
+    '1d': None
+}
+
+
+class MetricsStore:
+    """Batched writer and resolution-aware reader for the monitor metrics"""
+
+    def __init__(self, db_path: str, sources: Dict[str, Iterable[str]],
+                 retention: Optional[Dict[str, Optional[float]]] = None,
+                 raw_interval: float = 30.0, batch_size: int = 500):
+        """
+        Args:
+            db_path: SQLite database (raw tables are created by the caller)
+            sources: raw table name -> metric columns (besides timestamp)
+            retention: seconds to keep per resolution ('raw', '1m', '1h', '1d')
+            raw_interval: expected seconds between raw samples, used to pick a resolution
+            batch_size: buffered rows that trigger an early flush from run()
+        """
+        self.db_path = db_path
+        self.sources = {name: list(columns) for name, columns in sources.items()}
+        self.retention = {**DEFAULT_RETENTION, **(retention or {})}
+        self.raw_interval = raw_interval
+        self.batch_size = batch_size
+
+        self._rows: List[tuple] = []
+        self._alerts: List[tuple] = []
+        self._alert_updates: List[tuple] = []
+        self._buffer_lock = threading.Lock()
+
+        # One connection shared by the flush/query worker threads
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        self._init_rollup_tables()
+
+    def _init_rollup_tables(self):
+        with self._db_lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            for resolution in ROLLUPS:
+                self._conn.execute(f'''
+                    CREATE TABLE IF NOT EXISTS metrics_{resolution} (
+                        source TEXT NOT NULL,
+                        metric TEXT NOT NULL,
+                        bucket INTEGER NOT NULL,
+                        min REAL,
+                        max REAL,
+                        sum REAL,
+                        count INTEGER,
+                        last REAL,
+                        last_ts REAL,
+                        PRIMARY KEY (source, metric, bucket)
+                    )
+                ''')
+                self._conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS idx_metrics_{resolution}_bucket ON metrics_{resolution} (bucket)'
+                )
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Writes (buffered, non-blocking)
+    # ------------------------------------------------------------------
+
+    def record(self, source: str, timestamp: datetime, values: Dict[str, Any]):
+        """Buffer one raw sample of a source table"""
+        if source not in self.sources:
+            raise ValueError(f"Unknown metrics source: {source}")
+        row = tuple(values.get(column) for column in self.sources[source])
+        with self._buffer_lock:
+            self._rows.append((source, timestamp, row))
+
+    def record_alert(self, row: tuple):
+        """Buffer one alert row (id, timestamp, level, type, title, message, data, acknowledged, resolved)"""
+        with self._buffer_lock:
+            self._alerts.append(row)
+
+    def update_alert(self, alert_id: str, acknowledged: bool, resolved: bool):
+        """Buffer an alert status change (applied after the pending inserts)"""
+        with self._buffer_lock:
+            self._alert_updates.append((int(acknowledged), int(resolved), alert_id))
+
+    @property
+    def pending(self) -> int:
+        return len(self._rows) + len(self._alerts) + len(self._alert_updates)
+
+    def flush(self) -> int:
+        """Write all buffered rows and their rollups in one transaction; returns rows written"""
+        with self._buffer_lock:
+            rows, self._rows = self._rows, []
+            alerts, self._alerts = self._alerts, []
+            updates, self._alert_updates = self._alert_updates, []
+        if not (rows or alerts or updates):
+            return 0
+
+        by_source = defaultdict(list)
+        for source, timestamp, row in rows:
+            by_source[source].append((timestamp.isoformat(), *row))
+
+        start = time.perf_counter()
+        try:
+            with self._db_lock, self._conn:
+                for source, source_rows in by_source.items():
+                    columns = self.sources[source]
+                    self._conn.executemany(
+                        f"INSERT OR REPLACE INTO {source} (timestamp, {', '.join(columns)}) "
+                        f"VALUES ({', '.join('?' * (len(columns) + 1))})",
+                        source_rows
+                    )
+                for resolution, size in ROLLUPS.items():
+                    self._conn.executemany(f'''
+                        INSERT INTO metrics_{resolution} (source, metric, bucket, min, max, sum, count, last, last_ts)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (source, metric, bucket) DO UPDATE SET
+                            min = MIN(min, excluded.min),
+                            max = MAX(max, excluded.max),
+                            sum = sum + excluded.sum,
+                            count = count + excluded.count,
+                            last = CASE WHEN excluded.last_ts >= last_ts THEN excluded.last ELSE last END,
+                            last_ts = MAX(last_ts, excluded.last_ts)
+                    ''', self._aggregate(rows, size))
+                self._conn.executemany('''
+                    INSERT OR REPLACE INTO alerts (id, timestamp, level, type, title, message, data, acknowledged, resolved)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', alerts)
+                self._conn.executemany('UPDATE alerts SET acknowledged = ?, resolved = ? WHERE id = ?', updates)
+        except Exception:
+            # Keep the batch for the next flush instead of losing it
+            with self._buffer_lock:
+                self._rows[:0] = rows
+                self._alerts[:0] = alerts
+                self._alert_updates[:0] = updates
+            raise
+        DB_WRITE.observe(time.perf_counter() - start)
+        return len(rows) + len(alerts) + len(updates)
+
+    def _aggregate(self, rows: List[tuple], size: int) -> List[tuple]:
+        """Pre-aggregate the batch per (source, metric, bucket) before the upsert"""
+        buckets: Dict[tuple, list] = {}
+        for source, timestamp, row in rows:
+            ts = timestamp.timestamp()
+            bucket = int(ts // size * size)
+            for metric, value in zip(self.sources[source], row):
+                if value is None:
+                    continue
+                value = float(value)
+                entry = buckets.get((source, metric, bucket))
+                if entry is None:
+                    buckets[(source, metric, bucket)] = [value, value, value, 1, value, ts]
+                    continue
+                entry[0] = min(entry[0], value)
+                entry[1] = max(entry[1], value)
+                entry[2] += value
+                entry[3] += 1
+                if ts >= entry[5]:
+                    entry[4], entry[5] = value, ts
+        return [(*key, *entry) for key, entry in buckets.items()]
+
+    def prune(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Delete raw rows and rollups older than their retention"""
+        now = now or datetime.now()
+        deleted = {}
+        with self._db_lock, self._conn:
+            keep = self.retention.get('raw')
+            if keep is not None:
+                cutoff = (now - timedelta(seconds=keep)).isoformat()
+                deleted['raw'] = sum(
+                    self._conn.execute(f"DELETE FROM {source} WHERE timestamp < ?", (cutoff,)).rowcount
+                    for source in self.sources
+                )
+            for resolution in ROLLUPS:
+                keep = self.retention.get(resolution)
+                if keep is not None:
+                    cutoff = now.timestamp() - keep
+                    deleted[resolution] = self._conn.execute(
+                        f"DELETE FROM metrics_{resolution} WHERE bucket < ?", (cutoff,)
+                    ).rowcount
+        return deleted
+
+    async def run(self, flush_interval: float = 5.0, prune_interval: float = 3600.0,
+                  is_running=lambda: True):
+        """Flush periodically (earlier if the buffer exceeds batch_size) and prune hourly"""
+        last_prune = 0.0
+        elapsed = 0.0
+        while is_running():
+            await asyncio.sleep(0.5)
+            elapsed += 0.5
+            if elapsed < flush_interval and self.pending < self.batch_size:
+                continue
+            elapsed = 0.0
+            try:
+                await asyncio.to_thread(self.flush)
+                if time.time() - last_prune >= prune_interval:
+                    await asyncio.to_thread(self.prune)
+                    last_prune = time.time()
+            except Exception as e:
+                logger.error(f"Error flushing metrics: {e}")
+        await asyncio.to_thread(self.flush)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def choose_resolution(self, start: datetime, end: datetime, max_points: int = 1000,
+                          now: Optional[datetime] = None) -> str:
+        """Finest resolution that covers [start, end] within retention and max_points"""
+        now = now or datetime.now()
+        span = max(0.0, (end - start).total_seconds())
+        age = (now - start).total_seconds()
+        candidates = [('raw', self.raw_interval)] + list(ROLLUPS.items())
+        for resolution, size in candidates:
+            keep = self.retention.get(resolution)
+            if keep is not None and age > keep:
+                continue
+            if span / size <= max_points:
+                return resolution
+        return '1d'
+
+    def query(self, source: str, metric: str, start: datetime, end: datetime,
+              max_points: int = 1000, resolution: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Points of one metric between start and end at the resolution picked by
+        choose_resolution (or the one given). Each point has timestamp, min,
+        max, avg, last and count.
+        """
+        if source not in self.sources or metric not in self.sources[source]:
+            raise ValueError(f"Unknown metric: {source}.{metric}")
+        resolution = resolution or self.choose_resolution(start, end, max_points)
+
+        with self._db_lock:
+            if resolution == 'raw':
+                rows = self._conn.execute(
+                    f"SELECT timestamp, {metric} FROM {source} "
+                    f"WHERE timestamp >= ? AND timestamp <= ? AND {metric} IS NOT NULL ORDER BY timestamp",
+                    (start.isoformat(), end.isoformat())
+                ).fetchall()
+                points = [{'timestamp': ts, 'min': value, 'max': value, 'avg': value, 'last': value, 'count': 1}
+                          for ts, value in rows]
+            else:
+                size = ROLLUPS[resolution]
+                rows = self._conn.execute(
+                    f"SELECT bucket, min, max, sum, count, last FROM metrics_{resolution} "
+                    f"WHERE source = ? AND metric = ? AND bucket >= ? AND bucket <= ? ORDER BY bucket",
+                    (source, metric, int(start.timestamp() // size * size), end.timestamp())
+                ).fetchall()
+                points = [{'timestamp': datetime.fromtimestamp(bucket).isoformat(), 'min': low, 'max': high,
+                           'avg': total / count, 'last': last, 'count': count}
+                          for bucket, low, high, total, count, last in rows]
+
+        return {'source': source, 'metric': metric, 'resolution': resolution, 'points': points}
+
+    def close(self):
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
@@ -4,6 +4,7 @@ AurumBotX Perpetual Futures Engine
 Motore specializzato per il trading di perpetual futures su Hyperliquid
 """
 
+import time
 import logging
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
@@ -11,8 +12,20 @@ from datetime import datetime
 from enum import Enum
 import json
 
+from utils.metrics import counter, gauge, histogram
+
 logger = logging.getLogger(__name__)
 
+# Metriche condivise con TradingEngineUSDT (etichetta engine="perpetual")
+ORDER_ROUNDTRIP = histogram('aurumbotx_order_roundtrip_seconds',
+                            'Order submission to fill latency', ('engine',)).labels('perpetual')
+ORDERS = counter('aurumbotx_orders_total', 'Orders by outcome', ('engine', 'status'))
+ORDERS_FILLED = ORDERS.labels('perpetual', 'filled')
+ORDERS_REJECTED = ORDERS.labels('perpetual', 'rejected')
+OPEN_POSITIONS = gauge('aurumbotx_open_positions', 'Currently open positions', ('engine',)).labels('perpetual')
+POSITION_UPDATE = histogram('aurumbotx_position_update_seconds',
+                            'Mark-to-market and exit check of one position', ('engine',)).labels('perpetual')
+
 class PositionSide(Enum):
     """Lati della posizione"""
     LONG = "Long"
@@ -116,9 +129,11 @@ class PerpetualFuturesEngine:
         Returns:
             Dizionario con i dettagli della posizione aperta
         """
+        start = time.perf_counter()
         
         # Valida il leverage
         if not self.leverage_manager.validate_leverage(leverage):
+            ORDERS_REJECTED.inc()
             return {"error": "Invalid leverage"}
         
         # Calcola il collaterale
@@ -162,6 +177,9 @@ class PerpetualFuturesEngine:
         )
         
         self.positions[position_id] = position
+        ORDER_ROUNDTRIP.observe(time.perf_counter() - start)
+        ORDERS_FILLED.inc()
+        OPEN_POSITIONS.inc()
         
         logger.info(
             f"Position Opened: {position_id} | {symbol} {side} {size} @ ${entry_price:.2f} "
@@ -199,12 +217,16 @@ class PerpetualFuturesEngine:
         Returns:
             Dizionario con i dettagli del trade chiuso
         """
+        start = time.perf_counter()
         
         if position_id not in self.positions:
             logger.error(f"Position not found: {position_id}")
+            ORDERS_REJECTED.inc()
             return {"error": "Position not found"}
         
         position = self.positions[position_id]
+        if position.status == PositionStatus.OPEN.value:
+            OPEN_POSITIONS.dec()
         
         # Calcola il P&L
         pnl, pnl_percent = self.leverage_manager.calculate_pnl_with_leverage(
@@ -255,6 +277,8 @@ class PerpetualFuturesEngine:
         position.status = PositionStatus.CLOSED.value
         position.current_price = exit_price
         position.last_update = datetime.now()
+        ORDER_ROUNDTRIP.observe(time.perf_counter() - start)
+        ORDERS_FILLED.inc()
         
         logger.info(
             f"Position Closed: {position_id} | {position.symbol} {position.side} "
@@ -287,6 +311,7 @@ class PerpetualFuturesEngine:
             position_id: ID della posizione
             current_price: Prezzo corrente
         """
+        start = time.perf_counter()
         
         if position_id not in self.positions:
             logger.error(f"Position not found: {position_id}")
@@ -310,6 +335,7 @@ class PerpetualFuturesEngine:
         
         # Controlla le condizioni di uscita
         self._check_exit_conditions(position_id)
+        POSITION_UPDATE.observe(time.perf_counter() - start)
     
     def _check_exit_conditions(self, position_id: str):
         """
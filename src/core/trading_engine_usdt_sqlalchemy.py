@@ -32,11 +32,32 @@ from ..strategies.challenge_growth_strategy_usdt import ChallengeGrowthStrategyU
 from .risk_manager_usdt import RiskManagerUSDT, RiskLevel
 from ..exchanges.binance_adapter import BinanceAdapter
 from ..data.yahoo_finance_provider import YahooFinanceProvider
+from utils.metrics import counter, gauge, histogram
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Hot-path metrics, served in Prometheus format on /metrics by the API servers.
+# Labelled children are bound once here so each observation is a plain list increment.
+MARKET_DATA_REFRESH = histogram('aurumbotx_market_data_refresh_seconds',
+                                'Market data refresh latency', ('source',)).labels('engine')
+MARKET_DATA_ERRORS = counter('aurumbotx_market_data_errors_total',
+                             'Failed market data fetches', ('source',)).labels('engine')
+ORDER_ROUNDTRIP = histogram('aurumbotx_order_roundtrip_seconds',
+                            'Order submission to fill latency', ('engine',)).labels('spot')
+ORDERS = counter('aurumbotx_orders_total', 'Orders by outcome', ('engine', 'status'))
+ORDERS_FILLED = ORDERS.labels('spot', 'filled')
+ORDERS_REJECTED = ORDERS.labels('spot', 'rejected')
+ORDERS_FAILED = ORDERS.labels('spot', 'failed')
+DB_WRITE = histogram('aurumbotx_db_write_seconds', 'Database write latency', ('table',))
+DB_WRITE_TRADES = DB_WRITE.labels('trades')
+DB_WRITE_POSITIONS = DB_WRITE.labels('positions')
+LOOP_CYCLE = histogram('aurumbotx_loop_cycle_seconds', 'Duration of one background loop iteration', ('loop',))
+MARKET_DATA_CYCLE = LOOP_CYCLE.labels('market_data')
+POSITION_MONITOR_CYCLE = LOOP_CYCLE.labels('position_monitor')
+OPEN_POSITIONS = gauge('aurumbotx_open_positions', 'Currently open positions', ('engine',)).labels('spot')
+
 class OrderType(Enum):
     """Order types for trading"""
     MARKET = "market"
@@ -521,6 +542,7 @@ class TradingEngineUSDT:
             )
             
             if not validation['valid']:
+                ORDERS_REJECTED.inc()
                 return {
                     'success': False,
                     'error': f"Trade validation failed: {validation['errors']}",
@@ -550,7 +572,10 @@ class TradingEngineUSDT:
             # Execute order
             execution_result = self._execute_order(order, market_data)
             
-            if execution_result['success']:
+            if not execution_result['success']:
+                ORDERS_FAILED.inc()
+            else:
+                ORDERS_FILLED.inc()
                 # Update balance
                 if side == TradeDirection.BUY:
                     self.current_balance_usdt -= execution_result['net_amount_usdt']
@@ -561,12 +586,15 @@ class TradingEngineUSDT:
                 if side == TradeDirection.BUY:
                     position = self._create_position(order, execution_result, user_id)
                     self.active_positions[position.position_id] = position
+                    OPEN_POSITIONS.set(len(self.active_positions))
                     
                     if self.on_position_opened:
                         self.on_position_opened(position)
                 
-                # Update performance metrics
-                self._update_performance_metrics(execution_result)
+                # Fees are paid on every fill; PnL metrics are updated when the position closes
+                self.performance_metrics['total_fees_usdt'] += execution_result['fees_usdt']
+                self.performance_metrics['net_pnl_usdt'] = (self.performance_metrics['gross_pnl_usdt'] -
+                                                            self.performance_metrics['total_fees_usdt'])
                 
                 # Trigger callback
                 if self.on_trade_executed:
@@ -577,6 +605,7 @@ class TradingEngineUSDT:
             return execution_result
             
         except Exception as e:
+            ORDERS_FAILED.inc()
             logger.error(f"Error executing trade: {str(e)}")
             return {
                 'success': False,
@@ -934,7 +963,9 @@ class TradingEngineUSDT:
         """Background loop for updating market data"""
         while self.running:
             try:
+                start = time.perf_counter()
                 self._update_market_data()
+                MARKET_DATA_CYCLE.observe(time.perf_counter() - start)
                 time.sleep(self.trading_config['market_data_refresh_seconds'])
             except Exception as e:
                 logger.error(f"Error in market data loop: {str(e)}")
@@ -944,7 +975,9 @@ class TradingEngineUSDT:
         """Background loop for monitoring positions"""
         while self.running:
             try:
+                start = time.perf_counter()
                 self._monitor_positions()
+                POSITION_MONITOR_CYCLE.observe(time.perf_counter() - start)
                 time.sleep(self.trading_config['position_check_interval_seconds'])
             except Exception as e:
                 logger.error(f"Error in position monitor loop: {str(e)}")
@@ -955,10 +988,13 @@ class TradingEngineUSDT:
         try:
             for symbol in self.strategy.trading_pairs:
                 # Get real-time market data (no more simulation!)
+                start = time.perf_counter()
                 market_data = self._get_real_market_data(symbol)
+                MARKET_DATA_REFRESH.observe(time.perf_counter() - start)
                 if market_data:
                     self.market_data_cache[symbol] = market_data
                 else:
+                    MARKET_DATA_ERRORS.inc()
                     logger.error(f"❌ Failed to get market data for {symbol}")
             
             self.last_market_update = datetime.utcnow()
@@ -967,6 +1003,15 @@ class TradingEngineUSDT:
         except Exception as e:
             logger.error(f"Error updating market data: {str(e)}")
     
+    def _get_market_data(self, symbol: str) -> Optional[MarketData]:
+        """Market data from the cache kept fresh by the market data loop, fetched on a miss"""
+        market_data = self.market_data_cache.get(symbol)
+        if market_data is None:
+            market_data = self._get_real_market_data(symbol)
+            if market_data:
+                self.market_data_cache[symbol] = market_data
+        return market_data
+
     def _get_real_market_data(self, symbol: str) -> Optional[MarketData]:
         """Get real-time market data using Yahoo Finance (REAL DATA)"""
         try:
@@ -1106,6 +1151,7 @@ class TradingEngineUSDT:
     def _execute_order(self, order: TradingOrder, market_data: MarketData) -> Dict:
         """Execute a trading order."""
         try:
+            start = time.perf_counter()
             if self.binance_adapter:
                 # Real execution with Binance
                 executed_order = self.binance_adapter.create_order(
@@ -1125,6 +1171,7 @@ class TradingEngineUSDT:
                 fees = 0.001 # 0.1% fee
                 fees_usdt = order.amount_usdt * fees
                 net_amount_usdt = order.amount_usdt - fees_usdt
+            ORDER_ROUNDTRIP.observe(time.perf_counter() - start)
 
             execution = TradeExecution(
                 trade_id=str(uuid.uuid4()),
@@ -1149,12 +1196,14 @@ class TradingEngineUSDT:
             order.updated_at = datetime.utcnow()
 
             # Save trade to database
+            start = time.perf_counter()
             with self.Session() as session:
                 session.execute(
                     text("INSERT INTO trades (trade_id, order_id, symbol, side, amount_usdt, execution_price, fees_usdt, net_amount_usdt, execution_time, slippage_percentage, strategy_id, user_id) VALUES (:trade_id, :order_id, :symbol, :side, :amount_usdt, :execution_price, :fees_usdt, :net_amount_usdt, :execution_time, :slippage_percentage, :strategy_id, :user_id)"),
                     {"trade_id": execution.trade_id, "order_id": execution.order_id, "symbol": execution.symbol, "side": execution.side.value, "amount_usdt": execution.amount_usdt, "execution_price": execution.execution_price, "fees_usdt": execution.fees_usdt, "net_amount_usdt": execution.net_amount_usdt, "execution_time": execution.execution_time, "slippage_percentage": execution.slippage_percentage, "strategy_id": order.strategy_id, "user_id": order.user_id}
                 )
                 session.commit()
+            DB_WRITE_TRADES.observe(time.perf_counter() - start)
 
             return asdict(execution)
         except Exception as e:
@@ -1181,12 +1230,14 @@ class TradingEngineUSDT:
             user_id=user_id
         )
         # Save position to database
+        start = time.perf_counter()
         with self.Session() as session:
             session.execute(
                 text("INSERT INTO positions (position_id, symbol, side, amount_usdt, entry_price, current_price, unrealized_pnl_usdt, stop_loss_price, take_profit_price, opened_at, updated_at, strategy_id, user_id) VALUES (:position_id, :symbol, :side, :amount_usdt, :entry_price, :current_price, :unrealized_pnl_usdt, :stop_loss_price, :take_profit_price, :opened_at, :updated_at, :strategy_id, :user_id)"),
                 {"position_id": position.position_id, "symbol": position.symbol, "side": position.side.value, "amount_usdt": position.amount_usdt, "entry_price": position.entry_price, "current_price": position.current_price, "unrealized_pnl_usdt": position.unrealized_pnl_usdt, "stop_loss_price": position.stop_loss_price, "take_profit_price": position.take_profit_price, "opened_at": position.opened_at, "updated_at": position.updated_at, "strategy_id": position.strategy_id, "user_id": position.user_id}
             )
             session.commit()
+        DB_WRITE_POSITIONS.observe(time.perf_counter() - start)
         return position
 
     def _update_performance_metrics(self, pnl: float, trade_duration: timedelta):
@@ -1246,6 +1297,7 @@ class TradingEngineUSDT:
                 # Close position (mock implementation)
                 logger.info(f"Closing position {position_id} for {position.symbol}")
                 del self.active_positions[position_id]
+                OPEN_POSITIONS.set(len(self.active_positions))
                 if self.on_position_closed:
                     self.on_position_closed(position)
 
@@ -20,6 +20,10 @@ import copy
 # Aggiungi path del progetto
 sys.path.append('/home/ubuntu/AurumBotX')
 
+from utils.backtest_engine import compute_indicator_arrays
+from utils.backtest_cache import BacktestCache, fingerprint_frame
+from utils.walk_forward_optimizer import WalkForwardOptimizer
+
 @dataclass
 class OptimizationResult:
     """Risultato di ottimizzazione"""
@@ -66,6 +70,20 @@ class StrategyOptimizer:
             'position_size_factor': (0.01, 0.2, 0.01)
         }
         
+        # Tipo di segnale usato dal backtest per ciascuna strategia
+        self.strategy_types = {
+            'swing_trading': 'swing',
+            'scalping': 'scalping'
+        }
+        
+        # Walk-forward: budget CPU per candidato (secondi) e finestre train/test
+        self.cpu_budget_per_candidate = 0.5
+        self.walk_forward_windows = 6
+        
+        # Risultati di backtest già calcolati sugli stessi dati (chiave = hash contenuto)
+        self.backtest_cache = BacktestCache()
+        self.market_fingerprint = None
+        
         # Metriche di performance
         self.performance_metrics = {}
         self.optimization_results = {}
@@ -142,6 +160,28 @@ class StrategyOptimizer:
             self.logger.error(f"Errore caricamento dati: {e}")
             return {}
     
+    async def load_market_arrays(self, symbol: str = 'BTCUSDT', period: str = '30d',
+                                 interval: str = '1h') -> Optional[Dict[str, np.ndarray]]:
+        """Carica dati storici e precalcola gli indicatori per il backtest"""
+        try:
+            from utils.data_loader import CryptoDataLoader
+            
+            data_loader = CryptoDataLoader(use_live_data=True, testnet=True)
+            await data_loader.initialize()
+            data = await data_loader.get_historical_data(symbol, period, interval)
+            
+            if data is None or data.empty:
+                self.logger.warning(f"⚠️ Nessun dato di mercato per {symbol} {interval}")
+                return None
+            
+            self.logger.info(f"📊 Dati mercato {symbol} {interval}: {len(data)} candele")
+            self.market_fingerprint = fingerprint_frame(data, symbol, interval)
+            return compute_indicator_arrays(data)
+            
+        except Exception as e:
+            self.logger.error(f"Errore caricamento dati mercato: {e}")
+            return None
+    
     def calculate_strategy_performance_score(self, config: Dict[str, Any], 
                                            performance_data: Dict[str, Any]) -> float:
         """Calcola score di performance per una configurazione"""
@@ -283,6 +323,77 @@ class StrategyOptimizer:
                 recommendations=[f"❌ Errore ottimizzazione: {str(e)}"]
             )
     
+    def optimize_strategy_walk_forward(self, strategy_name: str,
+                                       market_arrays: Dict[str, np.ndarray],
+                                       num_variations: int = 50) -> OptimizationResult:
+        """Ottimizza una strategia con backtest walk-forward e successive halving"""
+        base_config = self.strategy_configs.get(strategy_name, {})
+        
+        try:
+            self.logger.info(f"🔧 Ottimizzazione walk-forward: {strategy_name}")
+            
+            if not base_config:
+                raise ValueError(f"Strategia {strategy_name} non trovata")
+            
+            strategy_type = self.strategy_types[strategy_name]
+            candidates = [base_config] + self.generate_parameter_variations(base_config, num_variations)
+            backtest_candidates = [dict(c, type=strategy_type) for c in candidates]
+            
+            optimizer = WalkForwardOptimizer(
+                market_arrays,
+                n_windows=self.walk_forward_windows,
+                cpu_budget_per_candidate=self.cpu_budget_per_candidate,
+                cache=self.backtest_cache,
+                fingerprint=self.market_fingerprint
+            )
+            search = optimizer.optimize(backtest_candidates)
+            baseline = optimizer.evaluate_config(backtest_candidates[0])
+            
+            # Confronto out-of-sample sulle stesse finestre usate dal vincitore
+            windows_used = search['windows_used']
+            baseline_score = float(np.mean([baseline['test_scores'][w] for w in windows_used]))
+            best_score = search['test_score']
+            best_config = candidates[search['best_index']]
+            
+            self.logger.info(f"📊 Score OOS baseline: {baseline_score:.4f} | migliore: {best_score:.4f} "
+                             f"(CPU {search['cpu_seconds']:.1f}s, {search['rungs']} rung)")
+            
+            if abs(baseline_score) > 0:
+                improvement = (best_score - baseline_score) / abs(baseline_score) * 100
+            else:
+                improvement = (best_score - baseline_score) * 100
+            
+            # Confidence: quota di finestre test in cui il vincitore batte la baseline
+            wins = sum(
+                1 for k, w in enumerate(windows_used)
+                if search['test_scores'][k] >= baseline['test_scores'][w]
+            )
+            confidence_score = wins / len(windows_used) * 100
+            
+            recommendations = self.generate_optimization_recommendations(
+                strategy_name, base_config, best_config, improvement
+            )
+            
+            return OptimizationResult(
+                strategy_name=strategy_name,
+                original_config=base_config,
+                optimized_config=best_config,
+                performance_improvement=improvement,
+                confidence_score=confidence_score,
+                recommendations=recommendations
+            )
+            
+        except Exception as e:
+            self.logger.error(f"Errore ottimizzazione walk-forward {strategy_name}: {e}")
+            return OptimizationResult(
+                strategy_name=strategy_name,
+                original_config=base_config,
+                optimized_config=base_config,
+                performance_improvement=0,
+                confidence_score=0,
+                recommendations=[f"❌ Errore ottimizzazione: {str(e)}"]
+            )
+    
     def generate_optimization_recommendations(self, strategy_name: str,
                                             original_config: Dict[str, Any],
                                             optimized_config: Dict[str, Any],
@@ -447,20 +558,30 @@ class StrategyOptimizer:
         self.print_header("AVVIO OTTIMIZZAZIONE STRATEGIE")
         
         try:
-            # 1. Carica dati di performance
-            self.logger.info("📊 Caricamento dati di performance...")
-            performance_data = self.load_performance_data()
-            
-            if not performance_data:
-                self.logger.warning("⚠️ Nessun dato di performance trovato")
-                return
+            # 1. Carica dati di mercato (backtest) o, in mancanza, dati di performance
+            self.logger.info("📊 Caricamento dati di mercato...")
+            market_arrays = await self.load_market_arrays()
+            performance_data = {}
+            
+            if market_arrays is None:
+                self.logger.info("📊 Caricamento dati di performance...")
+                performance_data = self.load_performance_data()
+                
+                if not performance_data:
+                    self.logger.warning("⚠️ Nessun dato di performance trovato")
+                    return
             
             # 2. Ottimizza ogni strategia
             optimization_results = []
             
             for strategy_name in self.strategy_configs.keys():
                 self.logger.info(f"🔧 Ottimizzazione {strategy_name}...")
-                result = self.optimize_strategy(strategy_name, performance_data)
+                if market_arrays is not None:
+                    result = await asyncio.to_thread(
+                        self.optimize_strategy_walk_forward, strategy_name, market_arrays
+                    )
+                else:
+                    result = self.optimize_strategy(strategy_name, performance_data)
                 optimization_results.append(result)
                 
                 # Applica ottimizzazione se miglioramento significativo
@@ -48,7 +48,8 @@ class SystemCapacityAnalyzer:
                     trading_processes.append({
                         'pid': proc.info['pid'],
                         'name': self.extract_bot_name(cmdline),
-                        'memory_mb': round(proc.info['memory_info'].rss / (1024**2), 2),
+                        'memory_mb': round(self.get_proportional_memory(proc) / (1024**2), 2),
+                        'rss_mb': round(proc.info['memory_info'].rss / (1024**2), 2),
                         'cpu_percent': cpu_percent,
                         'cmdline': cmdline
                     })
@@ -58,6 +59,16 @@ class SystemCapacityAnalyzer:
         
         return trading_processes
     
+    def get_proportional_memory(self, proc):
+        """
+        Memoria del processo con le pagine condivise divise tra chi le usa (PSS).
+        L'RSS conterebbe per intero in ogni bot i modelli mappati da file comuni.
+        """
+        try:
+            return proc.memory_full_info().pss
+        except (AttributeError, psutil.AccessDenied):
+            return proc.info['memory_info'].rss
+    
     def extract_bot_name(self, cmdline):
         """Estrai nome bot da command line"""
         if 'mega_aggressive' in cmdline:
@@ -0,0 +1,63 @@
+import unittest
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from src.automation.monitoring.advanced_monitor import AdvancedMonitor
+
+
+class TestSystemMetricsCollection(unittest.TestCase):
+
+    def setUp(self):
+        """Monitor without config, databases or network: only what metric collection touches."""
+        self.monitor = AdvancedMonitor.__new__(AdvancedMonitor)
+        self.monitor.is_running = True
+        self.monitor.intervals = {'loop_lag': 0.05}
+        self.monitor.loop_lag = {'last_ms': 0.0, 'max_ms': 0.0}
+
+        def slow_host():
+            time.sleep(1.0)  # disk_usage on a stalled mount
+            return {'cpu_usage': 12.0, 'memory_usage': 34.0, 'disk_usage': 56.0}
+
+        async def slow_probe():
+            await asyncio.sleep(1.0)
+            return 250.0
+
+        async def api_probe():
+            await asyncio.sleep(0.5)
+            return 0.2
+
+        self.monitor._sample_host = slow_host
+        self.monitor._measure_network_latency = slow_probe
+        self.monitor._measure_api_response_time = api_probe
+
+    def test_collection_does_not_block_the_loop(self):
+        """A 1 s host sample and slow probes leave the loop timers on time."""
+        async def run():
+            lag_task = asyncio.create_task(self.monitor._monitor_loop_lag())
+            await asyncio.sleep(0.2)
+            start = time.perf_counter()
+            metrics = await self.monitor._collect_system_metrics()
+            elapsed = time.perf_counter() - start
+            await asyncio.sleep(0.2)
+            self.monitor.is_running = False
+            await lag_task
+            return metrics, elapsed
+
+        metrics, elapsed = asyncio.run(run())
+
+        self.assertEqual((metrics.cpu_usage, metrics.memory_usage, metrics.disk_usage), (12.0, 34.0, 56.0))
+        self.assertEqual(metrics.network_latency, 250.0)
+        self.assertEqual(metrics.api_response_time, 0.2)
+        # Host sample and probes overlap instead of running one after the other
+        self.assertLess(elapsed, 1.4)
+        self.assertLess(self.monitor.loop_lag['max_ms'], 100.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
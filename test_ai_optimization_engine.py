@@ -0,0 +1,142 @@
+import unittest
+import asyncio
+import copy
+import os
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+# The module attaches a FileHandler to logs/ at import time
+(project_root / "logs").mkdir(exist_ok=True)
+
+from ai_optimization_engine import AIOptimizationEngine, EnsembleAIPredictor
+
+
+class TestOnlineEnsemble(unittest.TestCase):
+
+    def setUp(self):
+        """Synthetic features whose next close depends on the current ones"""
+        warnings.simplefilter("ignore")
+        rng = np.random.default_rng(1)
+        n = 400
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        self.features = pd.DataFrame({
+            "close": close,
+            "momentum": rng.normal(0, 1, n),
+            "volume": rng.uniform(100, 1000, n),
+            "rsi": rng.uniform(20, 80, n),
+        }, index=pd.date_range("2025-01-01", periods=n, freq="h"))
+        self.target = self.features["close"] * (1 + 0.002 * self.features["momentum"])
+        self.predictor = EnsembleAIPredictor(online=True, window_size=300, refit_every=10_000)
+        self.predictor.train_ensemble(self.features.iloc[:300], self.target.iloc[:300])
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_update_online_is_one_partial_fit_step(self):
+        """update_online equals partial_fit of the shared scaler and of every model on the new bars"""
+        expected = copy.deepcopy(self.predictor)
+        rows, target = self.features.iloc[300:310], self.target.iloc[300:310]
+
+        result = self.predictor.update_online(rows, target)
+
+        X = rows.reindex(columns=expected.feature_columns)
+        y = (target / X["close"] - 1).to_numpy()
+        scaler = next(iter(expected.scalers.values()))
+        scaler.partial_fit(X)
+        for model in expected.models.values():
+            model.partial_fit(scaler.transform(X), y)
+
+        self.assertEqual(result["samples"], 10)
+        self.assertEqual(result["window_size"], 300)
+        self.assertFalse(result["refitted"])
+        np.testing.assert_allclose(self.predictor.models["sgd"].coef_, expected.models["sgd"].coef_)
+        np.testing.assert_allclose(self.predictor.models["neural_network"].coefs_[0],
+                                   expected.models["neural_network"].coefs_[0])
+        self.assertAlmostEqual(sum(result["model_weights"].values()), 1.0)
+        np.testing.assert_array_equal(self.predictor._window_X[-1], X.to_numpy()[-1])
+
+    def test_refit_window_after_reload(self):
+        """A saved ensemble keeps its sliding window and training time, so refit_window still works"""
+        path = Path(self.tmp.name) / "ensemble.joblib"
+        self.predictor.save_ensemble(str(path))
+
+        loaded = EnsembleAIPredictor(online=True, window_size=300, refit_every=10_000)
+        loaded.load_ensemble(str(path))
+        self.assertEqual(loaded.last_full_training, self.predictor.last_full_training)
+        self.assertEqual(len(loaded._window_y), 300)
+
+        reference = copy.deepcopy(self.predictor)
+        reference.refit_window(epochs=2)
+        loaded.refit_window(epochs=2)
+        np.testing.assert_allclose(loaded.models["sgd"].coef_, reference.models["sgd"].coef_)
+        np.testing.assert_allclose(next(iter(loaded.scalers.values())).mean_,
+                                   next(iter(reference.scalers.values())).mean_)
+        self.assertEqual(loaded.updates_since_refit, 0)
+
+    def test_engine_restores_last_full_training(self):
+        """A restarted engine does not run the full retraining again before it is due"""
+        path = Path(self.tmp.name) / "ensemble.joblib"
+        self.predictor.save_ensemble(str(path))
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+
+        engine = AIOptimizationEngine(online=True, model_path=str(path))
+        self.assertEqual(engine.last_full_training, self.predictor.last_full_training)
+
+
+class TestEngineOnlineUpdates(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+
+        rng = np.random.default_rng(2)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 340)))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        self.market_data = pd.DataFrame({
+            "open": open_,
+            "high": np.maximum(open_, close) * 1.002,
+            "low": np.minimum(open_, close) * 0.998,
+            "close": close,
+            "volume": rng.uniform(100, 1000, len(close)),
+        }, index=pd.date_range("2025-01-01", periods=len(close), freq="h"))
+        self.engine = AIOptimizationEngine(online=True)
+
+    def test_bars_are_learned_once(self):
+        """Calling again with the same frame learns nothing; a new bar is learned exactly once"""
+        result = asyncio.run(self.engine.update_ai_models(self.market_data.iloc[:300], symbol="BTCUSDT"))
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(self.engine.learned_until["BTCUSDT"], self.market_data.index[298])
+
+        predictor = self.engine.ai_predictor
+        result = asyncio.run(self.engine.update_ai_models(self.market_data.iloc[:310], symbol="BTCUSDT"))
+        self.assertEqual(result["status"], "updated")
+        self.assertEqual(result["samples"], 10)
+        window, coef = len(predictor._window_y), predictor.models["sgd"].coef_.copy()
+        updates = predictor.updates_since_refit
+
+        result = asyncio.run(self.engine.update_ai_models(self.market_data.iloc[:310], symbol="BTCUSDT"))
+        self.assertEqual(result, {"status": "up_to_date", "samples": 0})
+        self.assertEqual(len(predictor._window_y), window)
+        self.assertEqual(predictor.updates_since_refit, updates)
+        np.testing.assert_array_equal(predictor.models["sgd"].coef_, coef)
+
+        result = asyncio.run(self.engine.update_ai_models(self.market_data.iloc[300:311], symbol="BTCUSDT"))
+        self.assertEqual(result["samples"], 1)
+        self.assertEqual(self.engine.learned_until["BTCUSDT"], self.market_data.index[309])
+
+
+if __name__ == "__main__":
+    unittest.main()
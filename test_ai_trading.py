@@ -0,0 +1,80 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from utils.ai_trading import AITrading
+from utils.prediction_model import PredictionModel
+from utils.shared_models import compile_model
+
+
+class TestReplayBacktest(unittest.TestCase):
+
+    def setUp(self):
+        """Random walk, a small forest trained on it and a recorded sentiment series."""
+        rng = np.random.default_rng(21)
+        close = 50000 * np.exp(np.cumsum(rng.normal(0, 0.01, 220)))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        spread = np.abs(rng.normal(0, 0.004, len(close))) * close
+        self.df = pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Close": close,
+            "Volume": rng.uniform(100, 1000, len(close)),
+        }, index=pd.date_range("2025-01-01", periods=len(close), freq="h"))
+        # Sentiment recorded every 6 hours; the replay forward-fills it onto the candles
+        self.sentiment = pd.Series(rng.uniform(0, 1, 37), index=self.df.index[::6])
+
+        features = PredictionModel().build_feature_matrix(self.df)
+        target = (self.df["Close"].pct_change().shift(-1).fillna(0) > 0).astype(float).to_numpy()
+        forest = RandomForestRegressor(n_estimators=10, max_depth=5, random_state=0).fit(features, target)
+        self.models = {"random_forest": compile_model(forest)}
+
+        self.ai = AITrading()
+        self.ai.prediction_model.models = self.models
+
+    def test_replay_matches_per_bar_predict(self):
+        """Replay signals equal the live rule applied to predict() on each growing window."""
+        result = asyncio.run(self.ai.backtest_strategy("BTCUSDT", None, None, replay=True,
+                                                       historical_data=self.df, sentiment=self.sentiment))
+
+        batch = PredictionModel()
+        batch.models = self.models
+        incremental = PredictionModel()
+        incremental.models = self.models
+        sentiment = self.sentiment.reindex(self.df.index, method="ffill")
+
+        expected = []
+        for i in range(len(self.df)):
+            prediction = batch.predict(self.df.iloc[:i + 1])
+            streamed = incremental.predict(self.df.iloc[i:i + 1], "BTCUSDT")
+            self.assertAlmostEqual(streamed["prediction"], prediction["prediction"], places=12)
+            if i < 51:
+                continue
+            analysis = {"market_data": {"price": self.df["Close"].iloc[i]},
+                        "sentiment": {"score": sentiment.iloc[i]}}
+            expected.extend(self.ai._build_signals("BTCUSDT", analysis, prediction))
+
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(result["total_trades"], len(expected))
+        for replayed, live in zip(result["signals"], expected):
+            self.assertEqual(replayed["action"], live["action"])
+            self.assertAlmostEqual(replayed["confidence"], live["confidence"], places=12)
+            self.assertAlmostEqual(replayed["price"], live["price"], places=6)
+            self.assertAlmostEqual(replayed["analysis"]["technical_score"], live["analysis"]["technical_score"],
+                                   places=12)
+            self.assertAlmostEqual(replayed["analysis"]["sentiment_score"], live["analysis"]["sentiment_score"],
+                                   places=12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+import asyncio
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from src.automation.monitoring.alert_pipeline import AlertPipeline, TokenBucket
+
+
+class TestAlertPipeline(unittest.TestCase):
+
+    def run_pipeline(self, scenario, **kwargs):
+        sent = []
+
+        async def send(notification):
+            sent.append(notification)
+
+        async def main():
+            running = True
+            pipeline = AlertPipeline({'chat': send}, **kwargs)
+            worker = asyncio.create_task(pipeline.run(is_running=lambda: running))
+            await scenario(pipeline)
+            running = False
+            await worker
+            return pipeline
+
+        pipeline = asyncio.run(main())
+        return pipeline, sent
+
+    def test_repeats_are_aggregated_into_one_summary(self):
+        """Un allarme che oscilla produce il primo invio e un solo riepilogo per finestra."""
+        async def flapping(pipeline):
+            for i in range(50):
+                pipeline.submit('system:warning:High CPU', 'warning', 'High CPU', f"CPU {80 + i % 3}%")
+            pipeline.submit('system:critical:High CPU', 'critical', 'High CPU', 'CPU 99%')
+            await asyncio.sleep(0.6)
+
+        _, sent = self.run_pipeline(flapping, window=0.2)
+        titles = sorted(n.title for n in sent)
+        self.assertEqual(len(sent), 3)
+        self.assertIn('High CPU (repeated 49x in 0.2s)', titles)
+        summary = next(n for n in sent if n.count == 49)
+        self.assertEqual(summary.message, 'CPU 81%')
+
+    def test_rate_limited_channel_sends_digest(self):
+        async def storm(pipeline):
+            for i in range(20):
+                pipeline.submit(f"api:error:check {i}", 'error' if i else 'critical', f"check {i}", 'down')
+            await asyncio.sleep(0.8)
+
+        # Un token disponibile, poi uno ogni 0.5s: il primo invio è immediato, il resto in un digest
+        _, sent = self.run_pipeline(storm, window=60, rate_limits={'chat': (2.0, 1)})
+        self.assertEqual(len(sent), 2)
+        self.assertEqual(sent[0].title, 'check 0')
+        self.assertEqual(sent[1].title, '19 alerts')
+        self.assertEqual(sent[1].level, 'error')
+
+    def test_queue_is_bounded(self):
+        async def overflow(pipeline):
+            for i in range(10):
+                pipeline.submit(f"fp{i}", 'info', f"alert {i}", '')
+            self.assertEqual(pipeline.queues['chat'].qsize(), 3)
+
+        self.run_pipeline(overflow, queue_size=3)
+
+    def test_token_bucket_reserves_on_credit(self):
+        bucket = TokenBucket(rate=1.0, capacity=2)
+        self.assertEqual(bucket.reserve(now=bucket.updated), 0.0)
+        self.assertEqual(bucket.reserve(now=bucket.updated), 0.0)
+        self.assertAlmostEqual(bucket.reserve(now=bucket.updated), 1.0)
+        self.assertAlmostEqual(bucket.reserve(now=bucket.updated + 1.0), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
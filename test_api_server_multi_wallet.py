@@ -0,0 +1,82 @@
+import unittest
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+import api_server_multi_wallet as server
+
+
+class TestWalletStateCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, self.cwd)
+        self.addCleanup(self.tmp.cleanup)
+        # Cache nuova per ogni test: i path dei wallet sono relativi alla directory corrente
+        patcher = mock.patch.object(server, 'STATE_CACHE', server.WalletStateCache(server.WALLETS))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = server.app.test_client()
+
+    def write_state(self, wallet_index, capital, mtime):
+        path = Path(server.WALLETS[wallet_index]['state_file'])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            'capital': capital, 'initial_capital': 100, 'total_trades': 2, 'winning_trades': 1,
+            'trades_history': [{'timestamp': f'2025-01-0{wallet_index + 1}', 'pnl': 1.0}]
+        }))
+        os.utime(path, (mtime, mtime))
+
+    def test_reloads_only_changed_files(self):
+        self.write_state(0, 110, 1_700_000_000)
+        self.write_state(1, 90, 1_700_000_000)
+        with mock.patch.object(server, 'load_wallet_state', wraps=server.load_wallet_state) as load:
+            for _ in range(5):
+                summary = self.client.get('/api/summary').get_json()
+                self.client.get('/api/wallets')
+                self.client.get('/api/trades')
+            self.assertEqual(load.call_count, 2)
+            self.assertEqual(summary['total_capital'], 200)
+            self.assertEqual(summary['active_wallets'], 2)
+
+            self.write_state(0, 130, 1_700_000_100)
+            summary = self.client.get('/api/summary').get_json()
+            self.assertEqual(load.call_count, 3)
+            self.assertEqual(summary['total_capital'], 220)
+
+        trades = self.client.get('/api/trades').get_json()
+        self.assertEqual([t['wallet_id'] for t in trades], ['wallet_500', 'wallet_100'])
+        wallets = {w['id']: w for w in self.client.get('/api/wallets').get_json()}
+        self.assertAlmostEqual(wallets['wallet_100']['roi'], 30.0)
+        self.assertEqual(wallets['wallet_1000']['status'], 'inactive')
+
+    def test_conditional_get(self):
+        self.write_state(0, 110, 1_700_000_000)
+        first = self.client.get('/api/wallet/wallet_100')
+        self.assertEqual(first.status_code, 200)
+        self.assertIsNotNone(first.last_modified)
+
+        etag = first.headers['ETag']
+        self.assertEqual(self.client.get('/api/wallet/wallet_100', headers={'If-None-Match': etag}).status_code, 304)
+        # Un altro wallet cambia: la vista di wallet_100 resta valida
+        self.write_state(1, 90, 1_700_000_100)
+        self.assertEqual(self.client.get('/api/wallet/wallet_100', headers={'If-None-Match': etag}).status_code, 304)
+
+        self.write_state(0, 120, 1_700_000_200)
+        changed = self.client.get('/api/wallet/wallet_100', headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.get_json()['capital'], 120)
+        self.assertEqual(self.client.get('/api/wallet/wallet_5000').status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
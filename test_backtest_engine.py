@@ -0,0 +1,209 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from utils.backtest_engine import BacktestEngine, compute_indicator_arrays
+from utils.backtest_cache import BacktestCache
+from utils.parameter_sweep import ParameterSweep
+from utils.walk_forward_optimizer import WalkForwardOptimizer
+
+
+def reference_backtest(arrays, config, warmup=50, min_confidence=0.6, initial_balance=10000):
+    """Scalar bar-by-bar loop with the original simulate_trading semantics."""
+    close, rsi, sma_20, sma_50 = arrays['close'], arrays['rsi'], arrays['sma_20'], arrays['sma_50']
+    balance = initial_balance
+    position = None
+    trades = []
+
+    for i in range(warmup, len(close)):
+        price = close[i]
+        if position:
+            if position['type'] == 'long':
+                hit_stop = price <= position['stop_loss']
+                hit_target = price >= position['profit_target']
+                pnl = (price - position['entry_price']) / position['entry_price']
+            else:
+                hit_stop = price >= position['stop_loss']
+                hit_target = price <= position['profit_target']
+                pnl = (position['entry_price'] - price) / position['entry_price']
+            if hit_stop or hit_target:
+                trades.append((position['entry_idx'], i, pnl))
+                balance *= (1 + pnl)
+                position = None
+
+        if position:
+            continue
+
+        trend_bullish = sma_20[i] > sma_50[i]
+        trend_strength = abs(sma_20[i] - sma_50[i]) / price if price > 0 else 0
+        action, confidence = None, 0
+        if config['type'] == 'swing':
+            if trend_bullish and rsi[i] < 40 and trend_strength >= config['min_trend_strength']:
+                action, confidence = 'buy', min(0.9, 0.5 + trend_strength)
+            elif not trend_bullish and rsi[i] > 60 and trend_strength >= config['min_trend_strength']:
+                action, confidence = 'sell', min(0.9, 0.5 + trend_strength)
+        elif rsi[i] < 30:
+            action, confidence = 'buy', 0.7
+        elif rsi[i] > 70:
+            action, confidence = 'sell', 0.7
+
+        if action and confidence >= min_confidence:
+            if action == 'buy':
+                position = {'type': 'long', 'entry_idx': i, 'entry_price': price,
+                            'stop_loss': price * (1 - config['stop_loss']),
+                            'profit_target': price * (1 + config['profit_target'])}
+            else:
+                position = {'type': 'short', 'entry_idx': i, 'entry_price': price,
+                            'stop_loss': price * (1 + config['stop_loss']),
+                            'profit_target': price * (1 - config['profit_target'])}
+
+    return trades, balance
+
+
+class TestBacktestEngine(unittest.TestCase):
+
+    def setUp(self):
+        """Build deterministic random-walk price series."""
+        self.engine = BacktestEngine()
+        self.frames = []
+        for seed, vol in [(0, 0.006), (1, 0.04)]:
+            rng = np.random.default_rng(seed)
+            close = 50000 * np.exp(np.cumsum(rng.normal(0, vol, 2000)))
+            index = pd.date_range("2025-01-01", periods=len(close), freq="h")
+            self.frames.append(pd.DataFrame({"Close": close}, index=index))
+
+        self.configs = [
+            {"type": "swing", "profit_target": 0.03, "stop_loss": 0.02, "min_trend_strength": 0.1},
+            {"type": "scalping", "profit_target": 0.005, "stop_loss": 0.003, "min_trend_strength": 0.3},
+            {"type": "scalping", "profit_target": 0.02, "stop_loss": 0.015, "min_trend_strength": 0.6},
+        ]
+
+    def test_matches_reference_loop(self):
+        """Trades and final balance match the bar-by-bar loop exactly."""
+        for df in self.frames:
+            arrays = compute_indicator_arrays(df)
+            for config in self.configs:
+                expected_trades, expected_balance = reference_backtest(arrays, config)
+                result = self.engine.run_arrays(arrays, config)
+
+                self.assertEqual(result["total_trades"], len(expected_trades))
+                self.assertEqual(result["final_balance"], expected_balance)
+                self.assertEqual(
+                    list(zip(result["entry_idx"].tolist(), result["exit_idx"].tolist(), result["pnl"].tolist())),
+                    expected_trades,
+                )
+
+    def test_run_returns_simulator_format(self):
+        """run() returns the dict layout used by the strategy simulator."""
+        result = self.engine.run(self.frames[1], self.configs[1], "1h")
+        for key in ("timeframe", "total_trades", "win_rate", "total_pnl", "final_balance", "trades"):
+            self.assertIn(key, result)
+        self.assertEqual(len(result["trades"]), result["total_trades"])
+        if result["trades"]:
+            self.assertIn(result["trades"][0]["exit_reason"], ("stop_loss", "profit_target"))
+
+    def test_unknown_strategy_type(self):
+        """Unsupported strategy types raise ValueError."""
+        arrays = compute_indicator_arrays(self.frames[0])
+        with self.assertRaises(ValueError):
+            self.engine.run_arrays(arrays, {"type": "grid", "profit_target": 0.01, "stop_loss": 0.01})
+
+    def test_cached_sweep_matches_fresh_run(self):
+        """A second sweep is served from the cache with identical results."""
+        arrays = compute_indicator_arrays(self.frames[1])
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = BacktestCache(cache_dir)
+            fresh = ParameterSweep({"1h": arrays}, processes=1, cache=cache).run(self.configs, include_trades=True)
+            # Equivalent configs (float noise, descriptive keys) hash to the same entry
+            configs = [dict(c, profit_target=c["profit_target"] * 1.0000000000001, description="x")
+                       for c in self.configs]
+            cached = ParameterSweep({"1h": arrays}, processes=1, cache=cache).run(configs, include_trades=True)
+
+        self.assertTrue(all(r.get("cached") for r in cached))
+        for a, b in zip(fresh, cached):
+            self.assertEqual(a["final_balance"], b["final_balance"])
+            np.testing.assert_array_equal(a["trades"]["pnl"], b["trades"]["pnl"])
+
+    def test_parallel_sweep_matches_serial_run(self):
+        """Records from the process pool (shared memory data) equal a serial run, task by task."""
+        datasets = {f"ds{i}": compute_indicator_arrays(df) for i, df in enumerate(self.frames)}
+        configs = [dict(c, stop_loss=c["stop_loss"] * scale) for c in self.configs for scale in (0.5, 1.0, 2.0)]
+        tasks = []
+        for dataset in datasets:
+            for config in configs:
+                for window in (None, (0, 1000), (500, 2000)):
+                    tasks.append((len(tasks), dataset, config, window))
+
+        serial = ParameterSweep(datasets, processes=1).run_tasks(tasks, include_trades=True)
+        parallel = ParameterSweep(datasets, processes=2, chunk_size=5).run_tasks(tasks, include_trades=True)
+
+        self.assertEqual([r["task_id"] for r in parallel], list(range(len(tasks))))
+        for a, b in zip(serial, parallel):
+            self.assertIsNone(b["error"])
+            self.assertEqual((a["dataset"], a["window"]), (b["dataset"], b["window"]))
+            for key in ("total_trades", "final_balance", "win_rate", "total_pnl"):
+                self.assertEqual(a[key], b[key])
+            for key, values in a["trades"].items():
+                np.testing.assert_array_equal(values, b["trades"][key])
+
+        # run() numbers configs the same way in both modes
+        by_config = ParameterSweep(datasets, processes=2).run(configs)
+        self.assertEqual([(r["config_id"], r["dataset"]) for r in by_config],
+                         [(c, d) for c in range(len(configs)) for d in datasets])
+
+
+class TestWalkForwardOptimizer(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        close = 50000 * np.exp(np.cumsum(rng.normal(0, 0.02, 3000)))
+        self.df = pd.DataFrame({"Close": close}, index=pd.date_range("2025-01-01", periods=len(close), freq="h"))
+        self.config = {"type": "scalping", "profit_target": 0.01, "stop_loss": 0.01, "min_trend_strength": 0.3}
+
+    def with_future(self, start):
+        """Same series up to start, an unrelated random walk afterwards"""
+        df = self.df.copy()
+        rng = np.random.default_rng(99)
+        df.iloc[start:, 0] = df["Close"].iloc[start - 1] * np.exp(np.cumsum(rng.normal(0.01, 0.05, len(df) - start)))
+        return df
+
+    def test_windows_are_ordered_and_disjoint(self):
+        windows = WalkForwardOptimizer.build_windows(3000, 6, 0.7, warmup=50)
+        self.assertEqual(len(windows), 6)
+        for (train_start, train_end), (test_start, test_end) in windows:
+            self.assertGreaterEqual(train_start, 50)
+            self.assertEqual(train_end, test_start)
+            self.assertLess(train_start, train_end)
+            self.assertLess(test_start, test_end)
+            self.assertLessEqual(test_end, 3000)
+
+    def test_scores_do_not_see_future_bars(self):
+        """Changing every bar after a window's test range (or after its train range) leaves its scores intact."""
+        arrays = compute_indicator_arrays(self.df)
+        optimizer = WalkForwardOptimizer(arrays, n_windows=6, min_trades=0, processes=1)
+        scores, _ = optimizer._evaluate([self.config], [0], list(range(len(optimizer.windows))))
+        self.assertTrue(any(train != 0 for train, _ in scores.values()))
+
+        for w, ((_, train_end), (_, test_end)) in enumerate(optimizer.windows):
+            if test_end < len(self.df):
+                future = WalkForwardOptimizer(compute_indicator_arrays(self.with_future(test_end)),
+                                              n_windows=6, min_trades=0, processes=1)
+                self.assertEqual(future._evaluate([self.config], [0], [w])[0][(0, w)], scores[(0, w)])
+
+            changed_test = WalkForwardOptimizer(compute_indicator_arrays(self.with_future(train_end)),
+                                                n_windows=6, min_trades=0, processes=1)
+            train, test = changed_test._evaluate([self.config], [0], [w])[0][(0, w)]
+            self.assertEqual(train, scores[(0, w)][0])
+            self.assertNotEqual(test, scores[(0, w)][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from utils.correlation_engine import CorrelationEngine
+
+
+class TestCorrelationEngine(unittest.TestCase):
+
+    def setUp(self):
+        """Four correlated random walks"""
+        rng = np.random.default_rng(3)
+        mixing = np.array([[1.0, 0.6, 0.0, 0.2], [0.0, 1.0, 0.4, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]])
+        self.closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (600, 4)) @ mixing, axis=0))
+        self.symbols = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'ADAUSDT']
+
+    def test_incremental_update_matches_batch_fit(self):
+        """Fit on the first bars plus one update per bar equals the batch EW fit on all bars"""
+        batch = CorrelationEngine(self.symbols, halflife=24).fit(self.closes)
+        incremental = CorrelationEngine(self.symbols, halflife=24).fit(self.closes[:200])
+        for row in self.closes[200:]:
+            incremental.update(row)
+
+        self.assertEqual(incremental.n_observations, batch.n_observations)
+        np.testing.assert_allclose(incremental.mean, batch.mean, atol=1e-9)
+        np.testing.assert_allclose(incremental.covariance, batch.covariance, rtol=1e-6, atol=1e-12)
+        np.testing.assert_allclose(incremental.correlation, batch.correlation, atol=1e-6)
+
+    def test_missing_price_is_masked(self):
+        """A symbol without a price keeps its state; its next return spans the gap"""
+        engine = CorrelationEngine(self.symbols, halflife=24).fit(self.closes[:300])
+        pair = CorrelationEngine(self.symbols[:2], halflife=24).fit(self.closes[:300, :2])
+        variance, mean = engine.covariance[3, 3], engine.mean[3]
+
+        row = self.closes[300].copy()
+        row[3] = np.nan
+        engine.update(row)
+        pair.update(self.closes[300, :2])
+
+        self.assertEqual(engine.covariance[3, 3], variance)
+        self.assertEqual(engine.mean[3], mean)
+        self.assertEqual(engine.last_prices[3], self.closes[299, 3])
+        np.testing.assert_allclose(engine.covariance[:2, :2], pair.covariance, atol=1e-15)
+
+        engine.update(self.closes[301])
+        expected = np.log(self.closes[301, 3] / self.closes[299, 3])
+        self.assertAlmostEqual(engine.mean[3], mean + engine.alpha * (expected - mean), places=12)
+
+
+class TestMultiPairScalerCorrelations(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, self.cwd)
+        self.addCleanup(self.tmp.cleanup)
+
+        from multi_pair_scaler import MultiPairScaler
+        rng = np.random.default_rng(5)
+        index = pd.date_range('2025-01-01', periods=400, freq='h')
+        self.history = {
+            symbol: pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))}, index=index)
+            for symbol in ('BTCUSDT', 'ETHUSDT', 'SOLUSDT')
+        }
+        self.scaler = MultiPairScaler()
+
+    def test_new_bars_update_engine_incrementally(self):
+        self.scaler.price_history = {s: df.iloc[:300] for s, df in self.history.items()}
+        self.scaler.correlation_matrix = self.scaler.calculate_correlation_matrix()
+
+        # Next cycle: SOLUSDT misses one candle, the others do not
+        self.scaler.price_history = {s: df.iloc[:350] for s, df in self.history.items()}
+        self.scaler.price_history['SOLUSDT'] = self.history['SOLUSDT'].iloc[:350].drop(self.history['SOLUSDT'].index[320])
+        self.scaler.apply_new_bars()
+
+        reference = CorrelationEngine(['BTCUSDT', 'ETHUSDT', 'SOLUSDT'], halflife=48).fit(
+            np.column_stack([self.history[s]['Close'].to_numpy()[:300] for s in ('BTCUSDT', 'ETHUSDT', 'SOLUSDT')]))
+        for i in range(300, 350):
+            row = np.array([self.history[s]['Close'].iloc[i] for s in ('BTCUSDT', 'ETHUSDT', 'SOLUSDT')])
+            if i == 320:
+                row[2] = np.nan
+            reference.update(row)
+
+        engine = self.scaler.correlation_engine
+        self.assertEqual(self.scaler.correlation_last_bar, self.history['BTCUSDT'].index[349])
+        self.assertEqual(engine.n_observations, 349)
+        np.testing.assert_allclose(engine.covariance, reference.covariance, atol=1e-15)
+        self.assertAlmostEqual(self.scaler.correlation_matrix['BTCUSDT']['SOLUSDT'],
+                               reference.get('BTCUSDT', 'SOLUSDT'), places=12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from utils.data_preprocessor_v2 import EnterpriseDataPreprocessor
+
+
+class TestStreamingCleaning(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 600
+        self.data = pd.DataFrame({
+            'Close': 50000 * np.exp(np.cumsum(rng.normal(0, 0.002, n))),
+            'Volume': rng.uniform(100, 1000, n),
+        }, index=pd.date_range('2025-01-01', periods=n, freq='h'))
+
+    def test_only_new_rows_are_processed(self):
+        """Passing the whole window each cycle returns just the rows not seen before."""
+        preprocessor = EnterpriseDataPreprocessor(window=200)
+        first = preprocessor.clean_stream(self.data.iloc[:300])
+        self.assertEqual(len(first), 300)
+
+        for end in range(301, 311):
+            new_rows = preprocessor.clean_stream(self.data.iloc[end - 100:end])
+            self.assertEqual(list(new_rows.index), [self.data.index[end - 1]])
+        self.assertTrue(preprocessor.clean_stream(self.data.iloc[:310]).empty)
+
+    def test_spike_and_invalid_rows_are_dropped(self):
+        data = self.data.copy()
+        data.iloc[400, 0] *= 3
+        data.iloc[450, 1] = np.inf
+        data.iloc[460, 0] = np.nan
+
+        preprocessor = EnterpriseDataPreprocessor(window=200)
+        preprocessor.clean_stream(data.iloc[:300])
+        kept = [preprocessor.clean_stream(data.iloc[:end]) for end in range(301, len(data) + 1)]
+        kept_index = pd.concat(kept).index
+
+        self.assertEqual(len(kept_index), len(data) - 300 - 3)
+        for position in (400, 450, 460):
+            self.assertNotIn(data.index[position], kept_index)
+
+    def test_trending_prices_keep_every_row(self):
+        """A strong trend moves the price far from the window median but its returns stay normal."""
+        rng = np.random.default_rng(1)
+        n = 1000
+        close = 100 * np.exp(np.cumsum(rng.normal(0.004, 0.002, n)))
+        data = pd.DataFrame({
+            'Open': np.concatenate(([close[0]], close[:-1])),
+            'Close': close,
+            'Volume': rng.uniform(100, 1000, n),
+        }, index=pd.date_range('2025-01-01', periods=n, freq='h'))
+        spiked = data.copy()
+        spiked.iloc[700, 1] *= 1.5
+
+        for frame, dropped in ((data, []), (spiked, [700])):
+            preprocessor = EnterpriseDataPreprocessor(window=200)
+            first = preprocessor.clean_stream(frame.iloc[:300])
+            kept = [preprocessor.clean_stream(frame.iloc[end - 50:end]) for end in range(301, n + 1)]
+            kept_index = first.index.append(pd.concat(kept).index)
+            self.assertEqual(list(kept_index), [ts for i, ts in enumerate(frame.index) if i not in dropped])
+
+    def test_missing_column_registers_the_stream_again(self):
+        """A frame without a tracked column restarts the stream on the columns it has."""
+        preprocessor = EnterpriseDataPreprocessor(window=200)
+        preprocessor.clean_stream(self.data.iloc[:300])
+
+        new_rows = preprocessor.clean_stream(self.data[['Close']].iloc[300:320])
+        self.assertEqual(list(new_rows.index), list(self.data.index[300:320]))
+        self.assertEqual(preprocessor.streams['default']['columns'], ('Close',))
+        self.assertEqual(len(preprocessor.clean_stream(self.data[['Close']].iloc[300:321])), 1)
+
+
+class TestBatchCleaning(unittest.TestCase):
+
+    def frame(self, rng, low, high, n=500):
+        close = np.linspace(low, high, n) * np.exp(rng.normal(0, 0.002, n))
+        return pd.DataFrame({'Close': close, 'Volume': rng.uniform(100, 1000, n)})
+
+    def test_shifted_price_levels_keep_rows(self):
+        """A later batch on a new price level refits the detector instead of dropping every row."""
+        rng = np.random.default_rng(4)
+        preprocessor = EnterpriseDataPreprocessor()
+        first = preprocessor.clean_data(self.frame(rng, 49_000, 62_000))
+        second = preprocessor.clean_data(self.frame(rng, 95_000, 112_000))
+
+        self.assertGreaterEqual(len(first), 400)
+        self.assertGreaterEqual(len(second), 400)
+
+    def test_same_distribution_reuses_the_detector(self):
+        rng = np.random.default_rng(5)
+        preprocessor = EnterpriseDataPreprocessor()
+        preprocessor.clean_data(self.frame(rng, 49_000, 62_000))
+        fitted = preprocessor.outlier_detector.estimators_[0]
+
+        self.assertGreaterEqual(len(preprocessor.clean_data(self.frame(rng, 49_000, 62_000))), 400)
+        self.assertIs(preprocessor.outlier_detector.estimators_[0], fitted)
+
+
+if __name__ == "__main__":
+    unittest.main()
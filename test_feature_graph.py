@@ -0,0 +1,147 @@
+import unittest
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from utils.feature_graph import FeatureGraph, FeatureMemo
+
+# The engine module attaches a FileHandler to logs/ at import time
+(project_root / "logs").mkdir(exist_ok=True)
+from ai_optimization_engine import AdvancedFeatureEngineer
+
+# Output columns of the pipeline before the graph rewrite (with ema_12/ema_26 kept as intermediates)
+EXPECTED_COLUMNS = [
+    'timestamp', 'open', 'high', 'low', 'close', 'volume',
+    'sma_5', 'sma_10', 'sma_20', 'sma_50', 'sma_100', 'ema_5', 'ema_10', 'ema_20', 'ema_50',
+    'rsi_7', 'rsi_14', 'rsi_21', 'macd_12_26', 'macd_signal', 'macd_histogram',
+    'bb_upper_10', 'bb_lower_10', 'bb_width_10', 'bb_position_10',
+    'bb_upper_20', 'bb_lower_20', 'bb_width_20', 'bb_position_20',
+    'bb_upper_50', 'bb_lower_50', 'bb_width_50', 'bb_position_50',
+    'stoch_k', 'stoch_d', 'williams_r', 'cci',
+    'price_change_1', 'price_change_abs_1', 'price_change_3', 'price_change_abs_3',
+    'price_change_5', 'price_change_abs_5', 'price_change_10', 'price_change_abs_10',
+    'price_change_20', 'price_change_abs_20', 'momentum_10', 'momentum_20',
+    'roc_5', 'roc_10', 'roc_20', 'acceleration', 'velocity',
+    'tr', 'atr_7', 'atr_14', 'atr_21', 'volatility_5', 'volatility_ratio_5', 'volatility_10',
+    'volatility_ratio_10', 'volatility_20', 'volatility_ratio_20', 'volatility_50', 'volatility_ratio_50',
+    'intraday_volatility', 'gap', 'gap_abs',
+    'volume_sma_5', 'volume_ratio_5', 'volume_sma_10', 'volume_ratio_10', 'volume_sma_20', 'volume_ratio_20',
+    'volume_sma_50', 'volume_ratio_50', 'vpt', 'obv', 'volume_roc_5', 'volume_roc_10', 'money_flow', 'mfi',
+    'body_size', 'upper_shadow', 'lower_shadow', 'is_doji', 'is_hammer', 'bullish_engulfing',
+    'local_high', 'local_low', 'fear_greed', 'bullish_sentiment', 'bearish_sentiment', 'trend_strength',
+    'hour', 'day_of_week', 'day_of_month', 'month', 'hour_sin', 'hour_cos', 'day_sin', 'day_cos',
+    'sequence_id', 'sequence_normalized', 'price_volume_corr', 'hl_volume_corr',
+    'sma_5_20_ratio', 'sma_20_50_ratio',
+]
+
+# Values of the old pipeline at rows 60, 150 and 299 of the seeded candles below
+EXPECTED_VALUES = {
+    'rsi_14': [43.31278433372245, 59.07580288431177, 33.06829059292173],
+    'macd_12_26': [0.37912789971808536, -0.3282067337754313, -0.43065011143248455],
+    'macd_signal': [0.6287324666405198, -0.32326799973172937, -0.07004830667315848],
+    'bb_upper_20': [105.47303208050238, 95.77463123392162, 93.14018725139987],
+    'bb_lower_20': [101.46873463375209, 89.40575474628135, 88.23854512837615],
+    'bb_position_20': [0.19745535676905024, 0.4929728042634379, 0.03404818594692374],
+    'cci': [-56.46954951250627, -0.4555212792138649, -186.6938534477677],
+    'stoch_k': [1.6440937743781894, 41.18423675775527, 17.24795279179068],
+}
+
+
+class TestFeatureGraph(unittest.TestCase):
+
+    def setUp(self):
+        """Small graph with one shared intermediate and call counting."""
+        self.calls = {}
+
+        def counted(name, func):
+            def wrapper(*args):
+                self.calls[name] = self.calls.get(name, 0) + 1
+                return func(*args)
+            return wrapper
+
+        self.graph = FeatureGraph(['close', 'volume', 'timestamp'])
+        self.graph.add('returns', ['close'], counted('returns', lambda close: close.pct_change()), output=False)
+        self.graph.add('momentum', ['returns'], counted('momentum', lambda r: r.rolling(3, min_periods=1).mean()))
+        self.graph.add('abs_returns', ['returns'], counted('abs_returns', lambda r: r.abs()))
+        self.graph.add('volume_ma', ['volume'], counted('volume_ma', lambda v: v.rolling(3, min_periods=1).mean()))
+        self.graph.add('hour', ['timestamp'], counted('hour', lambda ts: pd.to_datetime(ts).dt.hour))
+
+        self.data = pd.DataFrame({
+            'close': np.linspace(100, 110, 20),
+            'volume': np.arange(20, dtype=float),
+        })
+
+    def test_shared_intermediate_computed_once(self):
+        """Both consumers of returns reuse a single computation."""
+        result = self.graph.compute(self.data)
+        self.assertEqual(self.calls['returns'], 1)
+        self.assertEqual(list(result), ['momentum', 'abs_returns', 'volume_ma'])
+
+    def test_only_requested_features_are_computed(self):
+        """Requesting one feature skips unrelated nodes."""
+        result = self.graph.compute(self.data, ['abs_returns'])
+        self.assertEqual(list(result), ['abs_returns'])
+        self.assertNotIn('volume_ma', self.calls)
+        self.assertNotIn('momentum', self.calls)
+
+    def test_unknown_input_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.graph.add('broken', ['missing'], lambda x: x)
+
+    def test_memo_key_changes_with_open_candle(self):
+        """An update to the last bar invalidates the memoised entry."""
+        memo = FeatureMemo(maxsize=2)
+        key = FeatureMemo.make_key(self.data, 'BTCUSDT', None)
+        memo.put(key, self.data)
+        self.assertIs(memo.get(key), self.data)
+
+        updated = self.data.copy()
+        updated.loc[updated.index[-1], 'close'] += 1
+        self.assertIsNone(memo.get(FeatureMemo.make_key(updated, 'BTCUSDT', None)))
+
+
+class TestAdvancedFeatureEngineer(unittest.TestCase):
+
+    def setUp(self):
+        """Seeded hourly OHLCV candles."""
+        rng = np.random.default_rng(42)
+        n = 300
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        spread = np.abs(rng.normal(0, 0.004, n)) * close
+        self.data = pd.DataFrame({
+            'timestamp': pd.date_range('2025-01-01', periods=n, freq='h'),
+            'open': open_,
+            'high': np.maximum(open_, close) + spread,
+            'low': np.minimum(open_, close) - spread,
+            'close': close,
+            'volume': rng.uniform(100, 1000, n),
+        })
+
+    def test_matches_previous_pipeline(self):
+        """Same columns, in the same order, and the same indicator values as before the rewrite."""
+        features = AdvancedFeatureEngineer().create_advanced_features(self.data)
+        self.assertEqual(list(features.columns), EXPECTED_COLUMNS)
+        numeric = features.drop(columns=['timestamp', 'fear_greed'])
+        self.assertFalse(numeric.isna().any().any())
+        for column, values in EXPECTED_VALUES.items():
+            np.testing.assert_allclose(features[column].iloc[[60, 150, 299]], values, rtol=1e-9, err_msg=column)
+
+    def test_subset_matches_full_run(self):
+        """Requesting a few features gives the values of the full run."""
+        engineer = AdvancedFeatureEngineer()
+        full = engineer.create_advanced_features(self.data)
+        subset = engineer.create_advanced_features(self.data, list(EXPECTED_VALUES))
+        self.assertEqual(list(subset.columns), list(self.data.columns) + list(EXPECTED_VALUES))
+        for column in EXPECTED_VALUES:
+            np.testing.assert_allclose(subset[column], full[column], rtol=1e-12, err_msg=column)
+
+
+if __name__ == "__main__":
+    unittest.main()
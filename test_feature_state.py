@@ -0,0 +1,110 @@
+import unittest
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from utils.prediction_model import PredictionModel
+
+
+class TestFeatureState(unittest.TestCase):
+
+    def setUp(self):
+        """Build a deterministic OHLCV random walk."""
+        rng = np.random.default_rng(7)
+        close = 50000 * np.exp(np.cumsum(rng.normal(0, 0.01, 600)))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        spread = np.abs(rng.normal(0, 0.004, len(close))) * close
+        self.df = pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Close": close,
+            "Volume": rng.uniform(100, 1000, len(close)),
+        }, index=pd.date_range("2025-01-01", periods=len(close), freq="h"))
+        self.model = PredictionModel()
+
+    def test_incremental_matches_feature_matrix(self):
+        """Each incremental vector equals the matching row of build_feature_matrix."""
+        expected = self.model.build_feature_matrix(self.df)
+        for i in range(len(self.df)):
+            vector = self.model.update_features("BTCUSDT", self.df.iloc[i:i + 1])
+            np.testing.assert_allclose(vector[0], expected[i], rtol=1e-9, atol=1e-9)
+
+    def test_overlapping_frames_only_add_new_candles(self):
+        """Feeding overlapping windows processes each candle once."""
+        self.model.update_features("ETHUSDT", self.df.iloc[:300])
+        vector = self.model.update_features("ETHUSDT", self.df.iloc[250:400])
+
+        state = self.model.feature_states["ETHUSDT"]
+        self.assertEqual(state.n_bars, 400)
+        np.testing.assert_allclose(vector[0], self.model.build_feature_matrix(self.df.iloc[:400])[-1],
+                                   rtol=1e-9, atol=1e-9)
+
+    def partial(self, i, fraction):
+        """Candle i while still open: close part-way from the open, lower volume."""
+        row = self.df.iloc[i:i + 1].copy()
+        open_, close = row["Open"].iloc[0], row["Close"].iloc[0]
+        row["Close"] = open_ + (close - open_) * fraction
+        row["High"] = max(open_, row["Close"].iloc[0]) + 1.0
+        row["Low"] = min(open_, row["Close"].iloc[0]) - 1.0
+        row["Volume"] = row["Volume"] * fraction
+        return row
+
+    def test_open_bar_is_replaced_across_overlapping_and_gapped_windows(self):
+        """The still-open last candle is re-applied on every fetch; gaps never replay seen candles."""
+        df = self.df
+        steps = [
+            # (window fed to the state, bars the state must represent afterwards)
+            (pd.concat([df.iloc[:299], self.partial(299, 0.3)]),
+             pd.concat([df.iloc[:299], self.partial(299, 0.3)])),
+            (pd.concat([df.iloc[250:300], self.partial(300, 0.5)]),
+             pd.concat([df.iloc[:300], self.partial(300, 0.5)])),
+            (pd.concat([df.iloc[280:300], self.partial(300, 0.8)]),
+             pd.concat([df.iloc[:300], self.partial(300, 0.8)])),
+            # Gap: candle 300 is no longer in the window and closes with its last seen values
+            (pd.concat([df.iloc[350:419], self.partial(419, 0.4)]),
+             pd.concat([df.iloc[:300], self.partial(300, 0.8), df.iloc[350:419], self.partial(419, 0.4)])),
+            (df.iloc[400:421],
+             pd.concat([df.iloc[:300], self.partial(300, 0.8), df.iloc[350:421]])),
+        ]
+        for window, seen in steps:
+            vector = self.model.update_features("BTCUSDT", window)
+            np.testing.assert_allclose(vector[0], self.model.build_feature_matrix(seen)[-1],
+                                       rtol=1e-9, atol=1e-9)
+            self.assertEqual(self.model.feature_states["BTCUSDT"].n_bars, len(seen))
+
+    def test_candle_without_symbol_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.model._feature_vector({"Close": 50000.0, "Volume": 10.0}, None)
+        self.assertNotIn("default", self.model.feature_states)
+
+    def test_predict_batch_matches_per_symbol_predict(self):
+        """One stacked batch gives the same predictions as one call per symbol."""
+        from sklearn.ensemble import RandomForestRegressor
+
+        features = self.model.build_feature_matrix(self.df)
+        target = self.df["Close"].pct_change().shift(-1).fillna(0).to_numpy()
+        self.model.models = {"rf": RandomForestRegressor(n_estimators=5, random_state=0).fit(features, target)}
+        reference = PredictionModel()
+        reference.models = self.model.models
+
+        windows = {f"SYM{i}": self.df.iloc[i * 10:i * 10 + 300] for i in range(5)}
+        batch = self.model.predict_batch(windows)
+        for symbol, window in windows.items():
+            self.assertAlmostEqual(batch[symbol]["prediction"],
+                                   reference.predict(window, symbol)["prediction"], places=12)
+
+    def test_predict_without_models_returns_neutral(self):
+        """Untrained model returns the neutral prediction without touching state."""
+        result = self.model.predict({"Close": 50000.0, "Volume": 10.0}, "BTCUSDT")
+        self.assertEqual(result, {"prediction": 0.5, "confidence": 0.5})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import sys
+import timeit
+import urllib.request
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from utils.metrics import CONTENT_TYPE, MetricsRegistry, start_http_server
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_buckets_are_cumulative_and_inclusive(self):
+        latency = self.registry.histogram('order_seconds', 'Order latency', ('engine',), buckets=(0.1, 1.0))
+        spot = latency.labels('spot')
+        for value in (0.05, 0.1, 0.5, 2.0):
+            spot.observe(value)
+
+        lines = self.registry.render().splitlines()
+        self.assertIn('# TYPE order_seconds histogram', lines)
+        self.assertIn('order_seconds_bucket{engine="spot",le="0.1"} 2', lines)
+        self.assertIn('order_seconds_bucket{engine="spot",le="1.0"} 3', lines)
+        self.assertIn('order_seconds_bucket{engine="spot",le="+Inf"} 4', lines)
+        self.assertIn('order_seconds_sum{engine="spot"} 2.65', lines)
+        self.assertIn('order_seconds_count{engine="spot"} 4', lines)
+
+    def test_registry_reuses_metrics_and_checks_labels(self):
+        orders = self.registry.counter('orders_total', 'Orders', ('status',))
+        self.assertIs(self.registry.counter('orders_total', 'Orders', ('status',)), orders)
+        with self.assertRaises(ValueError):
+            self.registry.gauge('orders_total', 'Orders')
+        with self.assertRaises(ValueError):
+            orders.labels('filled', 'extra')
+
+        orders.labels('filled').inc()
+        orders.labels('filled').inc(2)
+        gauge = self.registry.gauge('positions', 'Open positions')
+        gauge.set(3)
+        gauge.dec()
+        rendered = self.registry.render()
+        self.assertIn('orders_total{status="filled"} 3.0', rendered)
+        self.assertIn('positions 2.0', rendered)
+
+    def test_observe_is_cheap(self):
+        """Un'osservazione resta sotto il microsecondo anche con margine per macchine lente."""
+        child = self.registry.histogram('hot_seconds', 'Hot path', ('op',)).labels('x')
+        runs = 200_000
+        per_call = min(timeit.repeat(lambda: child.observe(0.003), number=runs, repeat=3)) / runs
+        self.assertLess(per_call, 1e-6)
+
+    def test_http_server_serves_metrics(self):
+        self.registry.counter('served_total', 'Served').inc()
+        server = start_http_server(0, addr='127.0.0.1', registry=self.registry)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                self.assertEqual(response.headers['Content-Type'], CONTENT_TYPE)
+                self.assertIn('served_total 1.0', response.read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from src.automation.monitoring.metrics_store import MetricsStore
+
+
+class TestMetricsStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmp.name) / 'monitor.db')
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('CREATE TABLE system_metrics (timestamp TEXT PRIMARY KEY, cpu_usage REAL, balance REAL)')
+        conn.execute('''CREATE TABLE alerts (id TEXT PRIMARY KEY, timestamp TEXT NOT NULL, level TEXT NOT NULL,
+                        type TEXT NOT NULL, title TEXT NOT NULL, message TEXT NOT NULL, data TEXT,
+                        acknowledged INTEGER DEFAULT 0, resolved INTEGER DEFAULT 0)''')
+        conn.commit()
+        conn.close()
+        self.store = MetricsStore(self.db_path, {'system_metrics': ['cpu_usage', 'balance']},
+                                  retention={'raw': 3600}, raw_interval=30)
+        # Ten hours of 30s samples, starting on an hour boundary
+        self.start = datetime(2026, 1, 1, 0, 0, 0)
+        for i in range(1200):
+            self.store.record('system_metrics', self.start + timedelta(seconds=30 * i),
+                              {'cpu_usage': float(i % 120), 'balance': 50.0})
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_flush_writes_raw_rows_and_rollups(self):
+        self.assertEqual(self.store.flush(), 1200)
+        self.assertEqual(self.store.pending, 0)
+
+        hourly = self.store.query('system_metrics', 'cpu_usage', self.start,
+                                  self.start + timedelta(hours=10), resolution='1h')
+        self.assertEqual(len(hourly['points']), 10)
+        first = hourly['points'][0]
+        self.assertEqual((first['min'], first['max'], first['last'], first['count']), (0.0, 119.0, 119.0, 120))
+        self.assertAlmostEqual(first['avg'], 59.5)
+
+        raw = self.store.query('system_metrics', 'cpu_usage', self.start,
+                               self.start + timedelta(minutes=5), resolution='raw')
+        self.assertEqual(len(raw['points']), 11)
+
+    def test_rollups_merge_across_flushes(self):
+        """A bucket split over two flushes has the same aggregates as one flush."""
+        self.store.flush()
+        self.store.record('system_metrics', self.start + timedelta(seconds=45), {'cpu_usage': 500.0})
+        self.store.flush()
+        minute = self.store.query('system_metrics', 'cpu_usage', self.start,
+                                  self.start + timedelta(seconds=59), resolution='1m')['points'][0]
+        self.assertEqual((minute['min'], minute['max'], minute['count'], minute['last']), (0.0, 500.0, 3, 500.0))
+
+    def test_resolution_follows_range_and_retention(self):
+        now = self.start + timedelta(hours=10)
+        self.assertEqual(self.store.choose_resolution(now - timedelta(minutes=30), now, now=now), 'raw')
+        # Older than the raw retention: served from the 1m rollup
+        self.assertEqual(self.store.choose_resolution(now - timedelta(hours=5), now, now=now), '1m')
+        self.assertEqual(self.store.choose_resolution(now - timedelta(days=30), now, now=now), '1h')
+        self.assertEqual(self.store.choose_resolution(now - timedelta(days=900), now, now=now), '1d')
+
+    def test_prune_drops_raw_rows_past_retention(self):
+        self.store.flush()
+        deleted = self.store.prune(now=self.start + timedelta(hours=10))
+        self.assertEqual(deleted['raw'], 1200 - 120)
+        hourly = self.store.query('system_metrics', 'cpu_usage', self.start,
+                                  self.start + timedelta(hours=10), resolution='1h')
+        self.assertEqual(len(hourly['points']), 10)
+
+    def test_alerts_are_batched_with_status_updates(self):
+        self.store.record_alert(('system_1', self.start.isoformat(), 'warning', 'system', 'CPU', 'high', '{}', 0, 0))
+        self.store.update_alert('system_1', acknowledged=True, resolved=False)
+        self.store.flush()
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute('SELECT acknowledged, resolved FROM alerts WHERE id = ?', ('system_1',)).fetchone()
+        self.assertEqual(row, (1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from utils.prediction_model import PredictionModel
+from utils.model_registry import ModelRegistry, fingerprint_training_data
+
+
+def mapped_kb(path):
+    """(Rss, Pss) in kB of this process's mappings of path, from /proc/self/smaps"""
+    rss = pss = 0
+    inside = False
+    with open("/proc/self/smaps") as f:
+        for line in f:
+            fields = line.split()
+            if "-" in fields[0] and len(fields) >= 5:
+                inside = len(fields) >= 6 and fields[-1] == str(path)
+            elif inside and fields[0] == "Rss:":
+                rss += int(fields[1])
+            elif inside and fields[0] == "Pss:":
+                pss += int(fields[1])
+    return rss, pss
+
+
+def serve_from_registry(registry_dir, df, ready, done, results):
+    """Bot process: load_or_train from the registry, predict, report the artifact's Rss/Pss"""
+    registry = ModelRegistry(registry_dir)
+    model = make_model(registry)
+    model.model_params["rf"] = {"n_estimators": 50, "max_depth": 10, "random_state": 42}
+    asyncio.run(model.load_or_train(df, n_jobs=1))
+    path = registry.path(model.model_key)
+    before = mapped_kb(path)
+
+    model.predict_matrix(model.build_feature_matrix(df))
+    for flat in model.models.values():
+        for name in ("feature", "threshold", "children", "value"):
+            np.asarray(getattr(flat, name)).sum()
+    ready.put(os.getpid())
+    # Measure only once every process has mapped the artifact
+    done.wait(30)
+    results.put((before, mapped_kb(path)))
+
+
+def make_model(registry):
+    """PredictionModel with small ensembles for fast tests."""
+    model = PredictionModel()
+    model.model_params = {
+        "rf": {"n_estimators": 5, "max_depth": 3, "random_state": 42},
+        "gb": {"n_estimators": 5, "learning_rate": 0.1, "random_state": 42},
+    }
+    model.registry = registry
+    return model
+
+
+class TestModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        """Build a deterministic OHLCV random walk and an empty registry."""
+        rng = np.random.default_rng(11)
+        close = 50000 * np.exp(np.cumsum(rng.normal(0, 0.01, 400)))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        self.df = pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) * 1.002,
+            "Low": np.minimum(open_, close) * 0.998,
+            "Close": close,
+            "Volume": rng.uniform(100, 1000, len(close)),
+        }, index=pd.date_range("2025-01-01", periods=len(close), freq="h"))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_second_process_loads_instead_of_training(self):
+        """Same data and hyperparameters hit the registry without retraining."""
+        first = make_model(self.registry)
+        asyncio.run(first.load_or_train(self.df, n_jobs=1))
+
+        second = make_model(self.registry)
+        with mock.patch.object(PredictionModel, "train_async") as train:
+            asyncio.run(second.load_or_train(self.df, n_jobs=1))
+            train.assert_not_called()
+
+        self.assertEqual(second.model_key, first.model_key)
+        features = first.build_feature_matrix(self.df)
+        np.testing.assert_array_equal(second.predict_matrix(features)["prediction"],
+                                      first.predict_matrix(features)["prediction"])
+
+    def test_new_data_serves_latest_and_publishes_in_background(self):
+        """New candles load the previous version and retrain it in the background."""
+        first = make_model(self.registry)
+        asyncio.run(first.load_or_train(self.df.iloc[:-1], n_jobs=1))
+
+        async def startup():
+            model = make_model(self.registry)
+            await model.load_or_train(self.df, n_jobs=1)
+            served = model.model_key
+            await model._retrain_task
+            return served, model.model_key
+
+        served, published = asyncio.run(startup())
+        self.assertEqual(served, first.model_key)
+        self.assertNotEqual(published, served)
+        self.assertEqual(self.registry.latest(self.registry.family_key(*first.registry_identity()))[0], published)
+
+    def test_fingerprint_ignores_the_open_candle(self):
+        """Only closed candles are fingerprinted; the window end is bucketed to the interval."""
+        reference = fingerprint_training_data(self.df, "BTCUSDT", "1h")
+        open_bar = self.df.copy()
+        open_bar.iloc[-1, open_bar.columns.get_loc("Close")] *= 1.01
+        self.assertEqual(fingerprint_training_data(open_bar, "BTCUSDT", "1h"), reference)
+
+        closed_bar = self.df.copy()
+        closed_bar.iloc[-2, closed_bar.columns.get_loc("Close")] *= 1.01
+        self.assertNotEqual(fingerprint_training_data(closed_bar, "BTCUSDT", "1h"), reference)
+
+        # Index stamped at fetch time instead of candle open
+        shifted = self.df.copy()
+        shifted.index = shifted.index + pd.Timedelta(minutes=17)
+        self.assertEqual(fingerprint_training_data(shifted, "BTCUSDT", "1h")["end"], reference["end"])
+        self.assertEqual(reference["end"], str(self.df.index[-2]))
+
+    @unittest.skipUnless(os.path.exists("/proc/self/smaps") and "fork" in multiprocessing.get_all_start_methods(),
+                         "smaps/fork not available")
+    def test_processes_share_artifact_pages(self):
+        """Processes serving one artifact map it on first prediction and share its pages (Pss < Rss)."""
+        publisher = make_model(self.registry)
+        publisher.model_params["rf"] = {"n_estimators": 50, "max_depth": 10, "random_state": 42}
+        asyncio.run(publisher.load_or_train(self.df, n_jobs=1))
+
+        context = multiprocessing.get_context("fork")
+        ready, results, done = context.Queue(), context.Queue(), context.Event()
+        workers = [context.Process(target=serve_from_registry,
+                                   args=(self.tmp.name, self.df, ready, done, results)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        try:
+            for _ in workers:
+                ready.get(timeout=60)
+            done.set()
+            measures = [results.get(timeout=60) for _ in workers]
+        finally:
+            done.set()
+            for worker in workers:
+                worker.join(30)
+
+        for before, (rss, pss) in measures:
+            self.assertEqual(before, (0, 0))
+            self.assertGreater(rss, 64)
+            self.assertLess(pss, rss * 0.6)
+
+    def test_hyperparameters_change_the_key(self):
+        """Different hyperparameters never reuse an artifact."""
+        model = make_model(self.registry)
+        schema, hyperparams = model.registry_identity()
+        other = dict(hyperparams, prediction_horizon=10)
+        self.assertNotEqual(self.registry.family_key(schema, hyperparams),
+                            self.registry.family_key(schema, other))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import json
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from utils.monte_carlo import MonteCarloEngine, WalletSimulationParams
+
+
+def scalar_run(rng, config, n_cycles):
+    """One wallet path, trade by trade, as ai_analyze_pair + execute_trade in wallet_runner."""
+    capital, trades = config['initial_capital'], 0
+    size_pct = config['risk_management']['max_position_size_percentage'] / 100
+    fee_pct = config['execution_parameters']['fee_percentage'] / 100
+    threshold = config['ai_configuration']['confidence_threshold'] * 100
+    for _ in range(n_cycles):
+        for _ in config['trading_pairs']:
+            if rng.uniform(35, 75) <= threshold:
+                continue
+            position_size = capital * size_pct
+            if rng.random() < 0.75:
+                pnl_pct = rng.uniform(0.5, 3.5)
+            else:
+                pnl_pct = rng.uniform(-2.0, -0.3)
+            capital += position_size * (pnl_pct / 100) - position_size * fee_pct
+            trades += 1
+    return capital, trades
+
+
+class TestMonteCarloEngine(unittest.TestCase):
+
+    def setUp(self):
+        with open(project_root / 'config' / 'wallet_500usd.json') as f:
+            self.config = json.load(f)
+        self.params = WalletSimulationParams.from_wallet_config(self.config)
+
+    def test_params_from_wallet_config(self):
+        self.assertEqual(self.params.initial_capital, 500.0)
+        self.assertEqual(self.params.position_size_pct, 30.0)
+        self.assertEqual(self.params.confidence_threshold, 0.52)
+        self.assertEqual(self.params.pairs_per_cycle, 5)
+        self.assertEqual(self.params.max_drawdown_limit_pct, 12.0)
+
+    def test_seeded_runs_are_deterministic(self):
+        first = MonteCarloEngine(n_paths=2000, seed=7).simulate(self.params, 20)
+        second = MonteCarloEngine(n_paths=2000, seed=7).simulate(self.params, 20)
+        other = MonteCarloEngine(n_paths=2000, seed=8).simulate(self.params, 20)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first['final_capital']['mean'], other['final_capital']['mean'])
+
+    def test_mean_matches_scalar_wallet_runner(self):
+        """Vectorised paths and the trade-by-trade model agree within sampling error."""
+        report = MonteCarloEngine(n_paths=20000, seed=1).simulate(self.params, 30)
+        rng = random.Random(0)
+        runs = np.array([scalar_run(rng, self.config, 30) for _ in range(2000)])
+
+        # Standard error of the difference is about 0.8 USD and 0.15 trades
+        self.assertAlmostEqual(report['final_capital']['mean'], runs[:, 0].mean(), delta=3.0)
+        self.assertAlmostEqual(report['avg_trades'], runs[:, 1].mean(), delta=0.6)
+
+    def test_trade_probability_edges(self):
+        """Threshold below, inside and above the simulated confidence range."""
+        cases = [(0.30, 1.0), (0.35, 1.0), (0.55, 0.5), (0.75, 0.0), (0.90, 0.0)]
+        for threshold, expected in cases:
+            params = WalletSimulationParams(confidence_threshold=threshold, confidence_range=(35.0, 75.0))
+            self.assertAlmostEqual(params.trade_probability, expected, msg=threshold)
+
+        # Degenerate range: a fixed confidence either passes the threshold or not
+        self.assertEqual(WalletSimulationParams(confidence_threshold=0.5, confidence_range=(60, 60)).trade_probability, 1.0)
+        self.assertEqual(WalletSimulationParams(confidence_threshold=0.7, confidence_range=(60, 60)).trade_probability, 0.0)
+
+        never = WalletSimulationParams(confidence_threshold=0.9)
+        report = MonteCarloEngine(n_paths=100, seed=0).simulate(never, 10)
+        self.assertEqual(report['avg_trades'], 0.0)
+        self.assertEqual(report['final_capital']['mean'], never.initial_capital)
+
+    def test_risk_grows_with_position_size(self):
+        """Bigger positions raise both the ruin and the drawdown-limit breach probabilities."""
+        ruin, breach = [], []
+        for size in (20, 50, 100):
+            params = WalletSimulationParams.from_wallet_config(self.config, position_size_pct=size,
+                                                               win_probability=0.4)
+            report = MonteCarloEngine(n_paths=5000, ruin_threshold=0.9, seed=3).simulate(params, 100)
+            ruin.append(report['ruin_probability'])
+            breach.append(report['drawdown_limit_breach_probability'])
+
+        self.assertEqual(ruin, sorted(ruin))
+        self.assertEqual(breach, sorted(breach))
+        self.assertGreater(ruin[-1], ruin[0] + 0.3)
+        self.assertGreater(breach[-1], breach[0] + 0.3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.metrics import r2_score
+from sklearn.model_selection import TimeSeriesSplit
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from utils.parallel_training import ParallelTrainer
+from utils.prediction_model import PredictionModel
+
+
+class TestParallelTrainer(unittest.TestCase):
+
+    def setUp(self):
+        """Random-walk candles turned into the scaled training set of PredictionModel."""
+        rng = np.random.default_rng(11)
+        close = 50000 * np.exp(np.cumsum(rng.normal(0, 0.01, 400)))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        spread = np.abs(rng.normal(0, 0.004, len(close))) * close
+        self.df = pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Close": close,
+            "Volume": rng.uniform(100, 1000, len(close)),
+        }, index=pd.date_range("2025-01-01", periods=len(close), freq="h"))
+        X, y = PredictionModel().prepare_data(self.df)
+        self.X = ((X - X.mean()) / X.std().replace(0, 1)).to_numpy()
+        self.y = y.to_numpy()
+        self.models = {
+            "rf": RandomForestRegressor(n_estimators=20, max_depth=6, random_state=42),
+            "gb": GradientBoostingRegressor(n_estimators=20, random_state=42),
+        }
+
+    def serial_fit(self):
+        """Plain sklearn loop: TimeSeriesSplit scores and a final fit on all rows."""
+        scores = {name: [] for name in self.models}
+        for train_idx, val_idx in TimeSeriesSplit(n_splits=5).split(self.X):
+            for name, model in self.models.items():
+                fitted = clone(model).fit(self.X[train_idx], self.y[train_idx])
+                scores[name].append(r2_score(self.y[val_idx], fitted.predict(self.X[val_idx])))
+        final = {name: clone(model).fit(self.X, self.y) for name, model in self.models.items()}
+        return final, scores
+
+    def test_pool_matches_serial_training(self):
+        """Process pool and in-process runs give the models and CV scores of a serial fit."""
+        expected, scores = self.serial_fit()
+        for n_jobs in (1, 2):
+            fitted, metrics = asyncio.run(ParallelTrainer(n_splits=5, n_jobs=n_jobs).fit(self.models, self.X, self.y))
+            self.assertEqual(list(fitted), list(self.models))
+            for name, model in fitted.items():
+                np.testing.assert_array_equal(model.predict(self.X), expected[name].predict(self.X))
+                np.testing.assert_array_equal(model.feature_importances_, expected[name].feature_importances_)
+                self.assertAlmostEqual(metrics["cv_scores_mean"][name], np.mean(scores[name]), places=12)
+                self.assertAlmostEqual(metrics["cv_scores_std"][name], np.std(scores[name]), places=12)
+            # The refit used every core; inference goes back to the estimator's own setting
+            self.assertIsNone(fitted["rf"].n_jobs)
+
+    def test_train_async_is_independent_of_n_jobs(self):
+        """PredictionModel trained serially or on the pool predicts the same values."""
+        results = []
+        for n_jobs in (1, 2):
+            model = PredictionModel()
+            model.model_params = {
+                "rf": {"n_estimators": 20, "max_depth": 6, "random_state": 42},
+                "gb": {"n_estimators": 20, "random_state": 42},
+            }
+            self.assertIsNotNone(asyncio.run(model.train_async(self.df, n_jobs=n_jobs)))
+            results.append(model)
+
+        serial, pooled = results
+        self.assertEqual(serial.metrics["cv_scores_mean"], pooled.metrics["cv_scores_mean"])
+        self.assertEqual(serial.feature_importance, pooled.feature_importance)
+        for i in range(300, 320):
+            self.assertEqual(serial.predict(self.df.iloc[:i])["prediction"],
+                             pooled.predict(self.df.iloc[:i])["prediction"])
+
+
+if __name__ == "__main__":
+    unittest.main()
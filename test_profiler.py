@@ -0,0 +1,79 @@
+import unittest
+import os
+import sys
+import signal
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from utils.profiler import SamplingProfiler, install_signal_handler
+
+
+def busy_cycle(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+class TestSamplingProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.profiler = SamplingProfiler(output_dir=self.tmp.name)
+        self.stop_worker = threading.Event()
+        self.worker = threading.Thread(target=busy_cycle, args=(self.stop_worker,), name='bot-cycle')
+        self.worker.start()
+
+    def tearDown(self):
+        self.stop_worker.set()
+        self.worker.join()
+        self.profiler.stop(wait=True)
+        self.tmp.cleanup()
+
+    def read_stacks(self, path):
+        stacks = {}
+        for line in Path(path).read_text().splitlines():
+            stack, count = line.rsplit(' ', 1)
+            stacks[stack] = int(count)
+        return stacks
+
+    def test_writes_collapsed_stacks(self):
+        self.assertTrue(self.profiler.start(duration=0.3, interval=0.002))
+        self.assertFalse(self.profiler.start(duration=0.3))
+        time.sleep(0.4)
+        output = self.profiler.stop(wait=True)
+
+        stacks = self.read_stacks(output)
+        busy = [stack for stack in stacks if stack.startswith('bot-cycle;') and 'busy_cycle (test_profiler.py' in stack]
+        self.assertTrue(busy)
+        self.assertGreater(sum(stacks[stack] for stack in busy), 20)
+
+    def test_rejects_out_of_range_sessions(self):
+        for duration, interval in ((30, 0), (30, 0.0005), (301, 0.005), (0, 0.005), (float('nan'), 0.005)):
+            with self.assertRaises(ValueError):
+                self.profiler.start(duration=duration, interval=interval)
+        self.assertFalse(self.profiler.running)
+        self.assertTrue(self.profiler.start(duration=0.05, interval=0.001))
+
+    @unittest.skipUnless(hasattr(signal, 'SIGUSR2'), "SIGUSR2 non disponibile")
+    def test_signal_toggles_profiler(self):
+        previous = signal.getsignal(signal.SIGUSR2)
+        try:
+            install_signal_handler(duration=60, interval=0.002, profiler=self.profiler)
+            os.kill(os.getpid(), signal.SIGUSR2)
+            time.sleep(0.2)
+            self.assertTrue(self.profiler.running)
+            os.kill(os.getpid(), signal.SIGUSR2)
+            output = self.profiler.stop(wait=True)
+            self.assertFalse(self.profiler.running)
+            self.assertTrue(self.read_stacks(output))
+        finally:
+            signal.signal(signal.SIGUSR2, previous)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import re
+import threading
+import unittest
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+from openai import OpenAI
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from utils.sentiment_analyzer import SentimentAnalyzer
+
+
+class CountingAnalyzer(SentimentAnalyzer):
+    """Analyzer whose fetch is slow and counted, without social or AI clients."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.fetches = 0
+
+    async def _fetch_sentiment_batch(self, symbols):
+        self.fetches += 1
+        await asyncio.sleep(0.05)
+        return {symbol: {'sentiment': 'positive', 'score': float(self.fetches), 'symbol': symbol}
+                for symbol in symbols}
+
+
+class StubCompletionsHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible /chat/completions answering every symbol listed in the prompt."""
+
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = body['messages'][-1]['content']
+        symbols = [s.strip() for s in re.search(r'Symbols: (.*)', prompt).group(1).split(',')]
+        StubCompletionsHandler.requests.append(symbols)
+
+        results = {symbol: {'sentiment': 'positive', 'confidence': 0.8, 'key_points': ['stub'],
+                            'market_signals': ['stub'], 'risk_level': 'low'} for symbol in symbols}
+        # Invalid entry: must fall back to technical analysis for that symbol only
+        if 'BAD' in results:
+            results['BAD'] = {'sentiment': 'euphoric'}
+
+        payload = json.dumps({
+            'id': 'stub', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': json.dumps({'results': results})}}],
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSentimentCache(unittest.TestCase):
+
+    def test_concurrent_requests_share_one_fetch(self):
+        async def scenario():
+            analyzer = CountingAnalyzer()
+            results = await asyncio.gather(*(analyzer.analyze_sentiment('BTC') for _ in range(5)))
+            cached = await analyzer.analyze_sentiment('BTC')
+            return analyzer.fetches, results, cached
+
+        fetches, results, cached = asyncio.run(scenario())
+        self.assertEqual(fetches, 1)
+        self.assertTrue(all(result['score'] == 1.0 for result in results))
+        self.assertEqual(cached['score'], 1.0)
+
+    def test_stale_value_is_served_while_refreshing(self):
+        async def scenario():
+            analyzer = CountingAnalyzer(cache_ttl=0.0)
+            await analyzer.analyze_sentiment('ETH')
+            stale = await analyzer.analyze_sentiment('ETH')
+            await asyncio.sleep(0.2)
+            fresh = analyzer._cache['ETH'][1]
+            return stale, fresh
+
+        stale, fresh = asyncio.run(scenario())
+        self.assertEqual(stale['score'], 1.0)
+        self.assertEqual(fresh['score'], 2.0)
+
+    def test_non_blocking_call_returns_neutral_and_warms_cache(self):
+        async def scenario():
+            analyzer = CountingAnalyzer()
+            first = await analyzer.analyze_sentiment('SOL', wait=False)
+            await asyncio.sleep(0.2)
+            second = await analyzer.analyze_sentiment('SOL', wait=False)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        self.assertEqual(first['sentiment'], 'neutral')
+        self.assertEqual(second['sentiment'], 'positive')
+
+
+class TestBatchedLLMSentiment(unittest.TestCase):
+
+    def setUp(self):
+        StubCompletionsHandler.requests = []
+        self.server = HTTPServer(('127.0.0.1', 0), StubCompletionsHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def make_analyzer(self, **kwargs):
+        analyzer = SentimentAnalyzer(**kwargs)
+        analyzer.min_delay_between_calls = 0.0
+        analyzer.openrouter_client = OpenAI(
+            base_url=f"http://127.0.0.1:{self.server.server_port}/v1", api_key='test', max_retries=0
+        )
+        return analyzer
+
+    def test_symbols_share_one_request(self):
+        symbols = [f'SYM{i}' for i in range(20)] + ['BAD']
+        analyzer = self.make_analyzer()
+        results = asyncio.run(analyzer.analyze_sentiment_batch(symbols))
+
+        self.assertEqual(len(StubCompletionsHandler.requests), 1)
+        self.assertEqual(StubCompletionsHandler.requests[0], symbols)
+        self.assertEqual(results['SYM3']['source'], 'openrouter')
+        self.assertEqual(results['BAD']['source'], 'technical_analysis')
+
+    def test_token_budget_splits_batches(self):
+        symbols = [f'SYM{i}' for i in range(20)]
+        analyzer = self.make_analyzer(batch_token_budget=400)
+        results = asyncio.run(analyzer.analyze_sentiment_batch(symbols))
+
+        self.assertGreater(len(StubCompletionsHandler.requests), 1)
+        self.assertEqual(sorted(sum(StubCompletionsHandler.requests, [])), sorted(symbols))
+        self.assertTrue(all(result['source'] == 'openrouter' for result in results.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
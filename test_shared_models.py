@@ -0,0 +1,69 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeRegressor
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent
+sys.path.insert(0, str(project_root))
+
+from utils.shared_models import FlatForest, LazyArtifact, compile_model, load_shared, save_shared
+
+
+class TestSharedModels(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(size=(300, 6))
+        self.y = self.X[:, 0] * 2 + np.sin(self.X[:, 1]) + rng.normal(scale=0.1, size=300)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'artifact.joblib'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_matches_sklearn_and_is_mapped(self):
+        """Compiled trees predict like sklearn and their arrays come back memory-mapped."""
+        rf = RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0).fit(self.X, self.y)
+        gb = GradientBoostingRegressor(n_estimators=20, max_depth=3, random_state=0).fit(self.X, self.y)
+        scaler = StandardScaler().fit(self.X)
+        save_shared({'models': {'rf': rf, 'gb': gb}, 'scaler': scaler}, self.path)
+
+        artifact = load_shared(self.path)
+        for name, model in (('rf', rf), ('gb', gb)):
+            flat = artifact['models'][name]
+            self.assertIsInstance(flat, FlatForest)
+            self.assertIsInstance(flat.threshold, np.memmap)
+            np.testing.assert_allclose(flat.predict(self.X), model.predict(self.X), rtol=1e-10, atol=1e-10)
+        np.testing.assert_allclose(artifact['scaler'].transform(self.X), scaler.transform(self.X))
+
+    def test_single_row_matches_sklearn(self):
+        """The one-row evaluator used for live signals agrees with sklearn row by row."""
+        models = [
+            RandomForestRegressor(n_estimators=15, max_depth=8, random_state=0).fit(self.X, self.y),
+            GradientBoostingRegressor(n_estimators=30, max_depth=4, random_state=0).fit(self.X, self.y),
+            GradientBoostingRegressor(n_estimators=10, init='zero', random_state=0).fit(self.X, self.y),
+            DecisionTreeRegressor(random_state=0).fit(self.X, self.y),
+        ]
+        for model in models:
+            flat = compile_model(model)
+            self.assertIsInstance(flat, FlatForest)
+            rows = np.concatenate([flat.predict(self.X[i:i + 1]) for i in range(50)])
+            np.testing.assert_allclose(rows, model.predict(self.X[:50]), rtol=1e-10, atol=1e-10)
+            np.testing.assert_allclose(flat.predict(self.X[0]), model.predict(self.X[:1]), rtol=1e-10, atol=1e-10)
+
+    def test_lazy_artifact_loads_on_first_use(self):
+        save_shared({'value': np.arange(4)}, self.path)
+        lazy = LazyArtifact(self.path)
+        self.assertFalse(lazy.loaded)
+        np.testing.assert_array_equal(lazy.get()['value'], np.arange(4))
+        self.assertTrue(lazy.loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,13 +3,22 @@ from typing import Dict, Any, List, Optional
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import time
 import asyncio
 from utils.data_loader import CryptoDataLoader
 from utils.sentiment_analyzer import SentimentAnalyzer
 from utils.prediction_model import PredictionModel
+from utils.metrics import counter, histogram
 
 logger = logging.getLogger(__name__)
 
+SIGNAL_GENERATION = histogram('aurumbotx_signal_generation_seconds',
+                              'Signal generation latency per batch, analysis included')
+PREDICTION_LATENCY = histogram('aurumbotx_prediction_seconds', 'Batched model prediction latency')
+SIGNALS = counter('aurumbotx_signals_total', 'Generated trading signals', ('action',))
+SIGNALS_BUY = SIGNALS.labels('buy')
+SIGNALS_SELL = SIGNALS.labels('sell')
+
 class RetryHandler:
     """Gestisce i tentativi di retry per le operazioni che possono fallire"""
     def __init__(self, max_retries: int = 3, base_delay: float = 1.0):
@@ -46,7 +55,7 @@ class AITrading:
         self.retry_handler = RetryHandler()
         # Passa use_live_data=True e testnet=True esplicitamente al CryptoDataLoader
         self.data_loader = CryptoDataLoader(use_live_data=True, testnet=True)
-        self.sentiment_analyzer = SentimentAnalyzer()
+        self.sentiment_analyzer = SentimentAnalyzer(cache_ttl=self.config.get("sentiment_ttl", 300.0))
         self.prediction_model = PredictionModel()
         self.min_confidence = self.config.get("min_confidence", 0.7)
 
@@ -57,12 +66,11 @@ class AITrading:
         self.logger.info("Sistema di trading AI inizializzato con retry configurati")
 
     async def initialize(self):
-        """Inizializza i componenti asincroni di AITrading e addestra il modello di previsione"""
+        """Inizializza i componenti asincroni di AITrading e carica (o addestra) il modello di previsione"""
         await self.data_loader.initialize()
         await self.sentiment_analyzer.initialize()
 
-        # Addestra il modello di previsione
-        self.logger.info("Inizio addestramento modello di previsione...")
+        self.logger.info("Preparazione modello di previsione...")
         try:
             # Recupera dati storici per l'addestramento
             training_data = await self.data_loader.get_historical_data(
@@ -72,8 +80,13 @@ class AITrading:
             if training_data is None or training_data.empty:
                 self.logger.warning("Nessun dato disponibile per l'addestramento del modello. Il modello userà previsioni di fallback.")
             else:
-                await self.prediction_model.train_async(training_data)
-                self.logger.info("Modello di previsione addestrato con successo.")
+                # Riusa il modello del registro se già addestrato su questi dati
+                metrics = await self.prediction_model.load_or_train(
+                    training_data, symbol="BTCUSDT", interval="1h",
+                    max_age=self.config.get("model_max_age")
+                )
+                if metrics is not None:
+                    self.logger.info("Modello di previsione pronto.")
         except Exception as e:
             self.logger.error(f"Errore durante l'addestramento del modello di previsione: {str(e)}")
             self.logger.warning("Il modello di previsione userà previsioni di fallback.")
@@ -141,19 +154,17 @@ class AITrading:
 
             market_data = await self._retry_operation(get_data)
 
-            # Analisi del sentiment con retry e fallback
-            async def get_sentiment():
-                try:
-                    return await self.sentiment_analyzer.analyze_sentiment(symbol)
-                except Exception as e:
-                    self.logger.warning(f"Fallback a sentiment neutrale per {symbol}: {str(e)}")
-                    return {'score': 0.5, 'magnitude': 0.5}
-
-            sentiment_data = await self._retry_operation(get_sentiment)
+            # Sentiment dalla cache: mai in attesa di social/LLM, il refresh gira in background
+            try:
+                sentiment_data = await self.sentiment_analyzer.analyze_sentiment(symbol, wait=False)
+            except Exception as e:
+                self.logger.warning(f"Fallback a sentiment neutrale per {symbol}: {str(e)}")
+                sentiment_data = {'score': 0.5, 'magnitude': 0.5}
 
             # Combina le analisi
             analysis = {
                 'market_data': self._extract_market_metrics(market_data),
+                'candles': market_data,
                 'sentiment': sentiment_data,
                 'timestamp': datetime.now().isoformat()
             }
@@ -164,51 +175,76 @@ class AITrading:
             self.logger.error(f"Errore nell'analisi del mercato: {str(e)}")
             return {}
 
-    async def generate_trading_signals(self, symbol: str) -> List[Dict[str, Any]]:
+    async def generate_trading_signals(self, symbol: str,
+                                       analysis: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Genera segnali di trading usando analisi AI con retry"""
         try:
-            # Analisi mercato con retry
-            analysis = await self._retry_operation(self.analyze_market, symbol)
-            if not analysis:
-                return []
-
-            market_data = analysis.get('market_data', {})
-            if not market_data:
-                return []
-
-            # Genera previsioni con retry e validazione
-            async def get_prediction():
-                prediction = self.prediction_model.predict(market_data)
-                if not isinstance(prediction, dict):
-                    raise ValueError("Previsione non valida")
-                return prediction
-
-            try:
-                prediction = await self._retry_operation(get_prediction)
-            except Exception as e:
-                self.logger.error(f"Errore previsione, usando default: {str(e)}")
-                prediction = {'prediction': 0.5, 'confidence': 0.0}
-
-            signals = []
-            if prediction.get('confidence', 0) >= self.min_confidence:
-                signal = {
-                    'symbol': symbol,
-                    'action': 'buy' if prediction.get('prediction', 0.5) > 0.5 else 'sell',
-                    'confidence': prediction.get('confidence', 0),
-                    'price': market_data.get('price', 0),
-                    'timestamp': datetime.now().isoformat(),
-                    'analysis': {
-                        'technical_score': prediction.get('prediction', 0.5),
-                        'sentiment_score': analysis['sentiment'].get('score', 0.5)
-                    }
-                }
-                signals.append(signal)
+            signals = await self.generate_trading_signals_batch([symbol], {symbol: analysis} if analysis else None)
+            return signals.get(symbol, [])
+        except Exception as e:
+            self.logger.error(f"Errore nella generazione dei segnali: {str(e)}")
+            return []
 
-            return signals
+    async def generate_trading_signals_batch(self, symbols: List[str],
+                                             analyses: Optional[Dict[str, Dict[str, Any]]] = None
+                                             ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Segnali per più simboli: le analisi mancanti sono raccolte in parallelo,
+        le previsioni escono da un'unica chiamata batch al modello.
+        """
+        start = time.perf_counter()
+        analyses = dict(analyses or {})
+        missing = [symbol for symbol in symbols if not analyses.get(symbol)]
+        if missing:
+            results = await asyncio.gather(
+                *(self._retry_operation(self.analyze_market, symbol) for symbol in missing),
+                return_exceptions=True
+            )
+            for symbol, result in zip(missing, results):
+                analyses[symbol] = result if isinstance(result, dict) else {}
 
+        ready = {symbol: analyses[symbol] for symbol in symbols
+                 if analyses.get(symbol) and analyses[symbol].get('market_data')}
+        try:
+            predict_start = time.perf_counter()
+            predictions = self.prediction_model.predict_batch({
+                symbol: analysis.get('candles', analysis['market_data'])
+                for symbol, analysis in ready.items()
+            })
+            PREDICTION_LATENCY.observe(time.perf_counter() - predict_start)
         except Exception as e:
-            self.logger.error(f"Errore nella generazione dei segnali: {str(e)}")
+            self.logger.error(f"Errore previsione, usando default: {str(e)}")
+            predictions = {}
+
+        signals = {}
+        for symbol in symbols:
+            if symbol not in ready:
+                signals[symbol] = []
+                continue
+            prediction = predictions.get(symbol, {'prediction': 0.5, 'confidence': 0.0})
+            signals[symbol] = self._build_signals(symbol, ready[symbol], prediction)
+            for signal in signals[symbol]:
+                (SIGNALS_BUY if signal['action'] == 'buy' else SIGNALS_SELL).inc()
+        SIGNAL_GENERATION.observe(time.perf_counter() - start)
+        return signals
+
+    def _build_signals(self, symbol: str, analysis: Dict[str, Any],
+                       prediction: Dict[str, float]) -> List[Dict[str, Any]]:
+        """Segnale dalla previsione se la confidenza supera la soglia minima"""
+        market_data = analysis['market_data']
+        if prediction.get('confidence', 0) < self.min_confidence:
             return []
+        return [{
+            'symbol': symbol,
+            'action': 'buy' if prediction.get('prediction', 0.5) > 0.5 else 'sell',
+            'confidence': prediction.get('confidence', 0),
+            'price': market_data.get('price', 0),
+            'timestamp': datetime.now().isoformat(),
+            'analysis': {
+                'technical_score': prediction.get('prediction', 0.5),
+                'sentiment_score': analysis.get('sentiment', {}).get('score', 0.5)
+            }
+        }]
 
     async def analyze_and_predict(self, symbol: str) -> Dict[str, Any]:
         """Analizza il mercato e genera previsioni con gestione errori completa"""
@@ -220,7 +256,7 @@ class AITrading:
                 return {}
 
             # Genera segnali di trading
-            signals = await self._retry_operation(self.generate_trading_signals, symbol)
+            signals = await self._retry_operation(self.generate_trading_signals, symbol, analysis)
 
             if not signals:
                 self.logger.warning(f"Nessun segnale generato per {symbol}")
@@ -371,16 +407,30 @@ class AITrading:
             self.logger.error(f"Error calculating RSI: {str(e)}")
             return pd.Series([50] * len(prices) if prices is not None else [])
 
-    async def backtest_strategy(self, symbol: str, start_date: str, end_date: str) -> Dict[str, Any]:
-        """Backtest AI trading strategy"""
+    async def backtest_strategy(self, symbol: str, start_date: str, end_date: str,
+                                replay: bool = False,
+                                historical_data: Optional[pd.DataFrame] = None,
+                                sentiment: Any = 0.5) -> Dict[str, Any]:
+        """
+        Backtest AI trading strategy.
+
+        Con replay=True i segnali vengono calcolati offline da feature
+        precalcolate (nessuna chiamata a exchange o sentiment per candela);
+        sentiment può essere una costante, un array o una pd.Series registrata.
+        Passando historical_data il replay non tocca la rete.
+        """
         try:
             # Get historical data
-            historical_data = await self.data_loader.get_historical_data(
-                symbol, start_date=start_date, end_date=end_date
-            )
+            if historical_data is None:
+                historical_data = await self.data_loader.get_historical_data(
+                    symbol, start_date=start_date, end_date=end_date
+                )
             if historical_data is None or historical_data.empty:
                 return {'error': 'No historical data available'}
 
+            if replay:
+                return self._replay_backtest(symbol, historical_data, sentiment)
+
             signals = []
             portfolio_value = 1000  # Initial portfolio value
             position = None
@@ -406,9 +456,49 @@ class AITrading:
             self.logger.error(f"Errore in backtesting: {str(e)}")
             return {'error': str(e)}
 
+    def _replay_sentiment(self, sentiment: Any, index: pd.Index) -> np.ndarray:
+        """Allinea il sentiment registrato alle candele (costante, array o Series)"""
+        if isinstance(sentiment, pd.Series):
+            aligned = sentiment.sort_index().reindex(index, method='ffill')
+            return aligned.fillna(0.5).to_numpy(dtype=np.float64)
+        if isinstance(sentiment, (list, tuple, np.ndarray)):
+            values = np.asarray(sentiment, dtype=np.float64)
+            if len(values) != len(index):
+                raise ValueError(f"Serie sentiment di lunghezza {len(values)}, attese {len(index)} candele")
+            return values
+        return np.full(len(index), float(sentiment))
+
+    def _replay_backtest(self, symbol: str, historical_data: pd.DataFrame, sentiment: Any) -> Dict[str, Any]:
+        """Replay offline: feature e previsioni calcolate una volta su tutte le candele"""
+        features = self.prediction_model.build_feature_matrix(historical_data)
+        predictions = self.prediction_model.predict_matrix(features)
+        sentiment_scores = self._replay_sentiment(sentiment, historical_data.index)
+
+        prediction = predictions['prediction']
+        confidence = predictions['confidence']
+        prices = historical_data['Close'].to_numpy(dtype=np.float64)
+
+        # Stessa regola di generate_trading_signals, dalla candela 51 in poi
+        active = confidence >= self.min_confidence
+        active[:51] = False
+
+        signals = []
+        for i in np.flatnonzero(active):
+            signals.append({
+                'symbol': symbol,
+                'action': 'buy' if prediction[i] > 0.5 else 'sell',
+                'confidence': float(confidence[i]),
+                'price': float(prices[i]),
+                'timestamp': historical_data.index[i].isoformat()
+                if hasattr(historical_data.index[i], 'isoformat') else str(historical_data.index[i]),
+                'analysis': {
+                    'technical_score': float(prediction[i]),
+                    'sentiment_score': float(sentiment_scores[i])
+                }
+            })
 
-
-
-
-
-
+        return {
+            'signals': signals,
+            'final_value': 1000,
+            'total_trades': len(signals)
+        }
@@ -0,0 +1,148 @@
+"""
+Backtest Cache AurumBotX
+Cache su disco dei risultati di backtest indirizzata per contenuto.
+
+La chiave è l'hash di (tipo strategia, config canonicalizzata, impronta dei
+dati, versione engine, parametri engine, finestra). Se né dati né parametri
+cambiano, uno sweep rilegge il risultato invece di ricalcolarlo.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.backtest_engine import ENGINE_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Chiavi descrittive che non influenzano il risultato del backtest
+NON_SEMANTIC_KEYS = {'description', 'name', 'notes'}
+
+TRADE_KEYS = ('entry_idx', 'exit_idx', 'side', 'entry_price', 'exit_price', 'pnl', 'exit_reason')
+
+
+def _canonical_value(value: Any) -> Any:
+    """Normalizza numeri e contenitori per una serializzazione stabile"""
+    if isinstance(value, dict):
+        return {str(k): _canonical_value(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical_value(v) for v in value]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        # 12 cifre significative: 0.1 + 0.2 e 0.3 producono la stessa chiave
+        return float(f"{float(value):.12g}")
+    return value
+
+
+def canonical_config(config: Dict[str, Any]) -> str:
+    """Config in forma canonica (chiavi ordinate, float arrotondati, senza campi descrittivi)"""
+    semantic = {k: v for k, v in config.items() if k not in NON_SEMANTIC_KEYS}
+    return json.dumps(_canonical_value(semantic), sort_keys=True, separators=(',', ':'))
+
+
+def fingerprint_frame(data: pd.DataFrame, symbol: str, interval: str) -> Dict[str, Any]:
+    """Impronta di un DataFrame OHLCV: simbolo, intervallo, range e ultima candela"""
+    last = data.iloc[-1]
+    return _canonical_value({
+        'symbol': symbol,
+        'interval': interval,
+        'n_bars': len(data),
+        'start': str(data.index[0]),
+        'end': str(data.index[-1]),
+        'last_candle': {col: float(last[col]) for col in ('Open', 'High', 'Low', 'Close', 'Volume')
+                        if col in data.columns},
+    })
+
+
+def fingerprint_arrays(arrays: Dict[str, np.ndarray], symbol: str = '', interval: str = '') -> Dict[str, Any]:
+    """Impronta di array già estratti: lunghezza, ultima candela e hash dei close"""
+    close = np.ascontiguousarray(arrays['close'], dtype=np.float64)
+    return _canonical_value({
+        'symbol': symbol,
+        'interval': interval,
+        'n_bars': len(close),
+        'last_close': float(close[-1]) if len(close) else None,
+        'close_digest': hashlib.blake2b(close.tobytes(), digest_size=16).hexdigest(),
+    })
+
+
+class BacktestCache:
+    """Risultati compatti su disco, un file per chiave, scritture atomiche"""
+
+    def __init__(self, cache_dir: str = 'cache/backtests'):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(config: Dict[str, Any], fingerprint: Dict[str, Any],
+                 engine_params: Optional[Dict[str, Any]] = None,
+                 window: Optional[Tuple[int, int]] = None) -> str:
+        """Hash sha256 di strategia, config, dati, versione e parametri engine"""
+        payload = json.dumps({
+            'strategy_type': config.get('type'),
+            'config': canonical_config(config),
+            'data': fingerprint,
+            'engine_version': ENGINE_VERSION,
+            'engine_params': _canonical_value(engine_params or {}),
+            'window': list(window) if window is not None else None,
+        }, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        shard = self.cache_dir / key[:2]
+        return shard / f"{key}.json", shard / f"{key}.npz"
+
+    def get(self, key: str, need_trades: bool = False) -> Optional[Dict[str, Any]]:
+        """Record in cache o None (anche se servono i trade e non sono stati salvati)"""
+        meta_path, trades_path = self._paths(key)
+        try:
+            with open(meta_path, 'r') as f:
+                record = json.load(f)
+            if need_trades:
+                if not trades_path.exists():
+                    self.misses += 1
+                    return None
+                with np.load(trades_path) as trades:
+                    record['trades'] = {k: trades[k] for k in TRADE_KEYS}
+        except (FileNotFoundError, ValueError, KeyError, OSError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return record
+
+    def put(self, key: str, record: Dict[str, Any]):
+        """Salva metriche in JSON e, se presenti, gli array dei trade in npz"""
+        if record.get('error'):
+            return
+
+        meta_path, trades_path = self._paths(key)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+
+        meta = {k: v for k, v in record.items()
+                if k not in ('trades', 'task_id', 'config_id', 'dataset', 'window', 'cpu_time')}
+        trades = record.get('trades')
+        if trades is not None:
+            tmp_trades = trades_path.with_name(trades_path.stem + '.tmp.npz')
+            np.savez(tmp_trades, **{k: trades[k] for k in TRADE_KEYS})
+            os.replace(tmp_trades, trades_path)
+
+        tmp_meta = meta_path.with_suffix('.json.tmp')
+        with open(tmp_meta, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, meta_path)
+
+    def stats(self) -> Dict[str, int]:
+        """Contatori hit/miss della sessione"""
+        return {'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,251 @@
+"""
+Backtest Engine AurumBotX
+Backtester event-driven su array NumPy precalcolati.
+
+Gli indicatori vengono calcolati una sola volta sull'intera serie, i segnali
+sono maschere vettoriali e il motore salta direttamente da un ingresso
+all'uscita successiva, senza copiare la storia ad ogni candela.
+Riproduce la semantica stop loss / profit target di
+ComprehensiveStrategySimulator.simulate_trading.
+"""
+
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ENGINE_VERSION = "1.0"
+
+# Codici compatti per direzione e motivo di uscita
+SIDE_LONG = 1
+SIDE_SHORT = -1
+EXIT_STOP_LOSS = 0
+EXIT_PROFIT_TARGET = 1
+EXIT_REASONS = {EXIT_STOP_LOSS: 'stop_loss', EXIT_PROFIT_TARGET: 'profit_target'}
+
+INDICATOR_COLUMNS = ('Close', 'SMA_20', 'SMA_50', 'RSI')
+
+
+def compute_indicator_arrays(data: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Calcola SMA 20/50 e RSI 14 una sola volta e li restituisce come array float64"""
+    close = data['Close'].astype(float)
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+
+    return {
+        'close': close.to_numpy(dtype=np.float64),
+        'sma_20': close.rolling(window=20).mean().to_numpy(dtype=np.float64),
+        'sma_50': close.rolling(window=50).mean().to_numpy(dtype=np.float64),
+        'rsi': (100 - (100 / (1 + rs))).to_numpy(dtype=np.float64),
+    }
+
+
+def arrays_from_frame(data: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Estrae gli array dal DataFrame, riusando gli indicatori se già presenti"""
+    if all(col in data.columns for col in INDICATOR_COLUMNS):
+        return {
+            'close': data['Close'].to_numpy(dtype=np.float64),
+            'sma_20': data['SMA_20'].to_numpy(dtype=np.float64),
+            'sma_50': data['SMA_50'].to_numpy(dtype=np.float64),
+            'rsi': data['RSI'].to_numpy(dtype=np.float64),
+        }
+    return compute_indicator_arrays(data)
+
+
+class BacktestEngine:
+    """Backtester event-driven con registrazione trade su array preallocati"""
+
+    def __init__(self, initial_balance: float = 10000, warmup: int = 50,
+                 min_confidence: float = 0.6):
+        self.initial_balance = initial_balance
+        self.warmup = warmup
+        self.min_confidence = min_confidence
+
+    def generate_signals(self, arrays: Dict[str, np.ndarray],
+                         config: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """Maschere vettoriali di ingresso: direzione (+1/-1/0) e confidenza per candela"""
+        price = arrays['close']
+        rsi = arrays['rsi']
+        sma_20 = arrays['sma_20']
+        sma_50 = arrays['sma_50']
+
+        n = len(price)
+        action = np.zeros(n, dtype=np.int8)
+        confidence = np.zeros(n, dtype=np.float64)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if config['type'] == 'swing':
+                trend_bullish = sma_20 > sma_50
+                trend_strength = np.where(price > 0, np.abs(sma_20 - sma_50) / price, 0.0)
+                strong = trend_strength >= config['min_trend_strength']
+
+                buy = trend_bullish & (rsi < 40) & strong
+                sell = ~trend_bullish & (rsi > 60) & strong
+                action[buy] = SIDE_LONG
+                action[sell] = SIDE_SHORT
+                confidence[:] = np.minimum(0.9, 0.5 + trend_strength)
+            elif config['type'] == 'scalping':
+                buy = rsi < 30
+                sell = rsi > 70
+                action[buy] = SIDE_LONG
+                action[sell] = SIDE_SHORT
+                confidence[:] = 0.7
+            else:
+                raise ValueError(f"Tipo strategia non supportato: {config['type']}")
+
+        return action, confidence
+
+    def run_arrays(self, arrays: Dict[str, np.ndarray], config: Dict[str, Any]) -> Dict[str, Any]:
+        """Esegue il backtest e restituisce array compatti dei trade e bilancio finale"""
+        close = arrays['close']
+        n = len(close)
+
+        action, confidence = self.generate_signals(arrays, config)
+        threshold = config.get('confidence_threshold', self.min_confidence)
+        entry_mask = (action != 0) & (confidence >= threshold)
+        entry_mask[:self.warmup] = False
+        entry_bars = np.flatnonzero(entry_mask)
+
+        # Array trade preallocati (al massimo un ingresso per candela)
+        capacity = max(len(entry_bars), 1)
+        entry_idx = np.empty(capacity, dtype=np.int64)
+        exit_idx = np.empty(capacity, dtype=np.int64)
+        sides = np.empty(capacity, dtype=np.int8)
+        entry_prices = np.empty(capacity, dtype=np.float64)
+        exit_prices = np.empty(capacity, dtype=np.float64)
+        pnls = np.empty(capacity, dtype=np.float64)
+        reasons = np.empty(capacity, dtype=np.int8)
+
+        stop_pct = config['stop_loss']
+        target_pct = config['profit_target']
+        balance = float(self.initial_balance)
+        count = 0
+        bar = self.warmup
+
+        while True:
+            # Prossimo ingresso valido (nessuna posizione aperta)
+            pos = np.searchsorted(entry_bars, bar)
+            if pos >= len(entry_bars):
+                break
+            i = int(entry_bars[pos])
+            side = int(action[i])
+            entry_price = float(close[i])
+
+            if side == SIDE_LONG:
+                stop = entry_price * (1 - stop_pct)
+                target = entry_price * (1 + target_pct)
+            else:
+                stop = entry_price * (1 + stop_pct)
+                target = entry_price * (1 - target_pct)
+
+            j = self._find_exit(close, i + 1, side, stop, target)
+            if j < 0:
+                # Posizione ancora aperta a fine dati: non contabilizzata
+                break
+
+            exit_price = float(close[j])
+            if side == SIDE_LONG:
+                pnl = (exit_price - entry_price) / entry_price
+                reason = EXIT_STOP_LOSS if exit_price <= stop else EXIT_PROFIT_TARGET
+            else:
+                pnl = (entry_price - exit_price) / entry_price
+                reason = EXIT_STOP_LOSS if exit_price >= stop else EXIT_PROFIT_TARGET
+
+            entry_idx[count] = i
+            exit_idx[count] = j
+            sides[count] = side
+            entry_prices[count] = entry_price
+            exit_prices[count] = exit_price
+            pnls[count] = pnl
+            reasons[count] = reason
+            count += 1
+            balance *= (1 + pnl)
+
+            # Nella stessa candela dell'uscita si può riaprire una posizione
+            bar = j
+
+        return {
+            'n_bars': n,
+            'total_trades': count,
+            'final_balance': balance,
+            'initial_balance': float(self.initial_balance),
+            'entry_idx': entry_idx[:count],
+            'exit_idx': exit_idx[:count],
+            'side': sides[:count],
+            'entry_price': entry_prices[:count],
+            'exit_price': exit_prices[:count],
+            'pnl': pnls[:count],
+            'exit_reason': reasons[:count],
+        }
+
+    @staticmethod
+    def _find_exit(close: np.ndarray, start: int, side: int, stop: float, target: float) -> int:
+        """Prima candela >= start che tocca stop o target, scansione a blocchi crescenti"""
+        n = len(close)
+        chunk = 64
+        i = start
+        while i < n:
+            end = min(n, i + chunk)
+            window = close[i:end]
+            if side == SIDE_LONG:
+                hit = (window <= stop) | (window >= target)
+            else:
+                hit = (window >= stop) | (window <= target)
+            k = int(hit.argmax())
+            if hit[k]:
+                return i + k
+            i = end
+            chunk = min(chunk * 2, 1 << 16)
+        return -1
+
+    @staticmethod
+    def summarize(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Metriche di sintesi nel formato di simulate_trading"""
+        pnl = result['pnl']
+        wins = pnl[pnl > 0]
+        losses = pnl[pnl <= 0]
+        total_trades = int(result['total_trades'])
+        initial = result['initial_balance']
+
+        return {
+            'total_trades': total_trades,
+            'winning_trades': int(len(wins)),
+            'losing_trades': int(len(losses)),
+            'win_rate': len(wins) / total_trades if total_trades > 0 else 0,
+            'total_pnl': (result['final_balance'] - initial) / initial,
+            'avg_win': np.mean(wins) if len(wins) > 0 else 0,
+            'avg_loss': np.mean(losses) if len(losses) > 0 else 0,
+            'final_balance': result['final_balance'],
+        }
+
+    @staticmethod
+    def to_trade_records(result: Dict[str, Any], index: pd.Index) -> List[Dict[str, Any]]:
+        """Converte gli array compatti nella lista di dict usata dai report"""
+        trades = []
+        for k in range(result['total_trades']):
+            trades.append({
+                'entry_time': index[result['entry_idx'][k]],
+                'exit_time': index[result['exit_idx'][k]],
+                'entry_price': float(result['entry_price'][k]),
+                'exit_price': float(result['exit_price'][k]),
+                'type': 'long' if result['side'][k] == SIDE_LONG else 'short',
+                'pnl': float(result['pnl'][k]),
+                'exit_reason': EXIT_REASONS[int(result['exit_reason'][k])],
+            })
+        return trades
+
+    def run(self, data: pd.DataFrame, config: Dict[str, Any],
+            timeframe: Optional[str] = None) -> Dict[str, Any]:
+        """Backtest completo su DataFrame, risultato compatibile con simulate_trading"""
+        arrays = arrays_from_frame(data)
+        result = self.run_arrays(arrays, config)
+
+        summary = self.summarize(result)
+        summary['timeframe'] = timeframe
+        summary['trades'] = self.to_trade_records(result, data.index)
+        return summary
@@ -0,0 +1,149 @@
+"""
+Correlation Engine AurumBotX
+Matrice di correlazione simbolo × simbolo calcolata dai rendimenti reali.
+
+La correlazione rolling si ottiene con un unico prodotto matriciale sui
+rendimenti standardizzati; la versione a pesi esponenziali (EW) viene
+aggiornata in O(N²) a ogni nuova candela, senza ricalcolare la storia.
+Un simbolo senza prezzo in una candela (NaN) resta fuori da quell'aggiornamento:
+nessun rendimento 0 fittizio, e il rendimento successivo copre l'intervallo.
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def align_closes(price_history: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Allinea i Close di più simboli sullo stesso indice temporale (inner join)"""
+    closes = {symbol: data['Close'] for symbol, data in price_history.items()
+              if data is not None and not data.empty}
+    return pd.DataFrame(closes).dropna()
+
+
+def log_returns(closes: np.ndarray) -> np.ndarray:
+    """Rendimenti logaritmici (T-1, N) da prezzi allineati (T, N)"""
+    closes = np.asarray(closes, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(closes), axis=0)
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def covariance_to_correlation(covariance: np.ndarray) -> np.ndarray:
+    """Normalizza una covarianza in correlazione; serie piatte → correlazione 0"""
+    std = np.sqrt(np.clip(np.diag(covariance), 0.0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = covariance / np.outer(std, std)
+    correlation = np.nan_to_num(correlation, nan=0.0, posinf=0.0, neginf=0.0)
+    np.clip(correlation, -1.0, 1.0, out=correlation)
+    np.fill_diagonal(correlation, 1.0)
+    return correlation
+
+
+def rolling_correlation(returns: np.ndarray, window: Optional[int] = None) -> np.ndarray:
+    """Correlazione di Pearson sulle ultime `window` righe con un solo prodotto Z.T @ Z"""
+    sample = returns[-window:] if window else returns
+    if len(sample) < 2:
+        return np.eye(sample.shape[1])
+    centered = sample - sample.mean(axis=0)
+    covariance = centered.T @ centered / (len(sample) - 1)
+    return covariance_to_correlation(covariance)
+
+
+class CorrelationEngine:
+    """Correlazione EW incrementale su un universo fisso di simboli"""
+
+    def __init__(self, symbols: List[str], halflife: float = 48.0, min_periods: int = 20):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.halflife = halflife
+        self.alpha = 1 - np.exp(np.log(0.5) / halflife)
+        self.min_periods = min_periods
+
+        n = len(self.symbols)
+        self.mean = np.zeros(n)
+        self.covariance = np.zeros((n, n))
+        self.last_prices: Optional[np.ndarray] = None
+        self.n_observations = 0
+
+    def fit(self, closes: np.ndarray) -> 'CorrelationEngine':
+        """
+        Inizializza lo stato EW dalla storia (T, N) in forma batch: pesi
+        (1-alpha)^k sulle righe, media e covarianza pesate con un prodotto.
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        returns = log_returns(closes)
+        if len(returns):
+            decay = (1 - self.alpha) ** np.arange(len(returns) - 1, -1, -1)
+            weights = decay / decay.sum()
+            self.mean = weights @ returns
+            centered = returns - self.mean
+            self.covariance = (centered * weights[:, None]).T @ centered
+        self.last_prices = closes[-1].copy()
+        self.n_observations = len(returns)
+        return self
+
+    def update(self, prices: np.ndarray) -> np.ndarray:
+        """
+        Aggiorna media e covarianza EW con una nuova riga di prezzi (N,).
+        I prezzi NaN o non positivi sono mancanti: le righe/colonne di quei
+        simboli non cambiano e il loro ultimo prezzo resta quello precedente.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        observed = np.isfinite(prices) & (prices > 0)
+        if self.last_prices is None:
+            self.last_prices = np.where(observed, prices, np.nan)
+            return self.correlation
+
+        observed &= np.isfinite(self.last_prices)
+        if not observed.any():
+            return self.correlation
+        returns = np.log(prices[observed] / self.last_prices[observed])
+        self.last_prices[observed] = prices[observed]
+
+        if observed.all():
+            delta = returns - self.mean
+            self.mean += self.alpha * delta
+            # S_t = (1 - a) * (S_{t-1} + a * d d^T), aggiornamento in-place
+            self.covariance += self.alpha * np.outer(delta, delta)
+            self.covariance *= (1 - self.alpha)
+        else:
+            # Stessa ricorrenza sul solo blocco dei simboli osservati
+            idx = np.flatnonzero(observed)
+            delta = returns - self.mean[idx]
+            self.mean[idx] += self.alpha * delta
+            block = np.ix_(idx, idx)
+            self.covariance[block] = (1 - self.alpha) * (self.covariance[block] + self.alpha * np.outer(delta, delta))
+        self.n_observations += 1
+        return self.correlation
+
+    @property
+    def is_ready(self) -> bool:
+        """True quando ci sono abbastanza osservazioni per fidarsi della stima"""
+        return self.n_observations >= self.min_periods
+
+    @property
+    def correlation(self) -> np.ndarray:
+        """Matrice di correlazione EW corrente (N, N)"""
+        return covariance_to_correlation(self.covariance)
+
+    def get(self, symbol1: str, symbol2: str, default: float = 0.0) -> float:
+        """Correlazione EW tra due simboli"""
+        i, j = self.index.get(symbol1), self.index.get(symbol2)
+        if i is None or j is None:
+            return default
+        if i == j:
+            return 1.0
+        return float(covariance_to_correlation(self.covariance[np.ix_([i, j], [i, j])])[0, 1])
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Formato annidato {simbolo: {simbolo: correlazione}}"""
+        correlation = self.correlation
+        return {
+            s1: {s2: float(correlation[i, j]) for j, s2 in enumerate(self.symbols)}
+            for i, s1 in enumerate(self.symbols)
+        }
@@ -15,8 +15,21 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
+from utils.metrics import counter, histogram
+
 logger = logging.getLogger(__name__)
 
+# Metriche Prometheus del loader (vedi utils.metrics)
+MARKET_DATA_REFRESH = histogram('aurumbotx_market_data_refresh_seconds',
+                                'Market data refresh latency', ('source',)).labels('loader')
+MARKET_DATA_ERRORS = counter('aurumbotx_market_data_errors_total',
+                             'Failed market data fetches', ('source',)).labels('loader')
+MARKET_DATA_CACHE = counter('aurumbotx_market_data_cache_total', 'Historical data cache lookups', ('result',))
+CACHE_HITS = MARKET_DATA_CACHE.labels('hit')
+CACHE_MISSES = MARKET_DATA_CACHE.labels('miss')
+DB_WRITE_HISTORICAL = histogram('aurumbotx_db_write_seconds', 'Database write latency',
+                                ('table',)).labels('historical_data')
+
 class DataLoadError(Exception):
     """Custom exception for data loading errors"""
     pass
@@ -252,9 +265,12 @@ class CryptoDataLoader:
             # Try cache first
             cached_data = self._get_from_cache(cache_key, interval)
             if cached_data is not None and self.data_validator.validate_market_data(cached_data):
+                CACHE_HITS.inc()
                 return cached_data
+            CACHE_MISSES.inc()
 
             if self.use_live_data and self.client:
+                start = time.perf_counter()
                 try:
                     # Calculate start timestamp
                     since = None
@@ -297,6 +313,7 @@ class CryptoDataLoader:
 
                     # Save to cache
                     self._add_to_cache(cache_key, df)
+                    MARKET_DATA_REFRESH.observe(time.perf_counter() - start)
 
                     # Asynchronous database save without waiting
                     asyncio.create_task(self._save_to_database(symbol, df))
@@ -304,6 +321,7 @@ class CryptoDataLoader:
                     return df
 
                 except Exception as e:
+                    MARKET_DATA_ERRORS.inc()
                     logger.error(f"Error fetching live data for {symbol}: {str(e)}")
                     return self._get_mock_data(symbol, period, interval)
 
@@ -377,6 +395,7 @@ class CryptoDataLoader:
         if not self.async_session:
             return
 
+        start = time.perf_counter()
         async with self.async_session() as session:
             try:
                 for _, row in df.iterrows():
@@ -395,6 +414,7 @@ class CryptoDataLoader:
                         'volume': row['Volume']
                     })
                 await session.commit()
+                DB_WRITE_HISTORICAL.observe(time.perf_counter() - start)
             except SQLAlchemyError as e:
                 logger.error(f"Database save error: {e}")
                 await session.rollback()
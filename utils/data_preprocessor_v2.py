@@ -1,82 +1,244 @@
-#!/usr/bin/env python3  
-"""  
-Trade Executor con retry logic e validazione completa  
-"""  
-import asyncio  
-import logging  
-from typing import Dict, Optional  
-from datetime import datetime  
-  
-class RobustTradeExecutor:  
-    def __init__(self, exchange_manager):  
-        self.exchange = exchange_manager  
-        self.logger = logging.getLogger('TradeExecutor')  
-        self.max_retries = 3  
-        self.retry_delay = 2  
-          
-    async def execute_trade(self, signal: Dict) -> Optional[Dict]:  
-        """Esegue trade con retry automatico"""  
-          
-        # 1. Validazione segnale  
-        if not self._validate_signal(signal):  
-            self.logger.warning(f"Segnale non valido: {signal}")  
-            return None  
-          
-        # 2. Verifica limiti di rischio  
-        if not self._check_risk_limits(signal):  
-            self.logger.warning("Limiti di rischio superati")  
-            return None  
-          
-        # 3. Esecuzione con retry  
-        for attempt in range(self.max_retries):  
-            try:  
-                order = await self._place_order(signal)  
-                if order and order.get('status') == 'FILLED':  
-                    self.logger.info(f"✅ Trade eseguito: {order['id']}")  
-                    return order  
-                      
-            except Exception as e:  
-                self.logger.error(f"Tentativo {attempt+1} fallito: {e}")  
-                if attempt < self.max_retries - 1:  
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))  
-                      
-        return None  
-      
-    def _validate_signal(self, signal: Dict) -> bool:  
-        """Valida il segnale di trading"""  
-        required_keys = ['action', 'symbol', 'confidence']  
-          
-        if not all(key in signal for key in required_keys):  
-            return False  
-              
-        if signal['action'] not in ['buy', 'sell']:  
-            return False  
-              
-        if not (0 <= signal['confidence'] <= 1):  
-            return False  
-              
-        return True  
-      
-    def _check_risk_limits(self, signal: Dict) -> bool:  
-        """Verifica limiti di rischio"""  
-        # Implementa logica risk management  
-        min_confidence = 0.65  
-        return signal['confidence'] >= min_confidence  
-      
-    async def _place_order(self, signal: Dict) -> Optional[Dict]:  
-        """Piazza ordine sull'exchange"""  
-        try:  
-            if signal['action'] == 'buy':  
-                order = await self.exchange.create_market_buy_order(  
-                    symbol=signal['symbol'],  
-                    amount=signal.get('amount', 0.0001)  
-                )  
-            else:  
-                order = await self.exchange.create_market_sell_order(  
-                    symbol=signal['symbol'],  
-                    amount=signal.get('amount', 0.0001)  
-                )  
-            return order  
-        except Exception as e:  
-            self.logger.error(f"Errore piazzamento ordine: {e}")  
-            raise
+#!/usr/bin/env python3
+"""
+Data Preprocessor Enterprise - Elimina completamente errori NaN
+
+Due modalità:
+- clean_data: pulizia batch di un intero DataFrame; l'IsolationForest
+  viene riusato tra le chiamate e riaddestrato quando i dati si spostano
+  fuori dalla distribuzione vista (troppe righe segnalate).
+- clean_stream: pulizia incrementale per ciclo; solo le righe nuove
+  vengono controllate, con z-score robusti (mediana/MAD) su una finestra
+  scorrevole ricalcolati ogni refit_every righe. Il costo per nuova
+  candela è costante, indipendente dalla lunghezza dello storico.
+  Le colonne di prezzo sono valutate sui rendimenti logaritmici, non sui
+  livelli: un trend non produce outlier, un picco isolato sì.
+"""
+from typing import Dict, Optional, Any, Sequence, Tuple
+
+import pandas as pd
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+# MAD → deviazione standard per dati normali
+MAD_SCALE = 1.4826
+
+# Colonne valutate sul rendimento logaritmico invece che sul livello
+PRICE_COLUMNS = {'open', 'high', 'low', 'close', 'adj close', 'price'}
+
+
+class StreamingOutlierDetector:
+    """
+    Z-score robusti per colonna su una finestra scorrevole (buffer circolare).
+
+    Le colonne indicate in log_returns (i prezzi) sono valutate sul rendimento
+    logaritmico rispetto alla riga precedente oppure, se questa era anomala,
+    all'ultima riga accettata: dopo un picco isolato la riga successiva non
+    viene scartata, dopo un cambio di livello si perde solo la prima riga.
+    """
+
+    def __init__(self, n_columns: int, window: int = 500, threshold: float = 6.0, refit_every: int = 50,
+                 log_returns: Optional[Sequence[bool]] = None):
+        self.window = window
+        self.threshold = threshold
+        self.refit_every = refit_every
+        self._buffer = np.empty((window, n_columns))
+        self._pos = 0
+        self._count = 0
+        self._since_refit = 0
+        self.median = np.zeros(n_columns)
+        self.scale = np.full(n_columns, np.inf)
+        self.log_returns = np.zeros(n_columns, dtype=bool) if log_returns is None else np.asarray(log_returns, bool)
+        self._has_returns = bool(self.log_returns.any())
+        self._previous: Optional[np.ndarray] = None
+        self._accepted: Optional[np.ndarray] = None
+
+    @property
+    def is_fitted(self) -> bool:
+        return self._count > 0
+
+    def fit(self, values: np.ndarray) -> np.ndarray:
+        """Inizializza la finestra con un blocco di righe e restituisce la maschera degli inlier"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return np.zeros(0, dtype=bool)
+        observed = values
+        if self._has_returns:
+            observed = values.copy()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = np.diff(np.log(values[:, self.log_returns]), axis=0)
+            observed[0, self.log_returns] = 0.0
+            observed[1:, self.log_returns] = np.where(np.isfinite(returns), returns, np.inf)
+        for row in observed[-self.window:]:
+            self._append(row)
+        self.refit()
+        if not self._has_returns:
+            return self.scores(values) <= self.threshold
+
+        # In sequenza come update: dopo una riga anomala si confronta anche con l'ultima accettata
+        inliers = np.empty(len(values), dtype=bool)
+        self._previous = self._accepted = None
+        for i, row in enumerate(values):
+            inliers[i] = self._score_row(row)[0] <= self.threshold
+            self._previous = row
+            if inliers[i]:
+                self._accepted = row
+        return inliers
+
+    def refit(self):
+        """Mediana e MAD della finestra corrente; le colonne costanti non vengono mai segnalate"""
+        values = self._buffer[:self._count]
+        self.median = np.median(values, axis=0)
+        mad = np.median(np.abs(values - self.median), axis=0)
+        self.scale = np.where(mad > 0, MAD_SCALE * mad, np.inf)
+        self._since_refit = 0
+
+    def scores(self, values: np.ndarray) -> np.ndarray:
+        """Massimo z-score robusto per riga"""
+        return np.max(np.abs(values - self.median) / self.scale, axis=-1)
+
+    def _transform(self, row: np.ndarray, reference: Optional[np.ndarray]) -> np.ndarray:
+        """Riga nello spazio dei punteggi: rendimento log per i prezzi (inf se non calcolabile), livello per il resto"""
+        values = row.copy()
+        if reference is None:
+            values[self.log_returns] = 0.0
+            return values
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.log(row[self.log_returns] / reference[self.log_returns])
+        values[self.log_returns] = np.where(np.isfinite(returns), returns, np.inf)
+        return values
+
+    def _score_row(self, row: np.ndarray) -> Tuple[float, np.ndarray]:
+        """(punteggio, riga trasformata rispetto alla precedente) di una nuova riga"""
+        observed = self._transform(row, self._previous)
+        score = self.scores(observed)
+        if score > self.threshold and self._accepted is not self._previous:
+            score = min(score, self.scores(self._transform(row, self._accepted)))
+        return score, observed
+
+    def update(self, row: np.ndarray) -> bool:
+        """Valuta una nuova riga e la aggiunge alla finestra. True se è un outlier"""
+        if not self._has_returns:
+            outlier = bool(self.scores(row) > self.threshold)
+            self._append(row)
+        else:
+            score, observed = self._score_row(row)
+            outlier = bool(score > self.threshold)
+            self._append(observed)
+            self._previous = row
+            if not outlier:
+                self._accepted = row
+        self._since_refit += 1
+        if self._since_refit >= self.refit_every:
+            self.refit()
+        return outlier
+
+    def _append(self, row: np.ndarray):
+        self._buffer[self._pos] = row
+        self._pos = (self._pos + 1) % self.window
+        self._count = min(self._count + 1, self.window)
+
+
+class EnterpriseDataPreprocessor:
+    def __init__(self, window: int = 500, outlier_threshold: float = 6.0, refit_every: int = 50):
+        self.outlier_detector = IsolationForest(contamination=0.1, random_state=42)
+        self._outlier_columns = None
+        # Oltre questa quota di righe anomale il modello non descrive più i dati (es. nuovo livello di prezzo)
+        self.max_outlier_share = 2 * self.outlier_detector.contamination
+
+        # Modalità streaming: un detector e l'ultimo indice visto per flusso (es. simbolo)
+        self.window = window
+        self.outlier_threshold = outlier_threshold
+        self.refit_every = refit_every
+        self.streams: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _drop_invalid(df: pd.DataFrame) -> pd.DataFrame:
+        """Infiniti trattati come NaN, righe con NaN rimosse (una sola copia)"""
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        invalid = df.isna().any(axis=1)
+        if len(numeric_cols) > 0:
+            invalid |= np.isinf(df[numeric_cols].to_numpy(dtype=np.float64)).any(axis=1)
+        return df[~invalid]
+
+    def clean_data(self, data, refit_outliers: bool = False):
+        """Pulizia completa dei dati con eliminazione NaN garantita"""
+        if data is None or (hasattr(data, 'empty') and data.empty):
+            return None
+
+        # 1. Rimuovi colonne con >50% NaN
+        threshold = len(data) * 0.5
+        df = data.dropna(thresh=threshold, axis=1)
+
+        # 2-3. Rimuovi righe con NaN o infiniti
+        df = self._drop_invalid(df)
+
+        # 4. Rimuovi outliers estremi (detector riaddestrato se cambiano le colonne o i dati derivano)
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        if len(numeric_cols) > 0 and len(df) > 10:
+            try:
+                refit = refit_outliers or self._outlier_columns != list(numeric_cols)
+                if not refit:
+                    outlier_mask = self.outlier_detector.predict(df[numeric_cols])
+                    refit = np.mean(outlier_mask == -1) > self.max_outlier_share
+                if refit:
+                    outlier_mask = self.outlier_detector.fit_predict(df[numeric_cols])
+                    self._outlier_columns = list(numeric_cols)
+                df = df[outlier_mask == 1]
+            except ValueError:
+                pass
+
+        # 5. Validazione finale
+        assert not df.isnull().any().any(), "NaN ancora presenti!"
+        assert not np.isinf(df.select_dtypes(include=[np.number]).values).any(), "Infiniti ancora presenti!"
+
+        return df
+
+    def clean_stream(self, data: pd.DataFrame, stream: str = 'default') -> Optional[pd.DataFrame]:
+        """
+        Pulizia incrementale: data può essere l'intera finestra del ciclo,
+        vengono elaborate solo le righe successive all'ultimo indice visto.
+        Restituisce le righe nuove valide e non anomale. La prima chiamata
+        inizializza il detector sulle righe ricevute.
+        """
+        if data is None or data.empty:
+            return None
+
+        state = self.streams.get(stream)
+        if state is not None:
+            if data.index.is_monotonic_increasing:
+                data = data.iloc[data.index.searchsorted(state['last_index'], side='right'):]
+            else:
+                data = data[data.index > state['last_index']]
+            if data.empty:
+                return data
+            if not set(state['columns']).issubset(data.columns):
+                # Manca una colonna tracciata: il flusso viene registrato di nuovo sulle colonne ricevute
+                state = None
+        last_index = data.index[-1]
+
+        if state is None:
+            numeric_cols = tuple(data.select_dtypes(include=[np.number]).columns)
+            detector = StreamingOutlierDetector(len(numeric_cols), self.window,
+                                                self.outlier_threshold, self.refit_every,
+                                                [str(col).lower() in PRICE_COLUMNS for col in numeric_cols])
+            df = self._drop_invalid(data)
+            if not df.empty:
+                df = df[detector.fit(df[list(numeric_cols)].to_numpy(dtype=np.float64))]
+            self.streams[stream] = {'detector': detector, 'columns': numeric_cols, 'last_index': last_index}
+            return df
+
+        state['last_index'] = last_index
+        detector = state['detector']
+        if tuple(data.columns) == state['columns']:
+            # Caso comune (solo colonne numeriche): niente selezione di colonne pandas
+            values = data.to_numpy(dtype=np.float64)
+            keep = np.isfinite(values).all(axis=1)
+        else:
+            values = data[list(state['columns'])].to_numpy(dtype=np.float64)
+            keep = np.isfinite(values).all(axis=1) & data.notna().all(axis=1).to_numpy()
+        if not detector.is_fitted:
+            keep[keep] = detector.fit(values[keep])
+            return data[keep]
+        for i in np.flatnonzero(keep):
+            keep[i] = not detector.update(values[i])
+        return data if keep.all() else data[keep]
@@ -0,0 +1,114 @@
+"""
+Feature Graph AurumBotX
+Grafo delle dipendenze tra colonne di feature.
+
+Ogni nodo dichiara le colonne da cui dipende e una funzione che le riceve
+come Series. Per un insieme di feature richieste il grafo calcola solo gli
+antenati necessari, in ordine topologico e una sola volta ciascuno: gli
+intermedi condivisi (rendimenti, medie mobili, deviazioni standard, EMA)
+non vengono più ricalcolati da ogni gruppo di feature.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Any
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class FeatureNode:
+    name: str
+    inputs: Tuple[str, ...]
+    func: Callable[..., pd.Series]
+    output: bool
+
+
+class FeatureGraph:
+    """Registro dei nodi con risoluzione delle dipendenze e calcolo memoizzato per chiamata"""
+
+    def __init__(self, sources: Iterable[str]):
+        self.sources = set(sources)
+        self.nodes: Dict[str, FeatureNode] = {}
+        self._plans: Dict[Tuple[str, ...], List[str]] = {}
+
+    def add(self, name: str, inputs: Iterable[str], func: Callable[..., pd.Series], output: bool = True):
+        """Registra un nodo; output=False per gli intermedi che non finiscono tra le feature"""
+        inputs = tuple(inputs)
+        for dependency in inputs:
+            if dependency not in self.nodes and dependency not in self.sources:
+                raise ValueError(f"Feature {name}: input sconosciuto {dependency}")
+        self.nodes[name] = FeatureNode(name, inputs, func, output)
+        self._plans.clear()
+
+    @property
+    def outputs(self) -> List[str]:
+        """Feature pubbliche nell'ordine di dichiarazione"""
+        return [name for name, node in self.nodes.items() if node.output]
+
+    def plan(self, targets: Iterable[str]) -> List[str]:
+        """Nodi da calcolare per le feature richieste, in ordine topologico"""
+        key = tuple(targets)
+        if key not in self._plans:
+            order, seen = [], set()
+
+            def visit(name: str):
+                if name in seen or name in self.sources:
+                    return
+                seen.add(name)
+                for dependency in self.nodes[name].inputs:
+                    visit(dependency)
+                order.append(name)
+
+            for name in key:
+                if name in self.nodes:
+                    visit(name)
+            self._plans[key] = order
+        return self._plans[key]
+
+    def compute(self, data: pd.DataFrame, targets: Optional[Iterable[str]] = None) -> Dict[str, pd.Series]:
+        """
+        Calcola le feature richieste (tutte le pubbliche se None) e i loro
+        intermedi. I nodi che dipendono da una colonna sorgente assente in
+        data vengono saltati insieme ai loro discendenti.
+        """
+        targets = self.outputs if targets is None else [name for name in targets if name in self.nodes]
+        values: Dict[str, Any] = {name: data[name] for name in self.sources if name in data.columns}
+        for name in self.plan(targets):
+            node = self.nodes[name]
+            if all(dependency in values for dependency in node.inputs):
+                values[name] = node.func(*(values[dependency] for dependency in node.inputs))
+        return {name: values[name] for name in targets if name in values}
+
+
+class FeatureMemo:
+    """Cache LRU delle feature già calcolate per (simbolo, ultima barra, feature richieste)"""
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple, pd.DataFrame]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(data: pd.DataFrame, symbol: str, targets: Optional[Iterable[str]]) -> Tuple:
+        """L'ultima barra comprende i suoi valori: una candela ancora aperta cambia chiave"""
+        last = data.iloc[-1]
+        bar = data['timestamp'].iloc[-1] if 'timestamp' in data.columns else data.index[-1]
+        values = tuple(float(last[col]) for col in ('open', 'high', 'low', 'close', 'volume') if col in data.columns)
+        return symbol, str(bar), len(data), values, tuple(targets) if targets is not None else None
+
+    def get(self, key: Tuple) -> Optional[pd.DataFrame]:
+        frame = self._entries.get(key)
+        if frame is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return frame
+
+    def put(self, key: Tuple, frame: pd.DataFrame):
+        self._entries[key] = frame
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
@@ -0,0 +1,254 @@
+"""
+Feature State AurumBotX
+Stato incrementale per simbolo delle 26 feature di PredictionModel.
+
+Ogni nuova candela aggiorna medie mobili, EMA, RSI, bande, ATR e OBV in
+tempo costante e scrive il risultato in un vettore 1×26 preallocato, con
+gli stessi valori di PredictionModel.build_feature_matrix sull'ultima riga.
+
+L'ultima candela ricevuta è provvisoria (la kline corrente di Binance è
+ancora aperta): lo stato precedente resta in un checkpoint e, al frame o
+alla candela successivi, viene ripristinato e la candela riapplicata con
+i valori aggiornati, oppure consolidata così com'era se nel nuovo input
+non compare più.
+"""
+
+import math
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+import pandas as pd
+
+
+class _Window:
+    """Finestra circolare a lunghezza fissa (rolling di pandas, NaN finché non è piena)"""
+    __slots__ = ('buffer', 'period', 'count', 'pos')
+
+    def __init__(self, period: int):
+        self.buffer = np.zeros(period)
+        self.period = period
+        self.count = 0
+        self.pos = 0
+
+    def push(self, value: float):
+        self.buffer[self.pos] = value
+        self.pos = (self.pos + 1) % self.period
+        self.count += 1
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.period
+
+    def mean(self) -> float:
+        return float(self.buffer.mean()) if self.full else math.nan
+
+    def std(self) -> float:
+        return float(self.buffer.std(ddof=1)) if self.full else math.nan
+
+
+class _Ema:
+    """EMA con adjust=False, inizializzata al primo valore"""
+    __slots__ = ('alpha', 'value')
+
+    def __init__(self, span: int):
+        self.alpha = 2.0 / (span + 1)
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> float:
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class _EwmStd:
+    """Deviazione standard EWM con adjust=True e correzione del bias (ewm(span).std())"""
+    __slots__ = ('decay', 'sum_w', 'sum_w2', 'sum_x', 'sum_xx')
+
+    def __init__(self, span: int):
+        self.decay = 1 - 2.0 / (span + 1)
+        self.sum_w = self.sum_w2 = self.sum_x = self.sum_xx = 0.0
+
+    def update(self, x: float) -> float:
+        d = self.decay
+        self.sum_w = self.sum_w * d + 1.0
+        self.sum_w2 = self.sum_w2 * d * d + 1.0
+        self.sum_x = self.sum_x * d + x
+        self.sum_xx = self.sum_xx * d + x * x
+
+        denominator = self.sum_w * self.sum_w - self.sum_w2
+        if denominator <= 0:
+            return math.nan
+        mean = self.sum_x / self.sum_w
+        biased = max(self.sum_xx / self.sum_w - mean * mean, 0.0)
+        return math.sqrt(biased * self.sum_w * self.sum_w / denominator)
+
+
+def _clone(value: Any) -> Any:
+    """Copia di un accumulatore (o di un dict di accumulatori) senza deepcopy"""
+    if isinstance(value, dict):
+        return {key: _clone(item) for key, item in value.items()}
+    if not hasattr(type(value), '__slots__'):
+        return value
+    clone = object.__new__(type(value))
+    for slot in type(value).__slots__:
+        item = getattr(value, slot)
+        setattr(clone, slot, item.copy() if isinstance(item, np.ndarray) else item)
+    return clone
+
+
+class FeatureState:
+    """Feature di un simbolo aggiornate candela per candela"""
+
+    # Attributi che descrivono lo stato (salvati nel checkpoint prima della candela provvisoria)
+    _STATE = ('last_timestamp', 'n_bars', '_prev_close', '_sma', '_ema', '_ema_fast', '_ema_slow',
+              '_macd_signal', '_gains', '_losses', '_true_range', '_volume', '_volatility', '_obv')
+
+    def __init__(self, feature_names: List[str]):
+        self.feature_names = list(feature_names)
+        self.vector = np.zeros((1, len(self.feature_names)))
+        self.last_timestamp = None
+        self.n_bars = 0
+        # Candela provvisoria (timestamp, OHLCV) e stato prima di applicarla
+        self._pending: Optional[tuple] = None
+        self._checkpoint: Optional[tuple] = None
+
+        self._prev_close: Optional[float] = None
+        self._sma = {period: _Window(period) for period in (20, 50, 200)}
+        self._ema = {period: _Ema(period) for period in (20, 50, 200)}
+        self._ema_fast, self._ema_slow, self._macd_signal = _Ema(12), _Ema(26), _Ema(9)
+        self._gains = {period: _Window(period) for period in (14, 28)}
+        self._losses = {period: _Window(period) for period in (14, 28)}
+        self._true_range = _Window(14)
+        self._volume = _Window(20)
+        self._volatility = _EwmStd(20)
+        self._obv = 0.0
+
+    def update(self, open_: float, high: float, low: float, close: float, volume: float,
+               timestamp: Any = None) -> np.ndarray:
+        """Aggiunge una candela e ritorna il vettore 1×26 aggiornato (stesso buffer)"""
+        prev = self._prev_close
+        returns = close / prev - 1 if prev else math.nan
+        delta = close - prev if prev is not None else 0.0
+
+        for period in (20, 50, 200):
+            self._sma[period].push(close)
+            self._ema[period].update(close)
+
+        macd = self._ema_fast.update(close) - self._ema_slow.update(close)
+        macd_signal = self._macd_signal.update(macd)
+
+        rsi = {}
+        for period in (14, 28):
+            self._gains[period].push(delta if delta > 0 else 0.0)
+            self._losses[period].push(-delta if delta < 0 else 0.0)
+            gain, loss = self._gains[period].mean(), self._losses[period].mean()
+            if loss > 0:
+                rsi[period] = 100 - 100 / (1 + gain / loss)
+            else:
+                rsi[period] = 100.0 if gain > 0 else math.nan
+
+        if prev is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - prev), abs(low - prev))
+        self._true_range.push(true_range)
+
+        self._volume.push(volume)
+        volume_ma = self._volume.mean()
+
+        if delta > 0:
+            self._obv += volume
+        elif delta < 0:
+            self._obv -= volume
+
+        bb_middle = self._sma[20].mean()
+        bb_std = self._sma[20].std()
+        bb_upper = bb_middle + 2 * bb_std
+        bb_lower = bb_middle - 2 * bb_std
+
+        values = {
+            'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume,
+            'returns': returns,
+            'volatility': self._volatility.update(returns if prev else 0.0) * math.sqrt(252),
+            'sma_20': bb_middle, 'ema_20': self._ema[20].value,
+            'sma_50': self._sma[50].mean(), 'ema_50': self._ema[50].value,
+            'sma_200': self._sma[200].mean(), 'ema_200': self._ema[200].value,
+            'macd': macd, 'macd_signal': macd_signal, 'macd_hist': macd - macd_signal,
+            'rsi_14': rsi[14], 'rsi_28': rsi[28],
+            'bb_middle': bb_middle, 'bb_upper': bb_upper, 'bb_lower': bb_lower,
+            'bb_width': (bb_upper - bb_lower) / bb_middle if bb_middle else math.nan,
+            'atr': self._true_range.mean(),
+            'volume_ma': volume_ma,
+            'volume_ratio': volume / volume_ma if volume_ma else math.nan,
+            'obv': self._obv,
+        }
+
+        # Stessa convenzione di build_feature_matrix: valori non finiti → 0
+        row = self.vector[0]
+        for i, name in enumerate(self.feature_names):
+            value = values.get(name, 0.0)
+            row[i] = value if value is not None and math.isfinite(value) else 0.0
+
+        self._prev_close = close
+        self.last_timestamp = timestamp
+        self.n_bars += 1
+        return self.vector
+
+    def _snapshot(self) -> tuple:
+        return {name: _clone(getattr(self, name)) for name in self._STATE}, self.vector.copy()
+
+    def _restore(self, snapshot: tuple):
+        state, vector = snapshot
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.vector[:] = vector
+
+    def _advance(self, bars: List[tuple]) -> np.ndarray:
+        """
+        Applica le candele (timestamp, open, high, low, close, volume) in ordine
+        temporale: quelle già consolidate sono ignorate, l'ultima resta provvisoria.
+        Candele senza timestamp sono sempre nuove e consolidate subito.
+        """
+        if self._pending is not None:
+            if any(bar[0] == self._pending[0] for bar in bars):
+                # La candela provvisoria torna con nuovi valori: stato di prima e riapplicazione
+                self._restore(self._checkpoint)
+            # Altrimenti resta consolidata con gli ultimi valori visti
+            self._pending = self._checkpoint = None
+
+        if self.last_timestamp is not None:
+            bars = [bar for bar in bars if bar[0] is None or bar[0] > self.last_timestamp]
+        if not bars:
+            return self.vector
+
+        for timestamp, open_, high, low, close, volume in bars[:-1]:
+            self.update(open_, high, low, close, volume, timestamp)
+
+        last = bars[-1]
+        if last[0] is not None:
+            self._checkpoint = self._snapshot()
+            self._pending = last
+        return self.update(*last[1:], last[0])
+
+    def update_frame(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Aggiunge le candele di df successive all'ultima consolidata; anche con
+        finestre che non contengono più l'ultima candela vista o con buchi
+        nessuna candela è elaborata due volte. L'ultima riga resta provvisoria.
+        """
+        columns = df[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy(dtype=np.float64)
+        return self._advance([(timestamp, *row) for timestamp, row in zip(df.index, columns.tolist())])
+
+    def update_candle(self, candle: Dict[str, Any]) -> np.ndarray:
+        """
+        Aggiunge una candela da dict (colonne OHLCV oppure 'price'/'volume').
+        Con 'timestamp' la candela è provvisoria come l'ultima riga di update_frame.
+        """
+        close = float(candle.get('Close', candle.get('close', candle.get('price', 0.0))))
+        return self._advance([(
+            candle.get('timestamp'),
+            float(candle.get('Open', candle.get('open', close))),
+            float(candle.get('High', candle.get('high', close))),
+            float(candle.get('Low', candle.get('low', close))),
+            close,
+            float(candle.get('Volume', candle.get('volume', 0.0))),
+        )])
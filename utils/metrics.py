@@ -0,0 +1,282 @@
+"""
+Metrics AurumBotX
+Registro in-process di metriche (counter, gauge, histogram) esposto nel
+formato testuale di Prometheus (0.0.4).
+
+Le osservazioni sono pensate per i percorsi caldi (ordini, dati di mercato,
+segnali): nessun lock, nessuna allocazione, solo un incremento su una lista
+e una bisect sui bucket fissi dell'istogramma (~0.2-0.4µs). Sotto il GIL
+un incremento concorrente può raramente andare perso; i valori restano
+monotoni e lo scrape resta coerente. I figli con etichette vanno ricavati
+una volta (es. a livello di modulo) e riusati: labels() costa una lookup
+in un dict per chiamata.
+"""
+
+import math
+import time
+import logging
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Bucket di latenza in secondi: da 0.5ms (DB locale) a 30s (API esterne lente)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class _CounterValue:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _GaugeValue:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+
+class _Timer:
+    """Context manager che osserva la durata del blocco in secondi"""
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram: '_HistogramValue'):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _HistogramValue:
+    """Conteggi per bucket non cumulativi (l'ultimo è +Inf) e somma; il cumulato si calcola allo scrape"""
+    __slots__ = ('_bounds', '_counts', '_sum')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+
+    def observe(self, value: float):
+        # bisect_left: primo limite >= value, cioè il bucket "le" di Prometheus
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self._sum += value
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        return list(self._counts), self._sum
+
+
+class _Metric:
+    """Famiglia di metriche: senza etichette fa da valore, con etichette crea i figli"""
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: attese etichette {self.labelnames}, ricevute {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self):
+        """(label values, figlio) da esportare"""
+        if self.labelnames:
+            return list(self._children.items())
+        return [((), self)]
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {_escape(self.documentation)}', f'# TYPE {self.name} {self.type}']
+        for values, child in self._samples():
+            lines.append(f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}')
+        return lines
+
+
+class Counter(_Metric, _CounterValue):
+    """Contatore monotono (per convenzione il nome finisce in _total)"""
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        _Metric.__init__(self, name, documentation, labelnames)
+        _CounterValue.__init__(self)
+
+    def _new_child(self):
+        return _CounterValue()
+
+
+class Gauge(_Metric, _GaugeValue):
+    """Valore istantaneo che può salire e scendere"""
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        _Metric.__init__(self, name, documentation, labelnames)
+        _GaugeValue.__init__(self)
+
+    def _new_child(self):
+        return _GaugeValue()
+
+
+class Histogram(_Metric, _HistogramValue):
+    """Distribuzione su bucket fissi (limiti superiori inclusivi)"""
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        bounds = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+        if not bounds:
+            raise ValueError(f"{name}: serve almeno un bucket finito")
+        _Metric.__init__(self, name, documentation, labelnames)
+        _HistogramValue.__init__(self, bounds)
+
+    def _new_child(self):
+        return _HistogramValue(self._bounds)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {_escape(self.documentation)}', f'# TYPE {self.name} histogram']
+        les = [_format_value(bound) for bound in self._bounds] + ['+Inf']
+        for values, child in self._samples():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for le, count in zip(les, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ('le',), values + (le,))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """Metriche per nome: chiedere due volte lo stesso nome restituisce la stessa famiglia"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metrica {name} già registrata come {metric.type} {metric.labelnames}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Esposizione testuale Prometheus di tutte le metriche registrate"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Registro di processo usato da engine, loader e monitor
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.counter(name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.gauge(name, documentation, labelnames)
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(name, documentation, labelnames, buckets)
+
+
+def start_http_server(port: int, addr: str = '0.0.0.0', registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """Espone /metrics da un thread daemon, per i processi senza un server API proprio"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    logger.info(f"Metriche esposte su http://{addr}:{port}/metrics")
+    return server
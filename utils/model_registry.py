@@ -0,0 +1,178 @@
+"""
+Model Registry AurumBotX
+Registro su disco dei modelli addestrati di PredictionModel.
+
+Ogni artefatto (modelli, scaler, metriche, feature importance) è salvato
+sotto la chiave hash di (schema delle feature, impronta dei dati di
+training, iperparametri). All'avvio un processo rilegge l'artefatto
+corrispondente invece di riaddestrare; i retraining in background
+pubblicano nuove versioni con scritture atomiche e aggiornano il
+puntatore "latest" della famiglia (stesso schema e iperparametri).
+Gli artefatti sono nel formato di utils.shared_models: i processi che
+caricano la stessa versione ne condividono gli array via mmap.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from utils.backtest_cache import _canonical_value, fingerprint_frame
+from utils.shared_models import save_shared, load_shared
+
+logger = logging.getLogger(__name__)
+
+# Un lock più vecchio di così appartiene a un processo terminato
+LOCK_TIMEOUT = 3600
+
+
+def closed_bars(data: pd.DataFrame) -> pd.DataFrame:
+    """Solo le candele chiuse: l'ultima riga di un fetch live è la candela ancora in corso"""
+    return data.iloc[:-1] if len(data) > 1 else data
+
+
+def fingerprint_training_data(data: pd.DataFrame, symbol: str = '', interval: str = '') -> Dict[str, Any]:
+    """
+    Impronta dei dati di training: range e ultima candela più hash di tutti i
+    valori OHLCV, sulle sole candele chiuse e con la fine della finestra
+    arrotondata all'intervallo. Due avvii nella stessa candela danno la
+    stessa chiave anche se la candela in corso è cambiata nel frattempo.
+    """
+    data = closed_bars(data)
+    columns = [col for col in ('Open', 'High', 'Low', 'Close', 'Volume') if col in data.columns]
+    values = np.ascontiguousarray(data[columns].to_numpy(dtype=np.float64))
+    fingerprint = fingerprint_frame(data, symbol, interval)
+    fingerprint['end'] = _bucket_end(data.index[-1], interval)
+    fingerprint['digest'] = hashlib.blake2b(values.tobytes(), digest_size=16).hexdigest()
+    return fingerprint
+
+
+def _bucket_end(end: Any, interval: str) -> str:
+    """Fine della finestra arrotondata all'inizio della sua candela ('1h', '15m', '1d', ...)"""
+    if isinstance(end, pd.Timestamp) and interval:
+        try:
+            return str(end.floor(pd.Timedelta(interval)))
+        except ValueError:
+            pass
+    return str(end)
+
+
+def _hash(payload: Dict[str, Any]) -> str:
+    text = json.dumps(_canonical_value(payload), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ModelRegistry:
+    """Artefatti joblib indirizzati per contenuto, con puntatore latest per famiglia"""
+
+    def __init__(self, registry_dir: str = 'cache/models'):
+        self.registry_dir = Path(registry_dir)
+        self.registry_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def family_key(feature_schema: Dict[str, Any], hyperparams: Dict[str, Any]) -> str:
+        """Hash di schema feature, iperparametri e versione di sklearn (formato dei pickle)"""
+        return _hash({
+            'schema': feature_schema,
+            'hyperparams': hyperparams,
+            'sklearn': sklearn.__version__,
+        })
+
+    @classmethod
+    def make_key(cls, feature_schema: Dict[str, Any], fingerprint: Dict[str, Any],
+                 hyperparams: Dict[str, Any]) -> str:
+        """Chiave di un artefatto: famiglia più impronta dei dati di training"""
+        return _hash({'family': cls.family_key(feature_schema, hyperparams), 'data': fingerprint})
+
+    def _artifact_path(self, key: str) -> Path:
+        return self.registry_dir / key[:2] / f"{key}.joblib"
+
+    def _latest_path(self, family: str) -> Path:
+        return self.registry_dir / f"latest-{family}.json"
+
+    def _write_atomic(self, path: Path, write):
+        """Scrive su un file temporaneo nella stessa directory e lo rinomina"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+    def path(self, key: str) -> Optional[Path]:
+        """Percorso dell'artefatto della chiave, senza caricarlo; None se assente"""
+        path = self._artifact_path(key)
+        return path if path.exists() else None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Artefatto della chiave o None se assente o illeggibile"""
+        path = self._artifact_path(key)
+        if not path.exists():
+            return None
+        try:
+            return load_shared(path)
+        except Exception as e:
+            logger.warning(f"Artefatto {key[:12]} illeggibile: {e}")
+            return None
+
+    def latest_key(self, family: str, max_age: Optional[float] = None) -> Optional[str]:
+        """Chiave dell'ultima versione pubblicata della famiglia, se non più vecchia di max_age secondi"""
+        try:
+            with open(self._latest_path(family), 'r') as f:
+                pointer = json.load(f)
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+        if max_age is not None and time.time() - pointer.get('published_at', 0) > max_age:
+            return None
+        return pointer['key'] if self.path(pointer['key']) is not None else None
+
+    def latest(self, family: str, max_age: Optional[float] = None) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(chiave, artefatto) dell'ultima versione pubblicata della famiglia, se non più vecchia di max_age secondi"""
+        key = self.latest_key(family, max_age)
+        artifact = self.get(key) if key is not None else None
+        return (key, artifact) if artifact is not None else None
+
+    def publish(self, key: str, family: str, artifact: Dict[str, Any]):
+        """Salva l'artefatto e poi sposta il puntatore latest: i lettori vedono solo versioni complete"""
+        save_shared(artifact, self._artifact_path(key))
+
+        pointer = {'key': key, 'published_at': time.time(), 'metrics': _canonical_value(artifact.get('metrics', {}))}
+
+        def write_pointer(tmp):
+            with open(tmp, 'w') as f:
+                json.dump(pointer, f)
+
+        self._write_atomic(self._latest_path(family), write_pointer)
+        logger.info(f"Modello {key[:12]} pubblicato nel registro")
+
+    def try_lock(self, key: str) -> bool:
+        """Prenota il training di una chiave tra processi (False se un altro lo sta già facendo)"""
+        path = self.registry_dir / f"{key}.lock"
+        try:
+            if time.time() - path.stat().st_mtime > LOCK_TIMEOUT:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        return True
+
+    def release(self, key: str):
+        try:
+            (self.registry_dir / f"{key}.lock").unlink()
+        except FileNotFoundError:
+            pass
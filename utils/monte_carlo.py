@@ -0,0 +1,170 @@
+"""
+Monte Carlo Engine AurumBotX
+Simulazione vettoriale di migliaia di equity path per le strategie wallet.
+
+Riproduce il modello di esito di wallet_runner.execute_trade (win rate +
+distribuzioni uniformi di P&L, fee sulla posizione) e, in alternativa, il
+modello bracket stop loss / take profit di ai_autonomous_always_on.
+Tutti i path avanzano insieme a blocchi di step, con memoria costante.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WalletSimulationParams:
+    """Parametri del modello di trading simulato (percentuali come in config)"""
+    initial_capital: float = 100.0
+    position_size_pct: float = 30.0
+    fee_pct: float = 0.1
+    confidence_threshold: float = 0.5
+    confidence_range: Tuple[float, float] = (35.0, 75.0)
+    pairs_per_cycle: int = 5
+    outcome_model: str = 'binary'
+    # Modello 'binary' (wallet_runner)
+    win_probability: float = 0.75
+    win_pnl_range: Tuple[float, float] = (0.5, 3.5)
+    loss_pnl_range: Tuple[float, float] = (-2.0, -0.3)
+    # Modello 'bracket' (ai_autonomous_always_on)
+    volatility: float = 0.04
+    stop_loss_pct: float = 3.5
+    take_profit_pct: float = 6.0
+    max_drawdown_limit_pct: Optional[float] = None
+
+    @property
+    def trade_probability(self) -> float:
+        """Probabilità che una coppia superi la soglia di confidenza in un ciclo"""
+        low, high = self.confidence_range
+        threshold = self.confidence_threshold * 100
+        if high <= low:
+            return 1.0 if low > threshold else 0.0
+        return float(np.clip((high - threshold) / (high - low), 0.0, 1.0))
+
+    @classmethod
+    def from_wallet_config(cls, config: Dict[str, Any], **overrides) -> 'WalletSimulationParams':
+        """Costruisce i parametri da un file config/wallet_*.json"""
+        params = cls(
+            initial_capital=config.get('initial_capital', 100.0),
+            position_size_pct=config.get('risk_management', {}).get('max_position_size_percentage', 30.0),
+            fee_pct=config.get('execution_parameters', {}).get('fee_percentage', 0.1),
+            confidence_threshold=config.get('ai_configuration', {}).get('confidence_threshold', 0.5),
+            pairs_per_cycle=len(config.get('trading_pairs', [])) or 1,
+            max_drawdown_limit_pct=config.get('risk_management', {}).get('max_drawdown_percentage'),
+        )
+        # Sezione opzionale "monte_carlo" nel config per sovrascrivere le distribuzioni
+        for key, value in {**config.get('monte_carlo', {}), **overrides}.items():
+            if hasattr(params, key):
+                setattr(params, key, tuple(value) if isinstance(value, list) else value)
+        return params
+
+
+class MonteCarloEngine:
+    """Simula n_paths equity path in parallelo con NumPy"""
+
+    def __init__(self, n_paths: int = 10000, ruin_threshold: float = 0.5,
+                 block_size: int = 256, seed: Optional[int] = None):
+        self.n_paths = n_paths
+        self.ruin_threshold = ruin_threshold
+        self.block_size = block_size
+        self.rng = np.random.default_rng(seed)
+
+    def _trade_returns(self, params: WalletSimulationParams,
+                       shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Rendimento netto sulla posizione per ogni step (0 se nessun trade) e maschera trade"""
+        rng = self.rng
+        traded = rng.random(shape) < params.trade_probability
+        fee = params.fee_pct / 100
+
+        if params.outcome_model == 'binary':
+            is_win = rng.random(shape) < params.win_probability
+            wins = rng.uniform(*params.win_pnl_range, size=shape)
+            losses = rng.uniform(*params.loss_pnl_range, size=shape)
+            pnl = np.where(is_win, wins, losses) / 100
+        elif params.outcome_model == 'bracket':
+            vol = params.volatility
+            change = rng.uniform(-vol, vol * 1.5, size=shape)
+            pnl = np.clip(change, -params.stop_loss_pct / 100, params.take_profit_pct / 100)
+        else:
+            raise ValueError(f"Modello di esito non supportato: {params.outcome_model}")
+
+        return np.where(traded, pnl - fee, 0.0), traded
+
+    def simulate(self, params: WalletSimulationParams, n_cycles: int) -> Dict[str, Any]:
+        """Simula n_cycles cicli × coppie per tutti i path e riassume le distribuzioni"""
+        n_steps = n_cycles * params.pairs_per_cycle
+        size_frac = params.position_size_pct / 100
+        initial = float(params.initial_capital)
+
+        capital = np.full(self.n_paths, initial)
+        peak = capital.copy()
+        max_drawdown = np.zeros(self.n_paths)
+        ruined = np.zeros(self.n_paths, dtype=bool)
+        trades = np.zeros(self.n_paths, dtype=np.int64)
+        wins = np.zeros(self.n_paths, dtype=np.int64)
+        ruin_level = initial * self.ruin_threshold
+
+        done = 0
+        while done < n_steps:
+            steps = min(self.block_size, n_steps - done)
+            returns, traded = self._trade_returns(params, (self.n_paths, steps))
+
+            # capital_k = capital_{k-1} * (1 + size * r_k): prodotto cumulato nel blocco
+            equity = capital[:, None] * np.cumprod(1 + size_frac * returns, axis=1)
+            block_peak = np.maximum(np.maximum.accumulate(equity, axis=1), peak[:, None])
+            drawdown = (equity / block_peak - 1).min(axis=1)
+
+            max_drawdown = np.minimum(max_drawdown, drawdown)
+            ruined |= (equity <= ruin_level).any(axis=1)
+            trades += traded.sum(axis=1)
+            wins += (traded & (returns > 0)).sum(axis=1)
+
+            capital = equity[:, -1]
+            peak = block_peak[:, -1]
+            done += steps
+
+        return self.summarize(params, capital, max_drawdown, ruined, trades, wins, n_cycles)
+
+    def summarize(self, params: WalletSimulationParams, capital: np.ndarray, max_drawdown: np.ndarray,
+                  ruined: np.ndarray, trades: np.ndarray, wins: np.ndarray, n_cycles: int) -> Dict[str, Any]:
+        """Percentili di capitale finale e drawdown, probabilità di rovina"""
+        percentiles = [1, 5, 25, 50, 75, 95, 99]
+        initial = params.initial_capital
+        roi = (capital - initial) / initial * 100
+
+        report = {
+            'n_paths': self.n_paths,
+            'n_cycles': n_cycles,
+            'initial_capital': initial,
+            'final_capital': {
+                'mean': float(capital.mean()),
+                'std': float(capital.std()),
+                'percentiles': {p: float(v) for p, v in zip(percentiles, np.percentile(capital, percentiles))},
+            },
+            'roi_pct': {
+                'mean': float(roi.mean()),
+                'percentiles': {p: float(v) for p, v in zip(percentiles, np.percentile(roi, percentiles))},
+            },
+            'max_drawdown_pct': {
+                'mean': float(-max_drawdown.mean() * 100),
+                'percentiles': {p: float(v) for p, v in
+                                zip(percentiles, np.percentile(-max_drawdown * 100, percentiles))},
+            },
+            'ruin_probability': float(ruined.mean()),
+            'ruin_threshold': self.ruin_threshold,
+            'loss_probability': float((capital < initial).mean()),
+            'avg_trades': float(trades.mean()),
+            'win_rate': float(wins.sum() / trades.sum()) if trades.sum() > 0 else 0.0,
+        }
+
+        if params.max_drawdown_limit_pct is not None:
+            report['drawdown_limit_breach_probability'] = float(
+                (-max_drawdown * 100 > params.max_drawdown_limit_pct).mean()
+            )
+
+        return report
@@ -0,0 +1,153 @@
+"""
+Parallel Training AurumBotX
+Cross-validation e fit dei modelli di PredictionModel su un pool di processi.
+
+La matrice delle feature e il target vengono copiati una sola volta in
+shared memory (SharedMarketData); i task fold × modello ricevono solo
+l'estimatore non addestrato e gli estremi del fold. Il refit finale su
+tutti i dati usa il parallelismo interno del modello dove disponibile.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import TimeSeriesSplit
+
+from utils.parameter_sweep import SharedMarketData
+
+logger = logging.getLogger(__name__)
+
+# Stato del worker: impostato una volta da _init_worker
+_WORKER_SHM = None
+_WORKER_X = None
+_WORKER_Y = None
+
+
+def _init_worker(descriptor: Dict[str, Any], n_features: int):
+    """Initializer del pool: aggancia X e y condivisi una sola volta per processo"""
+    global _WORKER_SHM, _WORKER_X, _WORKER_Y
+    _WORKER_SHM, datasets = SharedMarketData.attach(descriptor)
+    _WORKER_X = datasets['training']['X'].reshape(-1, n_features)
+    _WORKER_Y = datasets['training']['y']
+
+
+def _fit(estimator, X: np.ndarray, y: np.ndarray, name: str, fold: Optional[int],
+         train_end: int, val_end: Optional[int]) -> Dict[str, Any]:
+    """Addestra su X[:train_end]; se val_end è dato valuta r2 su X[train_end:val_end]"""
+    cpu_start = time.process_time()
+    estimator.fit(X[:train_end], y[:train_end])
+
+    result = {'name': name, 'fold': fold, 'score': None, 'model': None}
+    if val_end is not None:
+        pred = estimator.predict(X[train_end:val_end])
+        result['score'] = float(r2_score(y[train_end:val_end], pred))
+    else:
+        result['model'] = estimator
+    result['cpu_time'] = time.process_time() - cpu_start
+    return result
+
+
+def _fit_task(task: Tuple) -> Dict[str, Any]:
+    """Esegue un task di fit nel worker sui dati condivisi"""
+    estimator, name, fold, train_end, val_end = task
+    return _fit(estimator, _WORKER_X, _WORKER_Y, name, fold, train_end, val_end)
+
+
+class ParallelTrainer:
+    """Scheduler fold × modello su ProcessPoolExecutor, con refit finale su tutti i dati"""
+
+    def __init__(self, n_splits: int = 5, n_jobs: Optional[int] = None):
+        self.n_splits = n_splits
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+
+    def _build_tasks(self, models: Dict[str, Any], n_samples: int) -> Tuple[List[Tuple], List[Tuple]]:
+        """
+        Due fasi: (1) task CV a thread singolo più i refit dei modelli senza
+        parallelismo interno, (2) refit dei modelli con n_jobs su tutti i core,
+        lanciati quando il pool si è liberato.
+        """
+        first, second = [], []
+        splitter = TimeSeriesSplit(n_splits=self.n_splits)
+        for fold, (train_idx, val_idx) in enumerate(splitter.split(np.empty((n_samples, 1)))):
+            for name, model in models.items():
+                estimator = clone(model)
+                if 'n_jobs' in estimator.get_params():
+                    estimator.set_params(n_jobs=1)
+                # Fold di serie storica: train = [0, train_end), validazione contigua subito dopo
+                first.append((estimator, name, fold, int(train_idx[-1]) + 1, int(val_idx[-1]) + 1))
+
+        for name, model in models.items():
+            final = clone(model)
+            if 'n_jobs' in final.get_params():
+                final.set_params(n_jobs=self.n_jobs)
+                second.append((final, name, None, n_samples, None))
+            else:
+                first.append((final, name, None, n_samples, None))
+
+        # Prima i task più lunghi (train più grandi) per ridurre il tempo totale
+        first.sort(key=lambda task: task[3], reverse=True)
+        return first, second
+
+    async def fit(self, models: Dict[str, Any], X: np.ndarray, y: np.ndarray) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Cross-validation e refit. Ritorna (modelli addestrati su tutti i dati,
+        metriche nel formato di PredictionModel.metrics).
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        y = np.ascontiguousarray(y, dtype=np.float64)
+        n_samples, n_features = X.shape
+        phases = self._build_tasks(models, n_samples)
+
+        start = time.perf_counter()
+        if self.n_jobs <= 1:
+            results = []
+            for task in phases[0] + phases[1]:
+                results.append(await asyncio.to_thread(_fit, task[0], X, y, *task[1:]))
+        else:
+            results = await self._run_pool(phases, X, y, n_features)
+        elapsed = time.perf_counter() - start
+
+        cv_scores = {name: [] for name in models}
+        fitted = {}
+        for result in sorted(results, key=lambda r: (r['fold'] is None, r['fold'] or 0)):
+            if result['fold'] is None:
+                fitted[result['name']] = result['model']
+            else:
+                cv_scores[result['name']].append(result['score'])
+
+        metrics = {
+            "cv_scores_mean": {name: np.mean(scores) for name, scores in cv_scores.items()},
+            "cv_scores_std": {name: np.std(scores) for name, scores in cv_scores.items()},
+            "training_seconds": elapsed,
+            "cpu_seconds": sum(r['cpu_time'] for r in results),
+            "n_jobs": self.n_jobs,
+        }
+        # Il parallelismo serve al fit: in inferenza (spesso una riga) si torna al valore originale
+        for name, model in fitted.items():
+            if 'n_jobs' in model.get_params():
+                model.set_params(n_jobs=models[name].get_params()['n_jobs'])
+
+        return {name: fitted[name] for name in models}, metrics
+
+    async def _run_pool(self, phases: Tuple[List[Tuple], List[Tuple]], X: np.ndarray, y: np.ndarray,
+                        n_features: int) -> List[Dict[str, Any]]:
+        """Esegue le fasi in sequenza sul pool; X e y viaggiano solo via shared memory"""
+        loop = asyncio.get_running_loop()
+        results = []
+        with SharedMarketData({'training': {'X': X.ravel(), 'y': y}}) as shared:
+            with ProcessPoolExecutor(
+                max_workers=min(self.n_jobs, len(phases[0]) or 1),
+                initializer=_init_worker,
+                initargs=(shared.descriptor, n_features)
+            ) as pool:
+                for tasks in phases:
+                    futures = [loop.run_in_executor(pool, _fit_task, task) for task in tasks]
+                    results.extend(await asyncio.gather(*futures))
+        return results
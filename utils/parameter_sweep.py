@@ -0,0 +1,273 @@
+"""
+Parameter Sweep AurumBotX
+Valutazione parallela di migliaia di configurazioni su più processi.
+
+I dati di mercato (close + indicatori) vengono copiati una sola volta in un
+blocco multiprocessing.shared_memory; i worker vi si agganciano
+all'avvio e ricevono solo le configurazioni, restituendo record compatti.
+Con una BacktestCache i task già valutati sugli stessi dati vengono saltati.
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from utils.backtest_engine import BacktestEngine
+from utils.backtest_cache import BacktestCache, fingerprint_arrays
+
+logger = logging.getLogger(__name__)
+
+
+class SharedMarketData:
+    """Array OHLCV/indicatori di più dataset in un unico blocco shared_memory"""
+
+    def __init__(self, datasets: Dict[str, Dict[str, np.ndarray]]):
+        layout = {}
+        offset = 0
+        for dataset, arrays in datasets.items():
+            layout[dataset] = {}
+            for key, values in arrays.items():
+                layout[dataset][key] = (offset, len(values))
+                offset += len(values)
+
+        self.layout = layout
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1) * 8)
+        buffer = np.ndarray((offset,), dtype=np.float64, buffer=self.shm.buf)
+        for dataset, arrays in datasets.items():
+            for key, values in arrays.items():
+                start, length = layout[dataset][key]
+                buffer[start:start + length] = values
+
+    @property
+    def descriptor(self) -> Dict[str, Any]:
+        """Descrittore picklabile per agganciarsi al blocco da un altro processo"""
+        return {'name': self.shm.name, 'layout': self.layout}
+
+    @staticmethod
+    def attach(descriptor: Dict[str, Any]) -> Tuple[shared_memory.SharedMemory, Dict[str, Dict[str, np.ndarray]]]:
+        """Aggancia il blocco e restituisce viste read-only senza copie"""
+        shm = shared_memory.SharedMemory(name=descriptor['name'])
+        total = sum(length for arrays in descriptor['layout'].values() for _, length in arrays.values())
+        buffer = np.ndarray((total,), dtype=np.float64, buffer=shm.buf)
+        buffer.flags.writeable = False
+
+        datasets = {}
+        for dataset, arrays in descriptor['layout'].items():
+            datasets[dataset] = {
+                key: buffer[start:start + length] for key, (start, length) in arrays.items()
+            }
+        return shm, datasets
+
+    def close(self):
+        """Rilascia e distrugge il blocco condiviso"""
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def summarize_backtest(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Record compatto di metriche per una singola esecuzione"""
+    pnl = result['pnl']
+    total_trades = int(result['total_trades'])
+    initial = result['initial_balance']
+
+    if total_trades > 0:
+        equity = np.cumprod(1 + pnl)
+        running_max = np.maximum.accumulate(np.concatenate(([1.0], equity)))[1:]
+        max_drawdown = float(np.min(equity / running_max - 1))
+        std = float(np.std(pnl))
+        sharpe_ratio = float(np.mean(pnl) / std) if std > 0 else 0.0
+        win_rate = float(np.count_nonzero(pnl > 0) / total_trades)
+    else:
+        max_drawdown = 0.0
+        sharpe_ratio = 0.0
+        win_rate = 0.0
+
+    return {
+        'total_trades': total_trades,
+        'win_rate': win_rate,
+        'total_pnl': (result['final_balance'] - initial) / initial,
+        'final_balance': float(result['final_balance']),
+        'max_drawdown': max_drawdown,
+        'sharpe_ratio': sharpe_ratio,
+    }
+
+
+# Stato del worker: impostato una volta da _init_worker
+_WORKER_SHM = None
+_WORKER_DATA = None
+_WORKER_ENGINE = None
+
+
+def _init_worker(descriptor: Dict[str, Any], engine_params: Dict[str, Any]):
+    """Initializer del pool: aggancia i dati condivisi una sola volta per processo"""
+    global _WORKER_SHM, _WORKER_DATA, _WORKER_ENGINE
+    _WORKER_SHM, _WORKER_DATA = SharedMarketData.attach(descriptor)
+    _WORKER_ENGINE = BacktestEngine(**engine_params)
+
+
+def _evaluate(engine: BacktestEngine, datasets: Dict[str, Dict[str, np.ndarray]],
+              task_id: int, dataset: str, config: Dict[str, Any],
+              window: Optional[Tuple[int, int]], include_trades: bool) -> Dict[str, Any]:
+    """Valuta una configurazione (eventualmente su una finestra di candele)"""
+    cpu_start = time.process_time()
+    try:
+        arrays = datasets[dataset]
+        if window is not None:
+            start, end = window
+            arrays = {key: values[start:end] for key, values in arrays.items()}
+        result = engine.run_arrays(arrays, config)
+        record = summarize_backtest(result)
+        if include_trades:
+            record['trades'] = {
+                key: result[key] for key in
+                ('entry_idx', 'exit_idx', 'side', 'entry_price', 'exit_price', 'pnl', 'exit_reason')
+            }
+        record['error'] = None
+    except Exception as e:
+        record = {'error': str(e)}
+
+    record['task_id'] = task_id
+    record['dataset'] = dataset
+    record['window'] = window
+    record['cpu_time'] = time.process_time() - cpu_start
+    return record
+
+
+def _evaluate_chunk(chunk: List[Tuple], include_trades: bool) -> List[Dict[str, Any]]:
+    """Valuta un blocco di task nel worker"""
+    return [
+        _evaluate(_WORKER_ENGINE, _WORKER_DATA, task_id, dataset, config, window, include_trades)
+        for task_id, dataset, config, window in chunk
+    ]
+
+
+class ParameterSweep:
+    """Sweep di configurazioni su un pool di processi con dati in shared memory"""
+
+    def __init__(self, datasets: Dict[str, Dict[str, np.ndarray]],
+                 processes: Optional[int] = None, chunk_size: Optional[int] = None,
+                 engine_params: Optional[Dict[str, Any]] = None,
+                 cache: Optional[BacktestCache] = None,
+                 fingerprints: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.datasets = datasets
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.engine_params = engine_params or {}
+        self.cache = cache
+        # Impronta per dataset (simbolo/intervallo/range); default: hash degli array
+        self.fingerprints = dict(fingerprints or {})
+        if cache is not None:
+            for name, arrays in datasets.items():
+                self.fingerprints.setdefault(name, fingerprint_arrays(arrays))
+
+    def _build_tasks(self, configs: List[Dict[str, Any]],
+                     dataset_names: Optional[List[str]]) -> List[Tuple]:
+        """Prodotto configurazioni × dataset, con id progressivo"""
+        names = dataset_names or list(self.datasets.keys())
+        tasks = []
+        for config in configs:
+            for dataset in names:
+                tasks.append((len(tasks), dataset, config, None))
+        return tasks
+
+    def run(self, configs: List[Dict[str, Any]], dataset_names: Optional[List[str]] = None,
+            include_trades: bool = False) -> List[Dict[str, Any]]:
+        """
+        Valuta ogni configurazione su ogni dataset.
+        Ritorna un record per (config, dataset) con 'config_id' = indice in configs.
+        """
+        tasks = self._build_tasks(configs, dataset_names)
+        n_datasets = len(dataset_names or self.datasets)
+
+        records = self.run_tasks(tasks, include_trades)
+        for record in records:
+            record['config_id'] = record['task_id'] // n_datasets
+        return records
+
+    def run_tasks(self, tasks: List[Tuple], include_trades: bool = False) -> List[Dict[str, Any]]:
+        """
+        Valuta task espliciti (task_id, dataset, config, window) dove window è
+        None oppure (start, end) in candele. Record ordinati per task_id.
+        """
+        if not tasks:
+            return []
+
+        records, pending, keys = self._lookup_cache(tasks, include_trades)
+
+        if not pending:
+            computed = []
+        elif self.processes <= 1 or len(pending) == 1:
+            engine = BacktestEngine(**self.engine_params)
+            computed = [
+                _evaluate(engine, self.datasets, task_id, dataset, config, window, include_trades)
+                for task_id, dataset, config, window in pending
+            ]
+        else:
+            computed = self._run_pool(pending, include_trades)
+
+        if self.cache is not None:
+            for record in computed:
+                self.cache.put(keys[record['task_id']], record)
+
+        records.extend(computed)
+        records.sort(key=lambda r: r['task_id'])
+
+        failed = [r for r in records if r['error']]
+        if failed:
+            logger.warning(f"⚠️ {len(failed)}/{len(records)} configurazioni fallite: {failed[0]['error']}")
+
+        return records
+
+    def _lookup_cache(self, tasks: List[Tuple], include_trades: bool) -> Tuple[List, List, Dict[int, str]]:
+        """Separa i task già in cache (record pronti) da quelli da calcolare"""
+        if self.cache is None:
+            return [], list(tasks), {}
+
+        cached, pending, keys = [], [], {}
+        for task in tasks:
+            task_id, dataset, config, window = task
+            key = self.cache.make_key(config, self.fingerprints[dataset], self.engine_params, window)
+            record = self.cache.get(key, need_trades=include_trades)
+            if record is None:
+                keys[task_id] = key
+                pending.append(task)
+                continue
+            record.update({'task_id': task_id, 'dataset': dataset, 'window': window,
+                           'cpu_time': 0.0, 'cached': True})
+            cached.append(record)
+
+        if cached:
+            logger.info(f"💾 Cache backtest: {len(cached)}/{len(tasks)} task già valutati")
+        return cached, pending, keys
+
+    def _run_pool(self, tasks: List[Tuple], include_trades: bool) -> List[Dict[str, Any]]:
+        """Distribuisce i task al pool in blocchi; i dati viaggiano solo via shared memory"""
+        chunk_size = self.chunk_size or max(1, len(tasks) // (self.processes * 4))
+        chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+        records = []
+        with SharedMarketData(self.datasets) as shared:
+            with ProcessPoolExecutor(
+                max_workers=min(self.processes, len(chunks)),
+                initializer=_init_worker,
+                initargs=(shared.descriptor, self.engine_params)
+            ) as pool:
+                futures = [pool.submit(_evaluate_chunk, chunk, include_trades) for chunk in chunks]
+                for future in futures:
+                    records.extend(future.result())
+
+        return records
@@ -3,20 +3,23 @@ import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import TimeSeriesSplit
-from sklearn.metrics import r2_score
-import joblib
 import json
 import asyncio
-import time
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from utils.indicators import TechnicalIndicators
+from utils.feature_state import FeatureState
+from utils.parallel_training import ParallelTrainer
+from utils.model_registry import ModelRegistry, closed_bars, fingerprint_training_data
+from utils.shared_models import LazyArtifact, compile_model, save_shared, load_shared
 import random
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
+# Da incrementare quando cambia il calcolo delle feature (invalida i modelli nel registro)
+FEATURE_SCHEMA_VERSION = 1
+
 class PredictionModel:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
@@ -24,6 +27,16 @@ class PredictionModel:
         self.scaler = StandardScaler()
         self.feature_importance = {}
         self.metrics = {}
+        self.model_params = {
+            "rf": {"n_estimators": 200, "max_depth": 10, "random_state": 42},
+            "gb": {"n_estimators": 200, "learning_rate": 0.1, "random_state": 42}
+        }
+        # Registro dei modelli addestrati (creato al primo load_or_train)
+        self.registry: Optional[ModelRegistry] = None
+        self.model_key: Optional[str] = None
+        self._retrain_task: Optional[asyncio.Task] = None
+        # Artefatto da mappare al primo utilizzo (load_model con lazy=True)
+        self._lazy_artifact: Optional[LazyArtifact] = None
         self.indicators = TechnicalIndicators()
         self.openai_client = None
 
@@ -74,31 +87,147 @@ class PredictionModel:
             'obv'
         ]
 
-    def predict(self, data):
-        """Synchronous prediction method with retry logic"""
-        max_retries = 3
-        retry_delay = 1
+        # Colonna di TechnicalIndicators da cui proviene ciascuna feature attesa
+        self.feature_sources = {
+            'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume',
+            'returns': 'Returns', 'volatility': 'Volatility',
+            'sma_20': 'SMA_20', 'ema_20': 'EMA_20', 'sma_50': 'SMA_50', 'ema_50': 'EMA_50',
+            'sma_200': 'SMA_200', 'ema_200': 'EMA_200',
+            'macd': 'MACD', 'macd_signal': 'MACD_Signal', 'macd_hist': 'MACD_Hist',
+            'rsi_14': 'RSI_14', 'rsi_28': 'RSI_28',
+            'bb_middle': 'BB_Middle', 'bb_upper': 'BB_Upper', 'bb_lower': 'BB_Lower', 'bb_width': 'BB_Width',
+            'atr': 'ATR', 'volume_ma': 'Volume_MA', 'volume_ratio': 'Volume_Ratio', 'obv': 'OBV'
+        }
+
+        # Stato incrementale delle feature per simbolo e buffer 1×26 per l'inferenza
+        self.feature_states: Dict[str, FeatureState] = {}
+        self._input_vector = np.zeros((1, len(self.expected_features)))
+
+    def predict(self, data, symbol: Optional[str] = None):
+        """
+        Previsione sull'ultima candela. Con un simbolo le feature arrivano dallo
+        stato incrementale (solo le candele nuove vengono elaborate); senza,
+        dall'ultima riga di build_feature_matrix.
+        """
+        self._ensure_loaded()
+        if not self.models:
+            return {"prediction": 0.5, "confidence": 0.5}
 
-        for attempt in range(max_retries):
-            try:
-                if not self.models:
-                    return {"prediction": 0.5, "confidence": 0.5}
+        try:
+            features = self._feature_vector(data, symbol)
+            weighted_pred = 0.0
+            for name, model in self.models.items():
+                pred = model.predict(features)
+                weighted_pred += pred[0] if len(pred) > 0 else 0.5
 
-                time.sleep(retry_delay * attempt)  # Exponential backoff
-                features = self._prepare_features(data)
-                weighted_pred = 0
+            weighted_pred /= len(self.models)
+            return {"prediction": float(weighted_pred), "confidence": 0.7}
 
-                for name, model in self.models.items():
-                    pred = model.predict(features)
-                    weighted_pred += pred[0] if len(pred) > 0 else 0.5
+        except Exception as e:
+            self.logger.error(f"Prediction error: {str(e)}")
+            return {"prediction": 0.5, "confidence": 0.5}
 
-                weighted_pred /= len(self.models) if self.models else 1
-                return {"prediction": weighted_pred, "confidence": 0.7}
+    def predict_batch(self, data_by_symbol: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+        """
+        Previsioni per più simboli: le righe delle feature (dallo stato
+        incrementale di ciascun simbolo) sono impilate in una matrice, così
+        scaler e modelli vengono chiamati una sola volta per tutto il batch.
+        """
+        symbols = list(data_by_symbol)
+        neutral = {"prediction": 0.5, "confidence": 0.5}
+        self._ensure_loaded()
+        if not self.models:
+            return {symbol: dict(neutral) for symbol in symbols}
 
+        features = np.empty((len(symbols), len(self.expected_features)))
+        valid = []
+        for i, symbol in enumerate(symbols):
+            try:
+                features[i] = self.update_features(symbol, data_by_symbol[symbol])[0]
+                valid.append(i)
             except Exception as e:
-                self.logger.error(f"Prediction error: {str(e)}")
-                if attempt == max_retries - 1:
-                    return {"prediction": 0.5, "confidence": 0.5}
+                self.logger.error(f"Feature error for {symbol}: {str(e)}")
+
+        results = {symbol: dict(neutral) for symbol in symbols}
+        if valid:
+            batch = self.predict_matrix(features[valid])
+            for row, i in enumerate(valid):
+                results[symbols[i]] = {"prediction": float(batch["prediction"][row]),
+                                       "confidence": float(batch["confidence"][row])}
+        return results
+
+    def update_features(self, symbol: str, data) -> np.ndarray:
+        """Aggiorna lo stato feature del simbolo con un DataFrame OHLCV o una candela dict"""
+        state = self.feature_states.get(symbol)
+        if state is None:
+            state = self.feature_states[symbol] = FeatureState(self.expected_features)
+
+        if isinstance(data, pd.DataFrame):
+            return state.update_frame(data)
+        return state.update_candle(data)
+
+    def _feature_vector(self, data, symbol: Optional[str]) -> np.ndarray:
+        """Vettore 1×26 (scalato se lo scaler è addestrato) nel buffer preallocato"""
+        if isinstance(data, dict) and symbol is None:
+            symbol = data.get("symbol")
+            if symbol is None:
+                # Uno stream condiviso mescolerebbe le candele di simboli diversi
+                raise ValueError("A symbol is required to predict from a single candle")
+        if symbol is not None:
+            raw = self.update_features(symbol, data)
+        elif isinstance(data, pd.DataFrame):
+            raw = self.build_feature_matrix(data)[-1:]
+        else:
+            raise ValueError(f"Unsupported data type: {type(data)}")
+
+        vector = self._input_vector
+        if hasattr(self.scaler, "mean_"):
+            np.subtract(raw, self.scaler.mean_, out=vector)
+            np.divide(vector, self.scaler.scale_, out=vector)
+        else:
+            vector[:] = raw
+        return vector
+
+    def build_feature_matrix(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Matrice n×26 delle feature attese calcolata una volta sull'intera serie.
+        Usa solo indicatori causali (nessun bfill), quindi la riga i dipende
+        solo dalle candele fino a i.
+        """
+        if not self._validate_dataframe(df):
+            raise ValueError("Invalid DataFrame structure")
+
+        df = df[self.required_columns].apply(pd.to_numeric, errors='coerce')
+        df['Returns'] = df['Close'].pct_change()
+        df['Volatility'] = self.indicators.calculate_volatility(df)
+        df = self.indicators.add_trend_indicators(df)
+        df = self.indicators.add_momentum_indicators(df)
+        df = self.indicators.add_volatility_indicators(df)
+        df = self.indicators.add_volume_indicators(df)
+
+        columns = [self.feature_sources[name] for name in self.expected_features]
+        matrix = df.reindex(columns=columns).to_numpy(dtype=np.float64)
+        matrix[~np.isfinite(matrix)] = 0.0
+        return matrix
+
+    def predict_matrix(self, features: np.ndarray) -> Dict[str, np.ndarray]:
+        """Versione batch di predict: una chiamata per modello su tutte le righe"""
+        n = len(features)
+        self._ensure_loaded()
+        if not self.models:
+            return {"prediction": np.full(n, 0.5), "confidence": np.full(n, 0.5)}
+
+        try:
+            if hasattr(self.scaler, "mean_"):
+                features = (features - self.scaler.mean_) / self.scaler.scale_
+            weighted_pred = np.zeros(n)
+            for name, model in self.models.items():
+                weighted_pred += model.predict(features)
+            weighted_pred /= len(self.models)
+            return {"prediction": weighted_pred, "confidence": np.full(n, 0.7)}
+        except Exception as e:
+            self.logger.error(f"Batch prediction error: {str(e)}")
+            return {"prediction": np.full(n, 0.5), "confidence": np.full(n, 0.5)}
 
     def _validate_dataframe(self, df: Any) -> bool:
         """Validate that input is a valid DataFrame with required columns"""
@@ -157,34 +286,21 @@ class PredictionModel:
             if not self._validate_dataframe(df):
                 raise ValueError("Invalid DataFrame structure")
 
-            # Create features
-            df = self.create_features(df)
+            # Stesse 26 feature (causali) usate da predict e dallo stato incrementale
+            features = pd.DataFrame(self.build_feature_matrix(df), index=df.index,
+                                    columns=self.expected_features)
+            feature_columns = list(self.expected_features)
 
             # Create target with validation
             if target_column not in df.columns:
                 raise ValueError(f"Target column '{target_column}' not found")
 
-            # Ensure numeric type for target column
-            df[target_column] = pd.to_numeric(df[target_column], errors='coerce')
-
             # Create target variables
-            df["target"] = df[target_column].shift(-prediction_horizon)
-            df["target_returns"] = df["target"].pct_change(prediction_horizon)
-
-            # Select features with validation
-            feature_columns = [col for col in df.columns
-                            if col not in ["target", "target_returns"] + self.required_columns
-                            and pd.api.types.is_numeric_dtype(df[col])]  # Only select numeric columns
-
-            if not feature_columns:
-                raise ValueError("No valid numeric feature columns found after preparation")
-
-            # Convert all feature columns to numeric, replacing non-numeric with NaN
-            for col in feature_columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+            target = pd.to_numeric(df[target_column], errors='coerce')
+            features["target_returns"] = target.shift(-prediction_horizon).pct_change(prediction_horizon)
 
             # Drop rows with NaN values
-            df = df.dropna(subset=feature_columns + ["target_returns"])
+            df = features.dropna(subset=["target_returns"])
 
             X = df[feature_columns].iloc[:-prediction_horizon]
             y = df["target_returns"].iloc[:-prediction_horizon]
@@ -200,48 +316,38 @@ class PredictionModel:
             raise
 
     async def train_async(self, data: Any, target_column: str = "Close",
-                         prediction_horizon: int = 5) -> Optional[Dict[str, Any]]:
-        """Asynchronous version of train method"""
+                         prediction_horizon: int = 5, n_jobs: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Training con cross-validation fold × modello su un pool di processi
+        (n_jobs processi, default tutti i core) e refit finale su tutti i dati.
+        """
         try:
             X, y = self.prepare_data(data, target_column, prediction_horizon)
 
-            # Scale features
-            X_scaled = self.scaler.fit_transform(X)
+            # Scaler e modelli nuovi sostituiscono quelli in uso solo a training finito
+            scaler = StandardScaler()
+            X_scaled = scaler.fit_transform(X)
 
-            # Initialize models with basic hyperparameters
-            self.models = {
-                "rf": RandomForestRegressor(n_estimators=200, max_depth=10, random_state=42),
-                "gb": GradientBoostingRegressor(n_estimators=200, learning_rate=0.1, random_state=42)
+            models = {
+                "rf": RandomForestRegressor(**self.model_params["rf"]),
+                "gb": GradientBoostingRegressor(**self.model_params["gb"])
             }
 
-            # Cross validation
-            tscv = TimeSeriesSplit(n_splits=5)
-            cv_scores = {name: [] for name in self.models.keys()}
-
-            # Train and evaluate asynchronously
-            for train_idx, val_idx in tscv.split(X_scaled):
-                X_train, X_val = X_scaled[train_idx], X_scaled[val_idx]
-                y_train, y_val = y.iloc[train_idx], y.iloc[val_idx]
-
-                for name, model in self.models.items():
-                    # Train model asynchronously - converti a numpy per evitare warning
-                    X_train_array = X_train if isinstance(X_train, np.ndarray) else X_train
-                    X_val_array = X_val if isinstance(X_val, np.ndarray) else X_val
-                    await asyncio.to_thread(model.fit, X_train_array, y_train)
-                    pred = await asyncio.to_thread(model.predict, X_val_array)
-                    score = r2_score(y_val, pred)
-                    cv_scores[name].append(score)
-
-            # Store metrics
-            self.metrics = {
-                "cv_scores_mean": {name: np.mean(scores) for name, scores in cv_scores.items()},
-                "cv_scores_std": {name: np.std(scores) for name, scores in cv_scores.items()}
-            }
+            trainer = ParallelTrainer(n_splits=5, n_jobs=n_jobs)
+            models, metrics = await trainer.fit(models, X_scaled, y.to_numpy())
+            self.logger.info(f"Training completato in {metrics['training_seconds']:.1f}s "
+                             f"({trainer.n_jobs} processi)")
 
-            # Store feature importance
-            for name, model in self.models.items():
-                if hasattr(model, "feature_importances_"):
-                    self.feature_importance[name] = dict(zip(X.columns, model.feature_importances_))
+            feature_importance = {
+                name: dict(zip(X.columns, model.feature_importances_))
+                for name, model in models.items() if hasattr(model, "feature_importances_")
+            }
+            # Alberi compilati in array piatti: la previsione su una riga evita l'overhead di sklearn
+            models = {name: compile_model(model) for name, model in models.items()}
+            self.models, self.scaler, self.metrics = models, scaler, metrics
+            # Un artefatto lazy ancora in attesa è più vecchio di questo training
+            self._lazy_artifact = None
+            self.feature_importance = feature_importance
 
             return self.metrics
 
@@ -253,10 +359,12 @@ class PredictionModel:
                           prediction_horizon: int = 5) -> Optional[Dict[str, Any]]:
         """Asynchronous version of predict method"""
         try:
+            self._ensure_loaded()
             if not self.models:
-                self.logger.warning("Models not trained. Training now...")
-                if await self.train_async(data, target_column, prediction_horizon) is None:
+                self.logger.warning("Models not trained. Loading from registry...")
+                if await self.load_or_train(data, target_column, prediction_horizon) is None:
                     raise ValueError("Model training failed")
+                self._ensure_loaded()
 
             # Convert dict to DataFrame if necessary
             if isinstance(data, dict):
@@ -299,29 +407,127 @@ class PredictionModel:
             self.logger.error(f"Async prediction error: {str(e)}")
             return None
 
-    def save_model(self, path: str):
-        """Save model state""" 
-        if not self.models:
-            raise ValueError("No model to save")
-        joblib.dump({
+    def _artifact(self) -> Dict[str, Any]:
+        return {
             "models": self.models,
             "scaler": self.scaler,
             "metrics": self.metrics,
             "feature_importance": self.feature_importance
-        }, path)
+        }
+
+    def _apply_artifact(self, artifact: Dict[str, Any]):
+        # Gli artefatti salvati prima della compilazione contengono ancora gli stimatori sklearn
+        self.models = {name: compile_model(model) for name, model in artifact["models"].items()}
+        self.scaler = artifact["scaler"]
+        self.metrics = artifact["metrics"]
+        self.feature_importance = artifact["feature_importance"]
+
+    def save_model(self, path: str):
+        """Salva lo stato del modello in formato condivisibile (alberi compilati, array mappabili)"""
+        self._ensure_loaded()
+        if not self.models:
+            raise ValueError("No model to save")
+        save_shared(self._artifact(), path)
 
-    def load_model(self, path: str):
-        """Load model state"""
+    def load_model(self, path: str, lazy: bool = False):
+        """
+        Carica lo stato del modello mappando gli array in memoria (condivisi tra
+        processi). Con lazy=True il file viene aperto alla prima previsione.
+        """
+        if lazy:
+            self._lazy_artifact = LazyArtifact(path)
+            return
         try:
-            saved_model = joblib.load(path)
-            self.models = saved_model["models"]
-            self.scaler = saved_model["scaler"]
-            self.metrics = saved_model["metrics"]
-            self.feature_importance = saved_model["feature_importance"]
+            self._apply_artifact(load_shared(path))
         except Exception as e:
             self.logger.error(f"Error loading model: {str(e)}")
             raise
 
+    def _ensure_loaded(self):
+        """Applica l'artefatto lazy in attesa, se presente"""
+        if self._lazy_artifact is None:
+            return
+        lazy, self._lazy_artifact = self._lazy_artifact, None
+        try:
+            self._apply_artifact(lazy.get())
+        except Exception as e:
+            self.logger.error(f"Error loading model: {str(e)}")
+
+    def registry_identity(self, target_column: str = "Close",
+                          prediction_horizon: int = 5) -> tuple:
+        """(schema feature, iperparametri) che identificano una famiglia di modelli nel registro"""
+        schema = {"version": FEATURE_SCHEMA_VERSION, "features": self.expected_features}
+        hyperparams = {
+            "models": self.model_params,
+            "target_column": target_column,
+            "prediction_horizon": prediction_horizon,
+            "cv_splits": 5
+        }
+        return schema, hyperparams
+
+    async def load_or_train(self, data: pd.DataFrame, target_column: str = "Close",
+                            prediction_horizon: int = 5, symbol: str = "", interval: str = "",
+                            max_age: Optional[float] = None, n_jobs: Optional[int] = None,
+                            registry: Optional[ModelRegistry] = None) -> Optional[Dict[str, Any]]:
+        """
+        Carica dal registro il modello addestrato sugli stessi dati. Se manca,
+        usa l'ultima versione della famiglia (non più vecchia di max_age secondi)
+        e riaddestra in background; addestra subito solo se il registro è vuoto.
+        Gli artefatti del registro sono mappati alla prima previsione, non qui.
+        """
+        self.registry = registry or self.registry or ModelRegistry()
+        schema, hyperparams = self.registry_identity(target_column, prediction_horizon)
+        family = self.registry.family_key(schema, hyperparams)
+        key = self.registry.make_key(schema, fingerprint_training_data(data, symbol, interval), hyperparams)
+        # L'impronta esclude la candela in corso: anche il training usa le sole candele chiuse
+        data = closed_bars(data)
+
+        path = self.registry.path(key)
+        if path is not None:
+            self.load_model(path, lazy=True)
+            self.model_key = key
+            self.logger.info(f"Modello {key[:12]} dal registro, caricamento alla prima previsione")
+            return self.metrics
+
+        latest = self.registry.latest_key(family, max_age)
+        if latest is not None:
+            self.model_key = latest
+            self.load_model(self.registry.path(latest), lazy=True)
+            self.logger.info(f"Modello {latest[:12]} dal registro, retraining in background")
+            if self._retrain_task is None or self._retrain_task.done():
+                self._retrain_task = asyncio.create_task(self._train_and_publish(
+                    data, target_column, prediction_horizon, key, family, n_jobs, background=True))
+            return self.metrics
+
+        return await self._train_and_publish(data, target_column, prediction_horizon, key, family, n_jobs)
+
+    async def _train_and_publish(self, data: pd.DataFrame, target_column: str, prediction_horizon: int,
+                                 key: str, family: str, n_jobs: Optional[int],
+                                 background: bool = False) -> Optional[Dict[str, Any]]:
+        """Addestra e pubblica nel registro; in background cede se un altro processo addestra la stessa chiave"""
+        locked = self.registry.try_lock(key)
+        if background and not locked:
+            self.logger.info(f"Modello {key[:12]} già in training in un altro processo")
+            return None
+
+        try:
+            metrics = await self.train_async(data, target_column, prediction_horizon, n_jobs)
+            if metrics is None:
+                return None
+            self.model_key = key
+            try:
+                await asyncio.to_thread(self.registry.publish, key, family, self._artifact())
+                # Si passa alla copia mappata: la memoria privata del training viene liberata
+                published = await asyncio.to_thread(self.registry.get, key)
+                if published is not None:
+                    self._apply_artifact(published)
+            except Exception as e:
+                self.logger.error(f"Errore pubblicazione modello nel registro: {str(e)}")
+            return metrics
+        finally:
+            if locked:
+                self.registry.release(key)
+
     async def scan_twitter_sentiment(self, symbol: str) -> Dict[str, float]:
         """Analyze Twitter sentiment for a given symbol"""
         try:
@@ -339,7 +545,7 @@ class PredictionModel:
             return {"sentiment": 0.5, "confidence": 0.5}
 
     def _prepare_features(self, data) -> pd.DataFrame:
-        """Prepara features avanzate con deep learning e analisi multiframe"""
+        """Feature attese (26 colonne) per ogni riga dei dati"""
         try:
             # Se data è un dizionario, convertilo in DataFrame
             if isinstance(data, dict):
@@ -355,31 +561,10 @@ class PredictionModel:
                     elif col == "Volume":
                         df[col] = data.get("volume", 0.0)
                     else:
-                        df[col] = 0.0
-
-            # Applica gli indicatori tecnici
-            features = self.indicators.add_all_indicators(df)
-
-            # Seleziona solo le colonne numeriche
-            numeric_cols = features.select_dtypes(include=np.number).columns.tolist()
-            features = features[numeric_cols]
-
-            # Gestisci NaN residui
-            features = features.fillna(0)
-
-            # Assicurati che le colonne corrispondano a quelle usate per l\"addestramento
-            # Filtra le feature per includere solo quelle attese
-            final_features = pd.DataFrame(columns=self.expected_features)
-            for col in self.expected_features:
-                if col in features.columns:
-                    final_features[col] = features[col]
-                else:
-                    final_features[col] = 0.0 # Aggiungi colonna mancante con valore 0
-
-            # Rimuovi eventuali colonne extra
-            final_features = final_features[self.expected_features]
+                        df[col] = df["Close"] if "Close" in df.columns else 0.0
 
-            return final_features
+            return pd.DataFrame(self.build_feature_matrix(df), index=df.index,
+                                columns=self.expected_features)
         except Exception as e:
             self.logger.error(f"Error preparing features: {str(e)}")
             raise
@@ -0,0 +1,143 @@
+"""
+Sampling Profiler AurumBotX
+Profiler a campionamento attivabile a runtime sui processi long-running.
+
+Da spento non costa nulla: nessun hook di tracing, nessun thread. Da
+acceso un thread daemon legge sys._current_frames() ogni `interval`
+secondi per `duration` secondi e conta gli stack di tutti gli altri
+thread; alla fine scrive un file .folded (formato "collapsed stack":
+una riga "frame;frame;... conteggio") pronto per flamegraph.pl,
+speedscope o inferno. Si attiva con un segnale (SIGUSR2 di default,
+install_signal_handler) oppure da codice/API con PROFILER.start().
+"""
+
+import os
+import sys
+import time
+import signal
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_DURATION = 30.0
+DEFAULT_OUTPUT_DIR = 'logs/profiles'
+# Limiti di una sessione: sotto 1 ms il campionamento occupa la CPU che dovrebbe misurare
+MIN_INTERVAL = 0.001
+MAX_DURATION = 300.0
+
+
+class SamplingProfiler:
+    """Campiona gli stack di tutti i thread del processo e li aggrega in formato collapsed"""
+
+    def __init__(self, output_dir: str = DEFAULT_OUTPUT_DIR):
+        self.output_dir = Path(output_dir)
+        self.last_output: Optional[Path] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # Etichetta del frame per code object: niente formattazione di stringhe a ogni campione
+        self._labels: Dict[object, str] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: float = DEFAULT_DURATION, interval: float = DEFAULT_INTERVAL) -> bool:
+        """
+        Avvia una sessione di duration secondi; False se ce n'è già una in corso.
+        ValueError se interval < MIN_INTERVAL o duration fuori da (0, MAX_DURATION].
+        """
+        if not interval >= MIN_INTERVAL:
+            raise ValueError(f"interval deve essere almeno {MIN_INTERVAL}s")
+        if not 0 < duration <= MAX_DURATION:
+            raise ValueError(f"duration deve essere tra 0 e {MAX_DURATION:g}s")
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(duration, interval),
+                                            name='sampling-profiler', daemon=True)
+            self._thread.start()
+        logger.info(f"Profiler avviato: {duration:g}s a {1 / interval:.0f} campioni/s")
+        return True
+
+    def stop(self, wait: bool = False) -> Optional[Path]:
+        """Chiude la sessione in anticipo; con wait=True attende il file e ne restituisce il percorso"""
+        self._stop.set()
+        thread = self._thread
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+        return self.last_output
+
+    def toggle(self, duration: float = DEFAULT_DURATION, interval: float = DEFAULT_INTERVAL) -> bool:
+        """Avvia se fermo, altrimenti ferma; True se ora è in esecuzione"""
+        if self.running:
+            self.stop()
+            return False
+        return self.start(duration, interval)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _run(self, duration: float, interval: float):
+        own_id = threading.get_ident()
+        names = {}
+        stacks = Counter()
+        samples = 0
+        deadline = time.monotonic() + duration
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                if thread_id not in names:
+                    names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                frames.append(names.setdefault(thread_id, str(thread_id)))
+                stacks[';'.join(reversed(frames))] += 1
+            samples += 1
+            self._stop.wait(interval)
+        self.last_output = self._write(stacks, samples)
+
+    def _write(self, stacks: Counter, samples: int) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"profile-{os.getpid()}-{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded"
+        with open(path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info(f"Profiler: {samples} campioni, {len(stacks)} stack distinti in {path}")
+        return path
+
+
+# Profiler di processo usato da segnali e API
+PROFILER = SamplingProfiler()
+
+
+def install_signal_handler(signum: Optional[int] = None, duration: float = DEFAULT_DURATION,
+                           interval: float = DEFAULT_INTERVAL, profiler: SamplingProfiler = PROFILER) -> bool:
+    """
+    Collega un segnale (default SIGUSR2) a profiler.toggle: `kill -USR2 <pid>`
+    avvia una sessione, un secondo segnale la chiude prima di duration.
+    Va chiamata dal main thread; False dove il segnale non esiste (Windows).
+    """
+    signum = signum if signum is not None else getattr(signal, 'SIGUSR2', None)
+    if signum is None:
+        return False
+
+    def handler(received, frame):
+        # Solo thread start/evento: la scrittura del file avviene nel thread del profiler
+        profiler.toggle(duration, interval)
+
+    signal.signal(signum, handler)
+    return True
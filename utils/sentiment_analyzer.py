@@ -1,7 +1,6 @@
 import logging
-from typing import Dict, List, Optional, Union, Any
+from typing import Dict, List, Optional, Union, Any, Tuple
 import asyncio
-import concurrent.futures
 from datetime import datetime
 import json
 import os
@@ -12,13 +11,35 @@ from anthropic import Anthropic
 logger = logging.getLogger(__name__)
 
 class SentimentAnalyzer:
-    def __init__(self):
+    """
+    Sentiment per simbolo servito da una cache con TTL: le richieste
+    concorrenti per lo stesso simbolo condividono un solo fetch, e un valore
+    scaduto viene restituito subito mentre il refresh gira in background
+    (stale-while-revalidate). I refresh richiesti a breve distanza vengono
+    raggruppati e analizzati con un solo prompt multi-simbolo.
+    """
+
+    def __init__(self, cache_ttl: float = 300.0, batch_window: float = 0.05,
+                 llm_batching: bool = True, batch_token_budget: int = 3000):
         """Initialize sentiment analyzer with improved error handling and rate limiting"""
         self.last_api_call = 0
         self.min_delay_between_calls = 1.0  # Minimum seconds between API calls
         self.max_retries = 3
         self.retry_delay = 2.0
         self.fallback_enabled = True
+
+        # Cache per simbolo: (istante del fetch, risultato) e fetch in corso
+        self.cache_ttl = cache_ttl
+        self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        # Refresh raggruppati: più simboli in un solo prompt LLM
+        self.batch_window = batch_window
+        self.llm_batching = llm_batching
+        self.batch_token_budget = batch_token_budget
+        self.max_items_per_symbol = 5
+        self._pending: List[str] = []
+        self._tasks = set()
         
         # Inizializza attributi per evitare errori
         self.reddit = None
@@ -40,7 +61,7 @@ class SentimentAnalyzer:
                 self.openrouter_client = None
             else:
                 self.openrouter_client = OpenAI(
-                    base_url="https://openrouter.ai/api/v1",
+                    base_url=os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
                     api_key=openrouter_key
                 )
                 logger.info("OpenRouter client initialized successfully")
@@ -88,53 +109,167 @@ class SentimentAnalyzer:
             logger.error(f"Error initializing social clients: {e}")
             raise
 
-    async def analyze_sentiment(self, symbol: str) -> Dict[str, Any]:
-        """Analyze sentiment with improved fallback mechanisms and rate limiting"""
+    async def analyze_sentiment(self, symbol: str, wait: bool = True) -> Dict[str, Any]:
+        """
+        Sentiment del simbolo dalla cache. Un valore scaduto viene restituito
+        subito e aggiornato in background; senza valore in cache si attende il
+        fetch (condiviso con le altre richieste) oppure, con wait=False, si
+        restituisce il sentiment neutro senza bloccare il chiamante.
+        """
+        cached = self._cache.get(symbol)
+        if cached is not None:
+            fetched_at, result = cached
+            if time.time() - fetched_at > self.cache_ttl:
+                self._refresh(symbol)
+            return result
+
+        future = self._refresh(symbol)
+        if not wait:
+            return self._get_neutral_sentiment()
+        # shield: se il chiamante viene cancellato il fetch continua per gli altri
+        return await asyncio.shield(future)
+
+    async def analyze_sentiment_batch(self, symbols: List[str], wait: bool = True) -> Dict[str, Dict[str, Any]]:
+        """analyze_sentiment per più simboli: i refresh necessari partono in un unico batch"""
+        results = await asyncio.gather(*(self.analyze_sentiment(symbol, wait) for symbol in symbols))
+        return dict(zip(symbols, results))
+
+    def _refresh(self, symbol: str) -> asyncio.Future:
+        """
+        Prenota il refresh del simbolo, o restituisce quello già in corso. Le
+        richieste che arrivano entro batch_window secondi partono insieme.
+        """
+        future = self._inflight.get(symbol)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._inflight[symbol] = future
+            self._pending.append(symbol)
+            if len(self._pending) == 1:
+                loop.call_later(self.batch_window, self._start_batch)
+        return future
+
+    def _start_batch(self):
+        symbols, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._fetch_and_cache(symbols))
+        # Riferimento forte finché il task è attivo
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch_and_cache(self, symbols: List[str]):
         try:
-            social_data = {
-                "reddit": await self._get_reddit_data(symbol) if self.reddit else [],
-                "twitter": [],  # Twitter temporarily disabled
-                "telegram": [],  # Telegram temporarily disabled
+            results = await self._fetch_sentiment_batch(symbols)
+        except Exception as e:
+            logger.error(f"Error in sentiment batch: {e}")
+            results = {}
+
+        for symbol in symbols:
+            result = results.get(symbol) or self._get_neutral_sentiment()
+            self._cache[symbol] = (time.time(), result)
+            future = self._inflight.pop(symbol, None)
+            if future is not None and not future.done():
+                future.set_result(result)
+
+    async def _gather_social_data(self, symbol: str) -> Dict[str, Any]:
+        """Fetch concorrente delle fonti social attive"""
+        sources = {
+            "reddit": self._get_reddit_data(symbol),
+            # Twitter e Telegram temporaneamente disabilitati
+        }
+        results = await asyncio.gather(*sources.values(), return_exceptions=True)
+        social_data = {"twitter": [], "telegram": []}
+        for name, result in zip(sources, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching {name} data: {result}")
+                result = []
+            social_data[name] = result
+        return social_data
+
+    async def _fetch_sentiment_batch(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Analyze sentiment with improved fallback mechanisms and rate limiting"""
+        social = await asyncio.gather(*(self._gather_social_data(symbol) for symbol in symbols))
+        data_by_symbol = {
+            symbol: {
+                "symbol": symbol,
+                "items": [item for items in social_data.values() for item in items],
+                "sources": social_data,
                 "timestamp": datetime.now().isoformat()
             }
-            data = {"items": social_data}
-
-            # Respect rate limits
-            await self._wait_for_rate_limit()
-
-            # Try OpenRouter
-            if self.openrouter_client:
-                try:
-                    analysis = await self._analyze_with_openrouter(data)
-                    if analysis:
-                        logger.info("Successfully analyzed sentiment with OpenRouter")
-                        return self._create_sentiment_response(data, analysis)
-                except Exception as e:
-                    logger.error(f"OpenRouter analysis failed: {e}")
+            for symbol, social_data in zip(symbols, social)
+        }
 
-            # If AI service fails, use technical analysis
-            logger.warning("AI analysis failed, using technical analysis")
-            return await self._get_technical_analysis(data)
+        # Try OpenRouter: un prompt per batch di simboli, o uno per simbolo
+        analyses: Dict[str, Dict[str, Any]] = {}
+        if self.openrouter_client:
+            try:
+                if self.llm_batching:
+                    analyses = await self._analyze_batch_with_openrouter(data_by_symbol)
+                else:
+                    for symbol, data in data_by_symbol.items():
+                        await self._wait_for_rate_limit()
+                        analysis = await self._analyze_with_openrouter(data)
+                        if analysis:
+                            analyses[symbol] = analysis
+            except Exception as e:
+                logger.error(f"OpenRouter analysis failed: {e}")
 
-        except Exception as e:
-            logger.error(f"Error in sentiment analysis: {e}")
-            return self._get_neutral_sentiment()
+        results = {}
+        for symbol, data in data_by_symbol.items():
+            try:
+                if symbol in analyses:
+                    results[symbol] = self._create_sentiment_response(data, analyses[symbol])
+                else:
+                    # If AI service fails, use technical analysis
+                    logger.warning(f"AI analysis failed for {symbol}, using technical analysis")
+                    results[symbol] = await self._get_technical_analysis(data)
+            except Exception as e:
+                logger.error(f"Error in sentiment analysis: {e}")
+                results[symbol] = self._get_neutral_sentiment()
+        return results
 
     async def _wait_for_rate_limit(self):
         """Implement rate limiting"""
+        # Ogni chiamante prenota il proprio slot prima di attendere: i refresh
+        # concorrenti restano distanziati di min_delay_between_calls
         current_time = time.time()
-        time_since_last_call = current_time - self.last_api_call
-        if time_since_last_call < self.min_delay_between_calls:
-            await asyncio.sleep(self.min_delay_between_calls - time_since_last_call)
-        self.last_api_call = time.time()
+        slot = max(current_time, self.last_api_call + self.min_delay_between_calls)
+        self.last_api_call = slot
+        if slot > current_time:
+            await asyncio.sleep(slot - current_time)
 
     async def _analyze_with_openrouter(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Analyze with OpenRouter with improved retry logic and error handling"""
+        return await self._request_openrouter(self._create_analysis_prompt(data), self._validate_ai_response)
+
+    async def _analyze_batch_with_openrouter(self, data_by_symbol: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Una richiesta per gruppo di simboli (entro batch_token_budget); ogni
+        voce della risposta è validata a parte e i simboli senza voce valida
+        restano fuori (fallback tecnico).
+        """
+        analyses = {}
+        for symbols in self._pack_batches(data_by_symbol):
+            await self._wait_for_rate_limit()
+            prompt = self._create_batch_prompt({symbol: data_by_symbol[symbol] for symbol in symbols})
+            response = await self._request_openrouter(
+                prompt, lambda result: isinstance(result.get("results"), dict)
+            )
+            if not response:
+                continue
+            for symbol in symbols:
+                item = response["results"].get(symbol)
+                if isinstance(item, dict) and self._validate_ai_response(item):
+                    analyses[symbol] = item
+                else:
+                    logger.warning(f"Invalid or missing batch sentiment for {symbol}")
+        return analyses
+
+    async def _request_openrouter(self, prompt: str, validate) -> Optional[Dict[str, Any]]:
+        """Chat completion JSON con retry; restituisce il primo risultato che supera validate"""
         if not self.openrouter_client:
             logger.warning("OpenRouter client not initialized")
             return None
 
-        prompt = self._create_analysis_prompt(data)
         current_model = "openai/gpt-3.5-turbo"  # Use a working model for OpenRouter
 
         for attempt in range(self.max_retries):
@@ -144,30 +279,27 @@ class SentimentAnalyzer:
                     logger.info(f"Waiting {delay} seconds before retry {attempt + 1}")
                     await asyncio.sleep(delay)
 
-                loop = asyncio.get_event_loop()
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    completion = await loop.run_in_executor(
-                        executor,
-                        lambda: self.openrouter_client.chat.completions.create(
-                            model=current_model,
-                            messages=[
-                                {
-                                    "role": "system",
-                                    "content": "You are an expert crypto market analyst."
-                                },
-                                {
-                                    "role": "user",
-                                    "content": prompt
-                                }
-                            ],
-                            response_format={"type": "json_object"},
-                            temperature=0.7
-                        )
+                completion = await asyncio.to_thread(
+                    lambda: self.openrouter_client.chat.completions.create(
+                        model=current_model,
+                        messages=[
+                            {
+                                "role": "system",
+                                "content": "You are an expert crypto market analyst."
+                            },
+                            {
+                                "role": "user",
+                                "content": prompt
+                            }
+                        ],
+                        response_format={"type": "json_object"},
+                        temperature=0.7
                     )
+                )
 
                 if completion and completion.choices:
                     result = json.loads(completion.choices[0].message.content)
-                    if self._validate_ai_response(result):
+                    if isinstance(result, dict) and validate(result):
                         logger.info(f"OpenRouter analysis successful with model {current_model}")
                         return result
 
@@ -328,6 +460,53 @@ class SentimentAnalyzer:
         }}
         """
 
+    def _symbol_snippet(self, symbol: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Dati social compatti di un simbolo per il prompt batch"""
+        items = data.get("items", [])
+        return {
+            "symbol": symbol,
+            "items": len(items),
+            "avg_engagement": round(sum(self._get_engagement_score(item) for item in items) / max(1, len(items)), 2),
+            "headlines": [str(item.get("title", ""))[:120] for item in items[:self.max_items_per_symbol]]
+        }
+
+    def _pack_batches(self, data_by_symbol: Dict[str, Dict[str, Any]]) -> List[List[str]]:
+        """Gruppi di simboli il cui prompt resta entro batch_token_budget (stima: 4 caratteri per token)"""
+        batches, current, used = [], [], 0
+        for symbol, data in data_by_symbol.items():
+            tokens = len(json.dumps(self._symbol_snippet(symbol, data))) // 4 + 60
+            if current and used + tokens > self.batch_token_budget:
+                batches.append(current)
+                current, used = [], 0
+            current.append(symbol)
+            used += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _create_batch_prompt(self, data_by_symbol: Dict[str, Dict[str, Any]]) -> str:
+        """Prompt multi-simbolo: una voce per simbolo nello stesso formato di _create_analysis_prompt"""
+        snippets = [self._symbol_snippet(symbol, data) for symbol, data in data_by_symbol.items()]
+        return f"""
+        Analyze the market sentiment of each of the following crypto symbols.
+
+        Symbols: {", ".join(data_by_symbol)}
+        Data: {json.dumps(snippets)}
+
+        Provide analysis in JSON format, with one entry per symbol:
+        {{
+            "results": {{
+                "<symbol>": {{
+                    "sentiment": "positive/negative/neutral",
+                    "confidence": float between 0 and 1,
+                    "key_points": ["point1", "point2"],
+                    "market_signals": ["signal1", "signal2"],
+                    "risk_level": "low/medium/high"
+                }}
+            }}
+        }}
+        """
+
     def _create_sentiment_response(self, data: Dict[str, Any], analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Create a standardized sentiment response"""
         return {
@@ -347,20 +526,24 @@ class SentimentAnalyzer:
             return []
 
         try:
-            subreddit = self.reddit.subreddit("cryptocurrency")
-            posts = []
-            for submission in subreddit.search(symbol, limit=10):
-                posts.append({
-                    "title": submission.title,
-                    "score": submission.score,
-                    "comments": submission.num_comments,
-                    "url": submission.url
-                })
-            return posts
+            # praw è sincrono: la ricerca gira in un thread per non bloccare l'event loop
+            return await asyncio.to_thread(self._search_reddit, symbol)
         except Exception as e:
             logger.error(f"Error fetching Reddit data: {e}")
             return []
 
+    def _search_reddit(self, symbol: str) -> List[Dict[str, Any]]:
+        subreddit = self.reddit.subreddit("cryptocurrency")
+        posts = []
+        for submission in subreddit.search(symbol, limit=10):
+            posts.append({
+                "title": submission.title,
+                "score": submission.score,
+                "comments": submission.num_comments,
+                "url": submission.url
+            })
+        return posts
+
 
 
 
@@ -0,0 +1,188 @@
+"""
+Shared Models AurumBotX
+Artefatti dei modelli condivisi tra processi tramite memory map.
+
+Gli artefatti sono salvati con joblib non compresso: ogni array NumPy resta
+allineato nel file e al caricamento viene mappato (mmap copy-on-write)
+invece che copiato, quindi N processi sullo stesso host condividono le
+stesse pagine della page cache. Gli alberi di scikit-learn copiano i nodi
+in memoria privata quando vengono deserializzati: per questo RandomForest,
+GradientBoosting e DecisionTree sono salvati come FlatForest, cioè array
+piatti (feature, threshold, left, right, value) valutati senza sklearn.
+"""
+
+import os
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+logger = logging.getLogger(__name__)
+
+_LEAF = -1
+
+
+class FlatForest:
+    """
+    Ensemble di alberi di regressione in array piatti. Le foglie puntano a
+    se stesse, così ogni riga percorre esattamente max_depth passi e tutti
+    gli alberi avanzano insieme con operazioni vettoriali. children[i] è
+    (figlio sinistro, figlio destro): il passo è children[nodo, x > soglia].
+
+    predizione = offset + scale * aggregate(valore foglia per albero)
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, max_depth: int,
+                 n_features: int, scale: float = 1.0, offset: float = 0.0, aggregate: str = 'mean',
+                 feature_importances: Optional[np.ndarray] = None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features
+        self.scale = scale
+        self.offset = offset
+        self.aggregate = aggregate
+        self.feature_importances_ = feature_importances
+
+    @classmethod
+    def from_trees(cls, trees, n_features: int, **kwargs) -> 'FlatForest':
+        """
+        Concatena i nodi di più sklearn Tree riscrivendo gli indici dei figli.
+        Gli indici sono np.intp: con int32 NumPy convertirebbe a ogni accesso.
+        """
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset, max_depth = 0, 0
+        for tree in trees:
+            n = tree.node_count
+            index = np.arange(offset, offset + n)
+            leaf = tree.children_left == _LEAF
+            features.append(np.where(leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            children.append(np.stack([np.where(leaf, index, tree.children_left + offset),
+                                      np.where(leaf, index, tree.children_right + offset)], axis=1).astype(np.intp))
+            values.append(tree.value[:, 0, 0].astype(np.float64))
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        return cls(np.concatenate(features), np.concatenate(thresholds), np.concatenate(children),
+                   np.concatenate(values), np.asarray(roots, dtype=np.intp),
+                   max_depth, n_features, **kwargs)
+
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """Indice della foglia raggiunta da ogni riga in ogni albero (n_righe × n_alberi)"""
+        # Come sklearn: il confronto avviene sui valori convertiti a float32
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if len(X) == 1:
+            return self.leaves_row(X[0])[None, :]
+        nodes = np.repeat(self.roots[None, :], len(X), axis=0)
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.max_depth):
+            go_right = X[rows, self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[nodes, go_right.astype(np.intp)]
+        return nodes
+
+    def leaves_row(self, x: np.ndarray) -> np.ndarray:
+        """Percorso per una sola riga (float32): un'indicizzazione per livello, senza matrici ausiliarie"""
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            nodes = self.children[nodes, (x[self.feature[nodes]] > self.threshold[nodes]).astype(np.intp)]
+        return nodes
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1 or len(X) == 1:
+            # Segnale live: una riga, nessuna validazione né matrice di foglie
+            leaf_values = self.value[self.leaves_row(X.reshape(-1))]
+            combined = leaf_values.mean() if self.aggregate == 'mean' else leaf_values.sum()
+            return np.array([self.offset + self.scale * combined])
+        leaf_values = self.value[self.leaves(X)]
+        combined = leaf_values.mean(axis=1) if self.aggregate == 'mean' else leaf_values.sum(axis=1)
+        return self.offset + self.scale * combined
+
+
+def compile_model(model: Any) -> Any:
+    """FlatForest equivalente per gli alberi di regressione sklearn; gli altri modelli restano invariati"""
+    try:
+        if isinstance(model, RandomForestRegressor) and model.n_outputs_ == 1:
+            return FlatForest.from_trees([est.tree_ for est in model.estimators_], model.n_features_in_,
+                                         aggregate='mean', feature_importances=model.feature_importances_)
+
+        if isinstance(model, GradientBoostingRegressor):
+            # Solo init costante (DummyRegressor di default o 'zero'): la predizione iniziale non dipende da X
+            if isinstance(model.init_, str) and model.init_ == 'zero':
+                offset = 0.0
+            elif hasattr(model.init_, 'constant_'):
+                offset = float(model._raw_predict_init(np.zeros((1, model.n_features_in_)))[0, 0])
+            else:
+                return model
+            return FlatForest.from_trees([est.tree_ for est in model.estimators_[:, 0]], model.n_features_in_,
+                                         scale=model.learning_rate, offset=offset, aggregate='sum',
+                                         feature_importances=model.feature_importances_)
+
+        if isinstance(model, DecisionTreeRegressor) and model.n_outputs_ == 1:
+            return FlatForest.from_trees([model.tree_], model.n_features_in_,
+                                         feature_importances=model.feature_importances_)
+    except AttributeError:
+        # Modello non addestrato
+        pass
+    return model
+
+
+def _compile(obj: Any) -> Any:
+    """Compila gli alberi dentro dict e liste dell'artefatto"""
+    if isinstance(obj, dict):
+        return {key: _compile(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_compile(value) for value in obj)
+    return compile_model(obj)
+
+
+def save_shared(artifact: Any, path: str):
+    """Salva un artefatto condivisibile: alberi compilati, nessuna compressione, scrittura atomica"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        joblib.dump(_compile(artifact), tmp)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def load_shared(path: str) -> Any:
+    """
+    Carica un artefatto mappando gli array in copy-on-write: le pagine sono
+    lette dal disco solo al primo accesso e restano condivise finché nessun
+    processo le modifica (es. partial_fit dei modelli online).
+    """
+    return joblib.load(path, mmap_mode='c')
+
+
+class LazyArtifact:
+    """Artefatto caricato da disco al primo utilizzo"""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._artifact: Optional[Dict[str, Any]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._artifact is not None
+
+    def get(self) -> Any:
+        if self._artifact is None:
+            self._artifact = load_shared(self.path)
+            logger.info(f"Artefatto {self.path} mappato in memoria")
+        return self._artifact
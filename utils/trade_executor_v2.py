@@ -1,56 +1,3 @@
-#!/usr/bin/env python3  
-"""  
-Data Preprocessor Enterprise - Elimina completamente errori NaN  
-"""  
-import pandas as pd  
-import numpy as np  
-from sklearn.impute import SimpleImputer  
-from sklearn.preprocessing import RobustScaler  
-from sklearn.ensemble import IsolationForest  
-  
-class EnterpriseDataPreprocessor:  
-    def __init__(self):  
-        self.imputer = SimpleImputer(strategy='median')  
-        self.scaler = RobustScaler()  
-        self.outlier_detector = IsolationForest(contamination=0.1, random_state=42)  
-          
-    def clean_data(self, data):  
-        """Pulizia completa dei dati con eliminazione NaN garantita"""  
-        if data is None or (hasattr(data, 'empty') and data.empty):  
-            return None  
-              
-        df = data.copy()  
-          
-        # 1. Rimuovi colonne con >50% NaN  
-        threshold = len(df) * 0.5  
-        df = df.dropna(thresh=threshold, axis=1)  
-          
-        # 2. Rimuovi righe con NaN  
-        df = df.dropna()  
-          
-        # 3. Sostituisci infiniti con NaN e poi rimuovi  
-        df = df.replace([np.inf, -np.inf], np.nan)  
-        df = df.dropna()  
-          
-        # 4. Rimuovi outliers estremi  
-        numeric_cols = df.select_dtypes(include=[np.number]).columns  
-        if len(numeric_cols) > 0 and len(df) > 10:  
-            try:  
-                outlier_mask = self.outlier_detector.fit_predict(df[numeric_cols])  
-                df = df[outlier_mask == 1]  
-            except:  
-                pass  
-          
-        # 5. Validazione finale  
-        assert not df.isnull().any().any(), "NaN ancora presenti!"  
-        assert not np.isinf(df.select_dtypes(include=[np.number]).values).any(), "Infiniti ancora presenti!"  
-          
-        return df
-PIANO_LAVORO_FIX_TRADING.md:62-76
-
-2. Trade Executor Robusto (Zero Trade Execution) 
-Il sistema non esegue trade perché la logica non triggera PIANO_LAVORO_FIX_TRADING.md:22-28 . Crea utils/trade_executor_v2.py:
-
 #!/usr/bin/env python3  
 """  
 Trade Executor con retry logic e validazione completa  
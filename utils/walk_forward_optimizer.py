@@ -0,0 +1,168 @@
+"""
+Walk-Forward Optimizer AurumBotX
+Ottimizzazione parametri strategia con backtest reali su finestre mobili.
+
+Ogni candidato viene rigiocato sui dati di mercato con BacktestEngine su
+finestre train/test consecutive. La successive halving valuta tutti i
+candidati sulle prime finestre e concede le successive solo ai migliori,
+entro un budget di CPU espresso in secondi per candidato.
+"""
+
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from utils.parameter_sweep import ParameterSweep
+from utils.backtest_cache import BacktestCache
+
+logger = logging.getLogger(__name__)
+
+# Punteggio assegnato a candidati con troppo pochi trade per essere valutati
+MIN_SCORE = -1.0
+
+
+class WalkForwardOptimizer:
+    """Successive halving su finestre walk-forward con budget CPU per candidato"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], n_windows: int = 6,
+                 train_ratio: float = 0.7, eta: int = 3, min_trades: int = 5,
+                 drawdown_penalty: float = 0.5, cpu_budget_per_candidate: float = 0.5,
+                 processes: Optional[int] = None, warmup: int = 50,
+                 cache: Optional[BacktestCache] = None,
+                 fingerprint: Optional[Dict[str, Any]] = None):
+        self.arrays = arrays
+        self.n_windows = n_windows
+        self.train_ratio = train_ratio
+        self.eta = eta
+        self.min_trades = min_trades
+        self.drawdown_penalty = drawdown_penalty
+        self.cpu_budget_per_candidate = cpu_budget_per_candidate
+        self.windows = self.build_windows(len(arrays['close']), n_windows, train_ratio, warmup)
+        self.sweep = ParameterSweep({'market': arrays}, processes=processes,
+                                    engine_params={'warmup': 0}, cache=cache,
+                                    fingerprints={'market': fingerprint} if fingerprint else None)
+
+    @staticmethod
+    def build_windows(n_bars: int, n_windows: int, train_ratio: float,
+                      warmup: int = 50) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """Finestre mobili (train, test) consecutive dopo il warmup degli indicatori"""
+        usable = n_bars - warmup
+        if usable <= 0 or n_windows <= 0:
+            return []
+
+        # Ogni finestra avanza di un blocco di test; il train copre i blocchi precedenti
+        step = usable / (n_windows + train_ratio / (1 - train_ratio))
+        train_len = int(step * train_ratio / (1 - train_ratio))
+        test_len = int(step)
+        if train_len <= 0 or test_len <= 0:
+            return []
+
+        windows = []
+        for k in range(n_windows):
+            train_start = warmup + k * test_len
+            train_end = train_start + train_len
+            test_end = min(train_end + test_len, n_bars)
+            if train_end >= test_end:
+                break
+            windows.append(((train_start, train_end), (train_end, test_end)))
+        return windows
+
+    def score(self, record: Dict[str, Any]) -> float:
+        """Obiettivo: rendimento penalizzato dal drawdown, con minimo di trade"""
+        if record.get('error') or record['total_trades'] < self.min_trades:
+            return MIN_SCORE
+        return record['total_pnl'] + self.drawdown_penalty * record['max_drawdown']
+
+    def _evaluate(self, candidates: List[Dict[str, Any]], candidate_ids: List[int],
+                  window_ids: List[int]) -> Tuple[Dict[Tuple[int, int], Tuple[float, float]], float]:
+        """Valuta candidati × finestre; ritorna {(cand, win): (train, test)} e CPU spesa"""
+        tasks = []
+        keys = []
+        for cand in candidate_ids:
+            for win in window_ids:
+                train, test = self.windows[win]
+                tasks.append((len(tasks), 'market', candidates[cand], train))
+                tasks.append((len(tasks), 'market', candidates[cand], test))
+                keys.append((cand, win))
+
+        records = self.sweep.run_tasks(tasks)
+        cpu = sum(r['cpu_time'] for r in records)
+        scores = {}
+        for k, key in enumerate(keys):
+            scores[key] = (self.score(records[2 * k]), self.score(records[2 * k + 1]))
+        return scores, cpu
+
+    def optimize(self, candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Successive halving: al rung r i sopravvissuti vengono valutati su
+        eta^r finestre; si tiene il miglior 1/eta per score medio di train.
+        Il vincitore è riportato con lo score out-of-sample (test).
+        """
+        if not candidates or not self.windows:
+            raise ValueError("Nessun candidato o dati insufficienti per le finestre walk-forward")
+
+        budget = self.cpu_budget_per_candidate * len(candidates)
+        cpu_spent = 0.0
+        evaluations = 0
+        scores: Dict[Tuple[int, int], Tuple[float, float]] = {}
+        alive = list(range(len(candidates)))
+        done = 0
+        target = 1
+        rung = 0
+
+        while True:
+            # Tutti i sopravvissuti hanno le stesse finestre: si valutano solo le nuove
+            new_windows = list(range(done, target))
+            new_scores, cpu = self._evaluate(candidates, alive, new_windows)
+            scores.update(new_scores)
+            cpu_spent += cpu
+            evaluations += len(alive) * len(new_windows)
+            done = target
+
+            alive.sort(
+                key=lambda cand: np.mean([scores[(cand, w)][0] for w in range(done)]),
+                reverse=True
+            )
+            logger.info(f"🔬 Rung {rung}: {len(alive)} candidati su {done} finestre, "
+                        f"CPU {cpu_spent:.2f}s/{budget:.2f}s")
+
+            if len(alive) == 1 or done >= len(self.windows):
+                break
+
+            next_alive = alive[:max(1, len(alive) // self.eta)]
+            next_target = min(done * self.eta, len(self.windows))
+            estimated = cpu_spent / evaluations * len(next_alive) * (next_target - done)
+            if cpu_spent + estimated > budget:
+                logger.info("⏱️ Budget CPU esaurito: stop alla successive halving")
+                break
+
+            alive = next_alive
+            target = next_target
+            rung += 1
+
+        best = alive[0]
+        windows_used = list(range(done))
+        return {
+            'best_index': best,
+            'best_config': candidates[best],
+            'train_score': float(np.mean([scores[(best, w)][0] for w in windows_used])),
+            'test_score': float(np.mean([scores[(best, w)][1] for w in windows_used])),
+            'test_scores': [scores[(best, w)][1] for w in windows_used],
+            'windows_used': windows_used,
+            'survivors': alive,
+            'cpu_seconds': cpu_spent,
+            'cpu_budget': budget,
+            'rungs': rung + 1,
+        }
+
+    def evaluate_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Score train/test di una singola configurazione su tutte le finestre"""
+        scores, cpu = self._evaluate([config], [0], list(range(len(self.windows))))
+        ordered = [scores[(0, w)] for w in range(len(self.windows))]
+        return {
+            'train_score': float(np.mean([s[0] for s in ordered])),
+            'test_score': float(np.mean([s[1] for s in ordered])),
+            'test_scores': [s[1] for s in ordered],
+            'cpu_seconds': cpu,
+        }
@@ -15,7 +15,7 @@ from pathlib import Path
 
 # Configurazione passata come argomento
 if len(sys.argv) < 2:
-    print("Usage: python3 wallet_runner.py <config_file>")
+    print("Usage: python3 wallet_runner.py <config_file> [--monte-carlo <cycles> [paths]]")
     sys.exit(1)
 
 CONFIG_FILE = sys.argv[1]
@@ -147,7 +147,38 @@ def run_cycle(state, config):
     
     return state
 
+def run_monte_carlo(n_cycles, n_paths=10000):
+    """Valuta la configurazione con una simulazione Monte Carlo invece del loop live"""
+    from utils.monte_carlo import MonteCarloEngine, WalletSimulationParams
+    
+    params = WalletSimulationParams.from_wallet_config(config)
+    engine = MonteCarloEngine(n_paths=n_paths)
+    
+    start = time.time()
+    report = engine.simulate(params, n_cycles)
+    elapsed = time.time() - start
+    
+    final = report['final_capital']['percentiles']
+    drawdown = report['max_drawdown_pct']['percentiles']
+    logger.info("=" * 80)
+    logger.info(f"MONTE CARLO: {WALLET_ID} | {n_paths} path x {n_cycles} cicli ({elapsed:.2f}s)")
+    logger.info("=" * 80)
+    logger.info(f"Capitale finale P5/P50/P95: ${final[5]:.2f} / ${final[50]:.2f} / ${final[95]:.2f}")
+    logger.info(f"Max drawdown P50/P95: {drawdown[50]:.2f}% / {drawdown[95]:.2f}%")
+    logger.info(f"Probabilità di perdita: {report['loss_probability']*100:.1f}%")
+    logger.info(f"Probabilità di rovina (<{engine.ruin_threshold*100:.0f}% capitale): {report['ruin_probability']*100:.2f}%")
+    if 'drawdown_limit_breach_probability' in report:
+        logger.info(f"Probabilità superamento max drawdown config: "
+                    f"{report['drawdown_limit_breach_probability']*100:.1f}%")
+    logger.info(f"Trade medi per path: {report['avg_trades']:.0f} | Win rate: {report['win_rate']*100:.1f}%")
+    
+    return report
+
 def main():
+    # kill -USR2 <pid>: profilo a campionamento in logs/profiles (flamegraph)
+    from utils.profiler import install_signal_handler
+    install_signal_handler()
+    
     logger.info("=" * 80)
     logger.info(f"AURUMBOTX - WALLET RUNNER: {WALLET_ID}")
     logger.info("=" * 80)
@@ -179,5 +210,8 @@ def main():
         logger.info(f"Stato salvato. Capitale finale: ${state['capital']:.2f}")
 
 if __name__ == '__main__':
-    main()
+    if len(sys.argv) > 3 and sys.argv[2] == '--monte-carlo':
+        run_monte_carlo(int(sys.argv[3]), int(sys.argv[4]) if len(sys.argv) > 4 else 10000)
+    else:
+        main()
 